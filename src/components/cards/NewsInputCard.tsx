@@ -6,7 +6,7 @@ interface NewsInputProps {
     symbol?: string;
     target_document_id?: string;
   };
-  onNewsSubmitted?: () => void;
+  onNewsSubmitted?: (rawNews?: Array<{ summary: string; timestamp: string; uuid: string }>) => void;
 }
 
 export const NewsInputCard = ({ data, onNewsSubmitted }: NewsInputProps) => {
@@ -68,7 +68,7 @@ export const NewsInputCard = ({ data, onNewsSubmitted }: NewsInputProps) => {
         setSuccessMessage(result.message || 'News successfully added!');
         setNewsText('');
         if (onNewsSubmitted) {
-          onNewsSubmitted();
+          onNewsSubmitted(Array.isArray(result.raw_news) ? result.raw_news : undefined);
         }
       } else {
         let errorMessage = 'Failed to add news.';
@@ -0,0 +1,71 @@
+# app.py
+
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.staticfiles import StaticFiles
+
+from api.routers import strategies
+from api.services.lazy_import import preload
+from api.services.metrics import MetricsMiddleware
+
+# 設為 1 時在 create_app() 中導入 pandas / numpy：配合 gunicorn --preload，
+# 由主進程導入一次，fork 出的 worker 共用這些內存頁；默認在第一次使用時才導入
+APP_PRELOAD = os.getenv("APP_PRELOAD", "0") == "1"
+PRELOAD_MODULES = ["numpy", "pandas"]
+
+def create_app(stocks: bool = True, preload_modules: bool = APP_PRELOAD) -> FastAPI:
+    """
+    Builds the API: strategy routes always, stock routes (and their MongoDB-backed
+    services) when `stocks` is set. Importing and building the app never touches the
+    database; each worker connects, ensures indexes and warms its caches in the
+    lifespan, so the app can be preloaded in a master process before forking.
+    """
+    stock_routes = None
+    if stocks:
+        from api.routers import stocks as stock_routes
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if stock_routes is not None:
+            await stock_routes.startup()
+        try:
+            yield
+        finally:
+            if stock_routes is not None:
+                await stock_routes.shutdown()
+
+    app = FastAPI(
+        title="股票數據 API",
+        description="快速查詢 TradeZero_Bot 數據庫中的股票基本面數據",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+
+    # 添加 CORS 中間件
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # 超過 1KB 的響應以 gzip 壓縮（圖表及列表響應壓縮率很高）
+    app.add_middleware(GZipMiddleware, minimum_size=1024)
+    # 最外層：按路由記錄請求數、延遲、響應大小（壓縮後）及各階段耗時
+    app.add_middleware(MetricsMiddleware)
+
+    # 掛載靜態文件目錄
+    app.mount("/assets", StaticFiles(directory="assets"), name="assets")
+
+    app.include_router(strategies.router)
+    if stock_routes is not None:
+        app.include_router(stock_routes.router)
+
+    if preload_modules:
+        preload(*PRELOAD_MODULES)
+    return app
@@ -0,0 +1,55 @@
+# baseline.py
+
+import json
+import os
+from typing import Dict, List
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(latencies_s: List[float], elapsed_s: float) -> Dict[str, float]:
+    """Throughput and latency percentiles (milliseconds) for one benchmark case."""
+    return {
+        "count": len(latencies_s),
+        "throughput": len(latencies_s) / elapsed_s if elapsed_s else 0.0,
+        "p50_ms": percentile(latencies_s, 50) * 1000,
+        "p95_ms": percentile(latencies_s, 95) * 1000,
+        "p99_ms": percentile(latencies_s, 99) * 1000,
+    }
+
+def load_baseline(path):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_baseline(path, results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+def compare(results, baseline, tolerance=0.2, metrics=("p95_ms", "p99_ms")) -> List[str]:
+    """
+    Regressions of `results` against `baseline`: latency metrics may grow and throughput
+    may shrink by at most `tolerance` (0.2 = 20%). Cases missing from either side are skipped.
+    """
+    regressions = []
+    for case, current in results.items():
+        previous = (baseline or {}).get(case)
+        if not previous:
+            continue
+        for metric in metrics:
+            if metric in previous and current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{case}: {metric} {previous[metric]:.2f} -> {current[metric]:.2f}")
+        if "throughput" in previous and current["throughput"] < previous["throughput"] * (1 - tolerance):
+            regressions.append(f"{case}: throughput {previous['throughput']:.1f} -> {current['throughput']:.1f}")
+    return regressions
+
+def report(results, baseline=None):
+    for case, row in results.items():
+        previous = (baseline or {}).get(case)
+        delta = f" (baseline p95 {previous['p95_ms']:.2f}ms)" if previous and "p95_ms" in previous else ""
+        print(f"{case:<40} n={row['count']:<6} {row['throughput']:10.1f}/s "
+              f"p50={row['p50_ms']:8.2f}ms p95={row['p95_ms']:8.2f}ms p99={row['p99_ms']:8.2f}ms{delta}")
@@ -0,0 +1,103 @@
+"""
+Concurrency benchmark for the async MongoDB access layer.
+
+Runs N concurrent clients against the same find_one workload twice: once calling the
+synchronous driver directly inside the coroutine (the old behaviour) and once through
+AsyncMongoHandler. Prints p50/p95/p99 latency for both, plus the latency of a trivial
+coroutine scheduled alongside, which shows how badly the event loop is blocked.
+
+    python -m api.benchmarks.bench_async_mongo --clients 200 --latency-ms 5
+    python -m api.benchmarks.bench_async_mongo --uri mongodb://localhost:27017
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from api.benchmarks.mongo_fixture import BenchMongoHandler
+from api.services.async_mongo import AsyncMongoHandler
+
+COLLECTION = "fundamentals_of_top_list_symbols"
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def seed(handler, symbols):
+    collection = handler.raw_db[COLLECTION]
+    collection.delete_many({})
+    collection.insert_many([
+        {"symbol": f"S{i:04d}", "today_date": "2025-01-02", "day_close": float(i)}
+        for i in range(symbols)
+    ])
+
+async def run_clients(call, clients, requests_per_client, symbols):
+    latencies = []
+    probe_latencies = []
+    stop = asyncio.Event()
+
+    async def client(client_id):
+        for n in range(requests_per_client):
+            query = {"symbol": f"S{(client_id + n) % symbols:04d}"}
+            started = time.perf_counter()
+            # 每個請求作為獨立任務調度（如同 uvicorn），延遲包含等待事件循環的時間
+            await asyncio.create_task(call(query))
+            latencies.append(time.perf_counter() - started)
+
+    async def probe():
+        # 模擬不需要查詢數據庫的請求（例如 /health），衡量事件循環是否被阻塞
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            probe_latencies.append(time.perf_counter() - started - 0.001)
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+    return latencies, probe_latencies or [0.0], elapsed
+
+def report(name, latencies, probe_latencies, elapsed):
+    ms = lambda s: f"{s * 1000:8.2f}ms"
+    print(f"{name:<10} requests={len(latencies):<6} throughput={len(latencies) / elapsed:9.1f}/s "
+          f"p50={ms(percentile(latencies, 50))} p95={ms(percentile(latencies, 95))} "
+          f"p99={ms(percentile(latencies, 99))} mean={ms(statistics.mean(latencies))} "
+          f"loop-stall p99={ms(percentile(probe_latencies, 99))}")
+
+async def main(args):
+    handler = BenchMongoHandler(uri=args.uri, latency_ms=args.latency_ms)
+    seed(handler, args.symbols)
+    collection = handler.db[COLLECTION]
+
+    async def blocking_call(query):
+        return collection.find_one(query, {"day_close": 1})
+
+    mongo_db = AsyncMongoHandler(handler, pool_size=args.pool_size)
+
+    async def executor_call(query):
+        return await mongo_db.find_one(COLLECTION, query, {"day_close": 1})
+
+    print(f"clients={args.clients} requests/client={args.requests} "
+          f"latency={args.latency_ms}ms pool={args.pool_size} backend={'mongod' if args.uri else 'mongomock'}")
+    report("blocking", *await run_clients(blocking_call, args.clients, args.requests, args.symbols))
+    report("executor", *await run_clients(executor_call, args.clients, args.requests, args.symbols))
+    mongo_db.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5, help="requests per client")
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--pool-size", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=5.0,
+                        help="simulated network latency per call (mongomock only makes sense with > 0)")
+    parser.add_argument("--uri", default=None, help="MongoDB URI of a local mongod; defaults to mongomock")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,90 @@
+"""
+Benchmark for the chart pipeline (filter + Tvlwc formatting).
+
+Compares the original per-row implementation with the columnar pipeline in
+services/fastapi_utils.py on synthetic 1m series, and checks both produce the same rows.
+
+    python -m api.benchmarks.bench_chart_pipeline --bars 10000 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import pandas as pd
+
+from api.services.fastapi_utils import build_chart_data
+
+def make_bars(count, start=datetime(2025, 1, 2, 4, 0)):
+    """Bars shaped like the stored *_chart_data arrays (BSON dates decode to naive datetimes)."""
+    price = 10.0
+    bars = []
+    for i in range(count):
+        close = price * (1 + ((i * 7919) % 200 - 100) / 10000)
+        bars.append({
+            "datetime": start + timedelta(minutes=i),
+            "open": price,
+            "high": max(price, close) + 0.05,
+            "low": min(price, close) - 0.05,
+            "close": close,
+            "volume": 1000 + i % 500
+        })
+        price = close
+    return bars
+
+def legacy_pipeline(chart_data):
+    """The original filter_chart_data -> to_dict('records') -> per-row prepare_tvlwc_data path."""
+    df = pd.DataFrame(chart_data)
+    if df['datetime'].dtype == 'object':
+        df['datetime'] = pd.to_datetime(df['datetime'])
+    records = df.sort_values('datetime').to_dict('records')
+
+    formatted = []
+    for item in records:
+        if isinstance(item.get('datetime'), str):
+            try:
+                dt = datetime.fromisoformat(item['datetime'])
+            except ValueError:
+                continue
+        else:
+            dt = item.get('datetime')
+        if not dt:
+            continue
+        formatted.append({
+            'time': dt.isoformat(),
+            'open': float(item.get('open', 0)),
+            'high': float(item.get('high', 0)),
+            'low': float(item.get('low', 0)),
+            'close': float(item.get('close', 0)),
+            'volume': float(item.get('volume', 0))
+        })
+    return formatted
+
+def best_of(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+def main(args):
+    for count in args.bars:
+        bars = make_bars(count)
+        legacy_s, legacy_rows = best_of(lambda: legacy_pipeline(bars), args.repeat)
+        rows_s, rows = best_of(lambda: build_chart_data(bars, 'all'), args.repeat)
+        columns_s, _ = best_of(lambda: build_chart_data(bars, 'all', compact=True), args.repeat)
+        assert rows == legacy_rows, "columnar pipeline output differs from the legacy path"
+        print(f"bars={count:<7} legacy={legacy_s * 1000:9.2f}ms rows={rows_s * 1000:9.2f}ms "
+              f"({legacy_s / rows_s:4.1f}x) columns={columns_s * 1000:9.2f}ms ({legacy_s / columns_s:4.1f}x)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    main(parser.parse_args())
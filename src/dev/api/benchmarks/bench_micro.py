@@ -0,0 +1,85 @@
+"""
+Micro-benchmarks for the chart, serialization and pagination helpers.
+
+Each case is timed call by call on synthetic data (timeit-style, no extra dependency)
+and reported as throughput plus p50/p95/p99. With --baseline the run fails when a case
+regresses by more than --tolerance; --save-baseline records the current numbers.
+
+    python -m api.benchmarks.bench_micro --bars 2000 --iterations 200
+    python -m api.benchmarks.bench_micro --baseline api/benchmarks/baselines/micro.json
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from bson import ObjectId
+
+from api.benchmarks.baseline import compare, load_baseline, report, save_baseline, summarize
+from api.benchmarks.synthetic import make_fundamentals
+from api.services.chart_resample import downsample_ohlcv, resample_ohlcv
+from api.services.fastapi_utils import build_chart_data, chart_frame, frame_to_tvlwc
+from api.services.json_response import dumps_mongo
+from api.services.pagination import decode_cursor, encode_cursor
+
+def cases(bars):
+    document = {"_id": ObjectId(), **make_fundamentals("ABCD", "2025-01-02", bars, random.Random(7))}
+    chart = document["1m_chart_data"]
+    frame = chart_frame(chart)
+    cursor = encode_cursor({"today_date": "2025-01-02", "symbol": "ABCD", "_id": document["_id"]})
+    return {
+        "chart_frame": lambda: chart_frame(chart),
+        "frame_to_tvlwc rows": lambda: frame_to_tvlwc(frame),
+        "frame_to_tvlwc columns": lambda: frame_to_tvlwc(frame, compact=True),
+        "resample_ohlcv 15m": lambda: resample_ohlcv(frame, "15m"),
+        "downsample_ohlcv minmax 300": lambda: downsample_ohlcv(frame, 300, "minmax"),
+        "downsample_ohlcv lttb 300": lambda: downsample_ohlcv(frame, 300, "lttb"),
+        "build_chart_data 1m": lambda: build_chart_data(chart, "1m"),
+        "build_chart_data 5m columns": lambda: build_chart_data(document["5m_chart_data"], "5m", compact=True),
+        "dumps_mongo document": lambda: dumps_mongo(document),
+        "decode_cursor": lambda: decode_cursor(cursor),
+    }
+
+def time_case(fn, iterations, warmup=3):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - call_started)
+    return summarize(samples, time.perf_counter() - started)
+
+def main(args):
+    results = {}
+    for bars in args.bars:
+        for name, fn in cases(bars).items():
+            if args.only and not any(pattern in name for pattern in args.only):
+                continue
+            results[f"{name} bars={bars}"] = time_case(fn, args.iterations)
+
+    baseline = load_baseline(args.baseline)
+    report(results, baseline)
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+        print(f"baseline saved to {args.save_baseline}")
+
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION  {line}")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--only", nargs="*", help="run only cases whose name contains one of these strings")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="write the results to this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    main(parser.parse_args())
@@ -0,0 +1,69 @@
+"""
+Benchmark for response serialization of MongoDB documents.
+
+Compares the old json_util.dumps -> json.loads -> JSONResponse path with the single-pass
+orjson encoder behind MongoJSONResponse, on a fundamentals document with N bars per
+chart array, and checks both produce the same JSON.
+
+    python -m api.benchmarks.bench_serialization --bars 1000 10000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from bson import Decimal128, ObjectId, json_util
+from fastapi.responses import JSONResponse
+
+from api.benchmarks.bench_chart_pipeline import make_bars
+from api.services.json_response import MongoJSONResponse
+
+def make_document(bars):
+    chart = make_bars(bars)
+    return {
+        "_id": ObjectId(),
+        "symbol": "ABCD",
+        "name": "ABCD Holdings",
+        "today_date": "2025-01-02",
+        "day_close": 3.21,
+        "market_cap_float": Decimal128("123456789.12"),
+        "company_info": {"sector": "Technology", "employees": 120},
+        "key_levels": [2.5, 3.0, 3.5],
+        "raw_news": [{"summary": "news " * 40, "timestamp": "2025-01-02T09:00:00", "uuid": str(i)} for i in range(20)],
+        "1m_chart_data": chart,
+        "5m_chart_data": chart[::5],
+        "1d_chart_data": chart[::390],
+    }
+
+def legacy_render(document):
+    return JSONResponse(content=json.loads(json_util.dumps(document))).body
+
+def orjson_render(document):
+    return MongoJSONResponse(content=document).body
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), body
+
+def main(args):
+    for bars in args.bars:
+        document = make_document(bars)
+        legacy_s, legacy_body = best_of(lambda: legacy_render(document), args.repeat)
+        fast_s, fast_body = best_of(lambda: orjson_render(document), args.repeat)
+        assert json.loads(legacy_body) == json.loads(fast_body), "serialized documents differ"
+        print(f"bars={bars:<7} size={len(fast_body) / 1024:9.1f}KiB legacy={legacy_s * 1000:9.2f}ms "
+              f"orjson={fast_s * 1000:8.2f}ms ({legacy_s / fast_s:5.1f}x)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    main(parser.parse_args())
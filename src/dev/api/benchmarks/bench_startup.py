@@ -0,0 +1,159 @@
+"""
+Cold-start benchmark for the FastAPI app.
+
+Every run starts a fresh interpreter in public/ and adds up what a new serverless /
+autoscaled instance pays before its first useful response: interpreter launch,
+importing run_fastapi (create_app() included), the lifespan startup (MongoDB connect,
+cache warm-up; index creation runs in the background) and the first
+/api/stocks/latest_day response. The database is a seeded mongomock (or --uri); seeding
+happens between the import and the lifespan and is not counted. mongomock copies whole
+documents on every aggregation, so the default keeps the seeded chart arrays short. --no-lifespan times
+only the import and the first /api/strategies response.
+
+The run fails when the p50 cold start exceeds --budget-ms, when a module listed in
+--forbid is already imported after create_app() (pandas / numpy are meant to load
+on first use) or, with --baseline, when a case regresses by more than --tolerance.
+
+    python -m api.benchmarks.bench_startup --runs 5 --budget-ms 1500
+    python -m api.benchmarks.bench_startup --no-lifespan
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from api.benchmarks.baseline import compare, load_baseline, report, save_baseline, summarize
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+PUBLIC_DIR = os.path.abspath(os.path.join(SRC_DIR, '..', '..', 'public'))
+
+# 在全新的解釋器中執行：第一行輸出 started，結果以 JSON 寫到最後一行
+CHILD = r'''
+print("started", flush=True)
+import asyncio, importlib, json, sys, time
+options = json.loads(sys.argv[1])
+sys.path.append(options["src"])
+timings = {}
+
+started = time.perf_counter()
+run_fastapi = importlib.import_module("api.run_fastapi")
+timings["import"] = time.perf_counter() - started
+loaded = [name for name in options["watch"] if name in sys.modules]
+
+import httpx
+
+async def first_response(path):
+    transport = httpx.ASGITransport(app=run_fastapi.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        started = time.perf_counter()
+        response = await http.get(path)
+        elapsed = time.perf_counter() - started
+    if response.status_code != 200:
+        raise SystemExit(f"{path}: {response.status_code} {response.text[:200]}")
+    return elapsed
+
+if options["lifespan"]:
+    # 準備數據庫（不計入冷啟動）
+    from api.benchmarks.mongo_fixture import BenchMongoHandler
+    from api.benchmarks.synthetic import COLLECTION, seed_fundamentals
+    stocks = importlib.import_module("api.routers.stocks")
+    handler = BenchMongoHandler(options["uri"])
+    seed_fundamentals(handler.raw_db[COLLECTION], options["symbols"], options["days"], options["bars"])
+    stocks.bind_mongo_handler(handler)
+
+    async def lifespan():
+        started = time.perf_counter()
+        await stocks.startup()
+        timings["startup"] = time.perf_counter() - started
+        try:
+            timings["first_request"] = await first_response("/api/stocks/latest_day")
+        finally:
+            await stocks.shutdown()
+
+    asyncio.run(lifespan())
+    if options["uri"]:
+        handler.client.drop_database(handler.raw_db.name)
+else:
+    timings["first_request"] = asyncio.run(first_response("/api/strategies"))
+
+print(json.dumps({"timings": timings, "loaded": loaded}))
+'''
+
+def run_once(options):
+    """Cold start = interpreter launch + import + lifespan startup + first response."""
+    with tempfile.TemporaryFile(mode="w+") as errors:
+        started = time.perf_counter()
+        child = subprocess.Popen(
+            [sys.executable, "-c", CHILD, json.dumps(options)],
+            cwd=PUBLIC_DIR, stdout=subprocess.PIPE, stderr=errors, text=True
+        )
+        first_line = child.stdout.readline()
+        launch = time.perf_counter() - started
+        # 繼續從同一個（帶緩衝的）文件對象讀取，不能改用 communicate()
+        rest = child.stdout.read()
+        child.wait()
+        errors.seek(0)
+        if child.returncode != 0 or first_line.strip() != "started":
+            raise SystemExit(f"啟動失敗:\n{errors.read()[-2000:]}")
+    result = json.loads([line for line in rest.splitlines() if line.startswith("{")][-1])
+    timings = result["timings"]
+    timings["launch"] = launch
+    timings["cold_start"] = launch + timings["import"] + timings.get("startup", 0.0) + timings["first_request"]
+    return result
+
+def main(args):
+    options = {
+        "src": SRC_DIR, "watch": args.forbid, "lifespan": args.lifespan, "uri": args.uri,
+        "symbols": args.symbols, "days": args.days, "bars": args.bars,
+    }
+    samples, loaded = {}, set()
+    started = time.perf_counter()
+    for _ in range(args.runs):
+        result = run_once(options)
+        loaded.update(result["loaded"])
+        for name, seconds in result["timings"].items():
+            samples.setdefault(name, []).append(seconds)
+    elapsed = time.perf_counter() - started
+
+    # 這裡的吞吐量沒有意義，比較只看延遲
+    results = {name: summarize(values, elapsed) for name, values in samples.items()}
+    baseline = load_baseline(args.baseline)
+    report(results, baseline)
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+        print(f"baseline saved to {args.save_baseline}")
+
+    failures = compare(results, baseline, args.tolerance, metrics=("p50_ms", "p95_ms"))
+    failures = [f"REGRESSION  {line}" for line in failures]
+    cold_start = results["cold_start"]["p50_ms"]
+    if cold_start > args.budget_ms:
+        failures.append(f"OVER BUDGET cold start p50 {cold_start:.0f}ms > {args.budget_ms:.0f}ms")
+    for name in sorted(loaded):
+        failures.append(f"EAGER IMPORT {name} is imported by create_app()")
+    for line in failures:
+        print(line)
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="p50 cold-start budget")
+    parser.add_argument("--forbid", nargs="*", default=["pandas", "numpy", "_mongo"],
+                        help="modules that must not be imported by create_app()")
+    parser.add_argument("--no-lifespan", dest="lifespan", action="store_false",
+                        help="skip the lifespan startup (no database; first request is /api/strategies)")
+    parser.add_argument("--uri", default=None, help="MongoDB URI for the lifespan startup (default: mongomock)")
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--days", type=int, default=3)
+    # 啟動路徑只讀標量字段；mongomock 每次聚合都會複製整份文檔，K線多時測到的是 mongomock 本身
+    parser.add_argument("--bars", type=int, default=30)
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="write the results to this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    main(parser.parse_args())
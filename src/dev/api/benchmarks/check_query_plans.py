@@ -0,0 +1,85 @@
+"""
+Explain-plan check for the indexed list queries.
+
+Seeds a scratch database on a real mongod (mongomock cannot explain), creates the
+indexes the API ensures at startup and fails if any checked pipeline falls back to a
+COLLSCAN or an in-memory SORT.
+
+    python -m api.benchmarks.check_query_plans --uri mongodb://localhost:27017
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from bson import ObjectId
+from pymongo import MongoClient
+
+from api.services.leaderboard import (
+    LIST_PROJECTION, TOP_MOVER_SORT_FIELDS, assert_index_backed, ensure_indexes, explain_pipeline,
+    top_movers_pipeline
+)
+from api.services.pagination import STOCK_LIST_SORT, encode_cursor, keyset_match
+
+COLLECTION = "fundamentals_of_top_list_symbols"
+
+def seed(collection, dates, symbols):
+    collection.drop()
+    collection.insert_many([
+        {
+            "symbol": f"S{s:04d}",
+            "today_date": f"2025-01-{d + 1:02d}",
+            "close_change_percentage": (s * 37 % 200) - 50.0,
+            "high_change_percentage": (s * 53 % 300) * 1.0,
+            "company_info": {"sector": "Technology"},
+        }
+        for d in range(dates) for s in range(symbols)
+    ])
+
+def checked_pipelines():
+    """(name, pipeline) pairs that must be served from an index."""
+    for sort_by in TOP_MOVER_SORT_FIELDS:
+        yield f"top-movers {sort_by}", top_movers_pipeline("2025-01-02", sort_by, 10)
+
+    cursor = encode_cursor({"today_date": "2025-01-03", "symbol": "S0100", "_id": ObjectId("0" * 24)})
+    for date in ["2025-01-02", None]:
+        query = {"today_date": date} if date else {}
+        for name, match in [("first page", query), ("cursor page", {"$and": [query, keyset_match(cursor)]})]:
+            yield f"stocks {name} date={date}", [
+                {"$match": match},
+                {"$sort": STOCK_LIST_SORT},
+                {"$limit": 50},
+                {"$project": LIST_PROJECTION},
+            ]
+
+def main(args):
+    client = MongoClient(args.uri)
+    db = client[args.db]
+    collection = db[COLLECTION]
+    seed(collection, args.dates, args.symbols)
+    ensure_indexes(collection)
+
+    failures = 0
+    for name, pipeline in checked_pipelines():
+        plan = explain_pipeline(db, COLLECTION, pipeline)
+        try:
+            assert_index_backed(plan)
+            print(f"ok    {name}: {plan['stages']}")
+        except AssertionError as e:
+            failures += 1
+            print(f"FAIL  {name}: {e}")
+
+    if not args.keep:
+        client.drop_database(args.db)
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=os.getenv("MONGODB_CONNECTION_STRING", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="TradeZero_Bot_plan_check")
+    parser.add_argument("--dates", type=int, default=5)
+    parser.add_argument("--symbols", type=int, default=300)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    main(parser.parse_args())
@@ -0,0 +1,147 @@
+"""
+In-process load test for the FastAPI app.
+
+Seeds synthetic fundamentals documents (symbols x days x bars) into mongomock or a local
+mongod, binds them to the stock routes through bind_mongo_handler and drives /stocks/,
+/top-movers, /stocks/{symbol}/chart and /api/strategy/{name} through httpx's ASGI
+transport with N concurrent clients. Reports throughput and p50/p95/p99 per route and
+fails when a route regresses past the stored baseline or any request errors.
+
+mongomock evaluates aggregations in Python (copying every document before $project),
+so its absolute numbers are only useful for comparing runs against each other; use
+--uri with a local mongod for realistic latencies.
+
+    python -m api.benchmarks.load_test --symbols 200 --days 5 --bars 600 --concurrency 32
+    python -m api.benchmarks.load_test --uri mongodb://localhost:27017 --save-baseline api/benchmarks/baselines/load.json
+"""
+
+import argparse
+import asyncio
+import importlib
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import httpx
+
+from api.app import create_app
+from api.benchmarks.baseline import compare, load_baseline, report, save_baseline, summarize
+from api.benchmarks.mongo_fixture import BenchMongoHandler
+from api.benchmarks.synthetic import COLLECTION, seed_fundamentals
+
+# 應用以 public/ 為工作目錄運行（靜態文件及策略 JSON 在 public/assets 下）
+PUBLIC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'public'))
+
+def import_app(handler):
+    """Builds the app with the stock routes bound to the benchmark handler (no _mongo needed)."""
+    os.chdir(PUBLIC_DIR)
+    stocks = importlib.import_module("api.routers.stocks")
+    stocks.bind_mongo_handler(handler)
+    return stocks, create_app()
+
+def scenarios(symbols, dates, strategy_names):
+    """(route label, weight, request factory) tuples; factories return (path, params)."""
+    return [
+        ("/stocks/", 2, lambda rnd: ("/stocks/", {"date": rnd.choice(dates), "limit": 50})),
+        ("/top-movers", 3, lambda rnd: ("/top-movers", {"date": rnd.choice(dates), "limit": 10})),
+        ("/stocks/{symbol}", 2, lambda rnd: (f"/stocks/{rnd.choice(symbols)}", {"date": rnd.choice(dates)})),
+        ("/stocks/{symbol}/bundle", 2, lambda rnd: (
+            f"/stocks/{rnd.choice(symbols)}/bundle", {"date": rnd.choice(dates)}
+        )),
+        ("/stocks/batch", 1, lambda rnd: (
+            "/stocks/batch",
+            {"symbols": ",".join(rnd.sample(symbols, min(20, len(symbols)))), "date": rnd.choice(dates)}
+        )),
+        ("/stocks/{symbol}/chart", 4, lambda rnd: (
+            f"/stocks/{rnd.choice(symbols)}/chart",
+            {"date": rnd.choice(dates), "timeframe": rnd.choice(["1m", "5m", "1d"])}
+        )),
+        ("/api/strategy/{name}", 1, lambda rnd: (
+            f"/api/strategy/{rnd.choice(strategy_names)}", {"image_format": "url"}
+        )),
+    ]
+
+async def drive(app, plan, total, concurrency, seed):
+    latencies = {label: [] for label, _, _ in plan}
+    errors = []
+    labels = [label for label, weight, _ in plan for _ in range(weight)]
+    factories = {label: factory for label, _, factory in plan}
+    remaining = total
+
+    async def client(client_id, http):
+        nonlocal remaining
+        rnd = random.Random(seed + client_id)
+        while remaining > 0:
+            remaining -= 1
+            label = rnd.choice(labels)
+            path, params = factories[label](rnd)
+            started = time.perf_counter()
+            response = await http.get(path, params=params)
+            latencies[label].append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors.append(f"{response.status_code} {path} {response.text[:120]}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(i, http) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    results = {label: summarize(samples, elapsed) for label, samples in latencies.items() if samples}
+    results["all"] = summarize([s for samples in latencies.values() for s in samples], elapsed)
+    return results, errors
+
+def main(args):
+    handler = BenchMongoHandler(args.uri, latency_ms=args.latency_ms)
+    started = time.perf_counter()
+    symbols, dates = seed_fundamentals(handler.raw_db[COLLECTION], args.symbols, args.days, args.bars)
+    print(f"seeded {len(symbols) * len(dates)} documents ({args.bars} bars each) in {time.perf_counter() - started:.1f}s")
+
+    stocks, app = import_app(handler)
+    stocks.mongo_db.query_timeout_ms = args.query_timeout_ms
+    strategy_names = [s.名稱 for group in stocks.strategy_catalog.strategies.values() for s in group]
+    plan = scenarios(symbols, dates, strategy_names)
+
+    async def warm_then_measure():
+        # 預熱：填充排行榜、文檔及日期緩存後再計時（同一個事件循環，緩存中的鎖不能跨循環使用）
+        await drive(app, plan, min(args.requests, 50), args.concurrency, args.seed + 1000)
+        return await drive(app, plan, args.requests, args.concurrency, args.seed)
+
+    results, errors = asyncio.run(warm_then_measure())
+    stocks.mongo_db.shutdown()
+
+    baseline = load_baseline(args.baseline)
+    report(results, baseline)
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+        print(f"baseline saved to {args.save_baseline}")
+
+    for line in errors[:10]:
+        print(f"ERROR       {line}")
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION  {line}")
+    if args.uri and not args.keep:
+        handler.client.drop_database(handler.raw_db.name)
+    sys.exit(1 if errors or regressions else 0)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--bars", type=int, default=390, help="1m bars per document")
+    parser.add_argument("--requests", type=int, default=500, help="total requests")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="extra latency per driver call")
+    parser.add_argument("--query-timeout-ms", type=int, default=30000,
+                        help="query budget for the run (mongomock is much slower than mongod)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--uri", default=None, help="MongoDB URI of a local mongod; defaults to mongomock")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="write the results to this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    main(parser.parse_args())
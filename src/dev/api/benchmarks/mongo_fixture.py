@@ -0,0 +1,79 @@
+# mongo_fixture.py
+
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+# mongomock 不接受的 pymongo 參數
+_MONGOMOCK_UNSUPPORTED = {"distinct": {"maxTimeMS"}}
+
+def _replay_bulk_write(collection, operations, ordered=True, **kwargs):
+    # mongomock 的批量寫入不接受新版 pymongo UpdateOne 的 sort 參數，逐條執行
+    modified = 0
+    for operation in operations:
+        result = collection.update_one(operation._filter, operation._doc, upsert=bool(operation._upsert))
+        modified += result.modified_count
+    return SimpleNamespace(modified_count=modified)
+
+class _SlowCollection:
+    """Wraps a collection and adds a fixed per-call latency to emulate network round trips."""
+
+    def __init__(self, collection, latency_s: float, mongomock: bool = False):
+        self._collection = collection
+        self._latency_s = latency_s
+        self._mongomock = mongomock
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+        if name == "bulk_write" and self._mongomock:
+            attr = lambda operations, **kwargs: _replay_bulk_write(self._collection, operations, **kwargs)
+        unsupported = _MONGOMOCK_UNSUPPORTED.get(name, ()) if self._mongomock else ()
+        if not self._latency_s and not unsupported:
+            return attr
+
+        def _slow(*args, **kwargs):
+            for key in unsupported:
+                kwargs.pop(key, None)
+            if self._latency_s:
+                time.sleep(self._latency_s)
+            return attr(*args, **kwargs)
+
+        return _slow
+
+class _SlowDatabase:
+    def __init__(self, db, latency_s: float, mongomock: bool = False):
+        self._db = db
+        self._latency_s = latency_s
+        self._mongomock = mongomock
+
+    def __getitem__(self, name):
+        return _SlowCollection(self._db[name], self._latency_s, self._mongomock)
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+class BenchMongoHandler:
+    """
+    MongoHandler stand-in for benchmarks.
+    Uses a local mongod when a URI is given, otherwise an in-process mongomock database.
+    """
+
+    def __init__(self, uri: Optional[str] = None, db_name: str = "TradeZero_Bot_bench",
+                 latency_ms: float = 0.0):
+        if uri:
+            from pymongo import MongoClient
+            from api.services.async_mongo import client_options
+            self.client = MongoClient(uri, **client_options())
+        else:
+            import mongomock
+            self.client = mongomock.MongoClient()
+        self.raw_db = self.client[db_name]
+        self.db = _SlowDatabase(self.raw_db, latency_ms / 1000, mongomock=not uri)
+
+    def is_connected(self) -> bool:
+        return True
+
+    def find_one(self, collection_name, query):
+        return self.db[collection_name].find_one(query)
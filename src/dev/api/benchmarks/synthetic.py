@@ -0,0 +1,76 @@
+# synthetic.py
+
+import random
+from datetime import datetime, timedelta
+
+from bson import Decimal128
+
+from api.benchmarks.bench_chart_pipeline import make_bars
+
+COLLECTION = "fundamentals_of_top_list_symbols"
+SECTORS = ["Technology", "Healthcare", "Energy", "Financial Services", "Consumer Cyclical"]
+
+def symbol_name(index):
+    return f"S{index:04d}"
+
+def trading_dates(days, start="2025-01-02"):
+    """`days` consecutive weekdays starting at `start`, as YYYY-MM-DD strings."""
+    current = datetime.strptime(start, "%Y-%m-%d")
+    dates = []
+    while len(dates) < days:
+        if current.weekday() < 5:
+            dates.append(current.strftime("%Y-%m-%d"))
+        current += timedelta(days=1)
+    return dates
+
+def make_fundamentals(symbol, date, bars, rnd):
+    """One fundamentals_of_top_list_symbols document with `bars` 1m bars starting at 04:00."""
+    chart = make_bars(bars, datetime.strptime(date, "%Y-%m-%d").replace(hour=4))
+    closes = [bar["close"] for bar in chart] or [10.0]
+    yesterday_close = round(rnd.uniform(1, 20), 2)
+    return {
+        "symbol": symbol,
+        "name": f"{symbol} Holdings",
+        "today_date": date,
+        "yesterday_close": yesterday_close,
+        "day_close": closes[-1],
+        "day_high": max(closes),
+        "day_low": min(closes),
+        "market_open_high": max(closes),
+        "market_open_low": min(closes),
+        "close_change_percentage": rnd.uniform(-30, 150),
+        "high_change_percentage": rnd.uniform(0, 250),
+        "float_risk": rnd.choice(["Low", "Medium", "High"]),
+        "sector": rnd.choice(SECTORS),
+        "company_info": {"sector": rnd.choice(SECTORS), "employees": rnd.randint(5, 5000)},
+        "market_cap_float": Decimal128(f"{rnd.uniform(1e6, 5e8):.2f}"),
+        "cash": rnd.uniform(1e5, 5e7),
+        "debt": rnd.uniform(0, 2e7),
+        "key_levels": sorted(round(rnd.uniform(min(closes), max(closes)), 2) for _ in range(4)),
+        "suggestion": "watch",
+        "hype_score": rnd.randint(0, 10),
+        "squeeze_score": rnd.randint(0, 10),
+        "atm_urgency": rnd.choice(["low", "medium", "high"]),
+        "short_signal": rnd.random() < 0.3,
+        "raw_news": [],
+        "1m_chart_data": chart,
+        "5m_chart_data": chart[::5],
+        "1d_chart_data": chart[::390] or chart[:1],
+    }
+
+def seed_fundamentals(collection, symbols, days, bars, seed=42, batch=200):
+    """Replaces the collection with symbols x days documents; returns (symbols, dates)."""
+    rnd = random.Random(seed)
+    names = [symbol_name(i) for i in range(symbols)]
+    dates = trading_dates(days)
+    collection.delete_many({})
+    pending = []
+    for date in dates:
+        for symbol in names:
+            pending.append(make_fundamentals(symbol, date, bars, rnd))
+            if len(pending) >= batch:
+                collection.insert_many(pending)
+                pending = []
+    if pending:
+        collection.insert_many(pending)
+    return names, dates
@@ -0,0 +1,1085 @@
+# stocks.py
+
+import asyncio
+import os
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+from zoneinfo import ZoneInfo
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+
+# 導入新創建的實用工具
+from api.services.fastapi_utils import as_number, format_market_cap, build_chart_data
+from api.services.chart_resample import DOWNSAMPLE_METHODS, SUPPORTED_TIMEFRAMES, source_timeframe
+from api.services.strategy_catalog import strategy_catalog
+from api.services.async_mongo import AsyncMongoHandler, QueryTimeoutError
+from api.services.date_index import DateIndex
+from api.services.document_cache import MISSING, DocumentCache
+from api.services.market_calendar import is_past_date
+from api.services.chart_window import chart_window, unsupported_expression, window_expression
+from api.services.chart_store import CHART_BARS_COLLECTION, ColumnarChartStore, ensure_chart_bar_indexes
+from api.services.leaderboard import DAY_LIST_PROJECTION, LIST_PROJECTION, LeaderboardCache, TOP_MOVER_SORT_FIELDS, ensure_indexes
+from api.services.pagination import STOCK_LIST_SORT, keyset_match, next_cursor
+from api.services.json_response import MongoJSONResponse, dumps_mongo
+from api.services.metrics import metrics_registry, timed
+from api.services.symbol_search import SymbolSearchIndex
+from api.services.screener import ScreenEngine, ScreenRequest, screen_id
+from api.services.signal_engine import SignalEngine
+from api.services.shared_cache import SHARED_CACHE_URL, SharedCache, SharedLease, open_backend
+from api.services.news_store import AddNewsRequest, DeleteNewsRequest, NewsStore, NewsWriteError
+from api.services.summary_materializer import (
+    SUMMARY_COLLECTION, SUMMARY_INDEXES, SUMMARY_MATERIALIZER, SUMMARY_PROJECTION, SummaryMaterializer
+)
+from api.services.live_feed import TOP_MOVERS_LIMIT, TOP_MOVERS_TOPIC, LiveFeed, LiveHub, symbol_topic
+from api.services.http_cache import (
+    LAST_UPDATED_FIELDS, REVALIDATE_CACHE_CONTROL, cache_control_for, conditional_json,
+    document_etag, etag_matches, not_modified
+)
+
+router = APIRouter()
+
+# 啟動時預熱的最長時間（秒），超時後照常開始接受請求；設為 0 時不預熱
+WARMUP_TIMEOUT = float(os.getenv("APP_WARMUP_TIMEOUT", "10"))
+
+def open_mongo_handler():
+    """導入本模塊時不連接數據庫；_mongo 及其連接在 worker 啟動時才載入"""
+    # 導入您的 MongoHandler
+    # 其中的 MongoClient 應使用 async_mongo.client_options()，讓選擇服務器的等待低於查詢超時；
+    # 未設置時 AsyncMongoHandler.run 的 pymongo.timeout 仍會把它限制在查詢超時之內
+    from _mongo import MongoHandler  # 假設您的文件名為 paste.py
+    return MongoHandler()
+
+# MongoDB 連接在每個 worker 啟動時建立（而不是導入時），多進程部署時各自持有連接池
+# 所有查詢經由有界線程池執行，避免阻塞事件循環
+mongo_db = AsyncMongoHandler(handler_factory=open_mongo_handler)
+
+SYMBOL_COLLECTION = "fundamentals_of_top_list_symbols"
+
+# 多個 worker 共用的讀緩存後端（SHARED_CACHE_URL，默認 local 即每個進程各自緩存）
+shared_backend = open_backend(SHARED_CACHE_URL)
+
+def shared_cache(namespace: str) -> Optional[SharedCache]:
+    return SharedCache(shared_backend, namespace) if shared_backend is not None else None
+
+# 按日期緩存的漲跌幅排行榜
+leaderboard = LeaderboardCache(mongo_db, SYMBOL_COLLECTION, shared=shared_cache("board:top"))
+# 儀表板每日列表（按收盤漲幅排序，最多 500 行）
+day_lists = LeaderboardCache(mongo_db, SYMBOL_COLLECTION, depth=500, projection=DAY_LIST_PROJECTION,
+                             shared=shared_cache("board:day"))
+# 可用交易日期索引
+date_index = DateIndex(mongo_db, SYMBOL_COLLECTION)
+# 每日摘要（含 VWAP、相對成交量等衍生指標），後台增量物化；某日期全部物化後列表改讀摘要
+# 多個 worker 時只有持有租約的一個負責計算
+summary_materializer = SummaryMaterializer(
+    mongo_db, SYMBOL_COLLECTION, date_index,
+    lease=SharedLease(shared_backend, "summary_materializer") if shared_backend is not None else None
+)
+summary_lists = LeaderboardCache(mongo_db, SUMMARY_COLLECTION, depth=500, projection=SUMMARY_PROJECTION,
+                                 shared=shared_cache("board:summary_day"))
+summary_leaderboard = LeaderboardCache(mongo_db, SUMMARY_COLLECTION, projection=SUMMARY_PROJECTION,
+                                       shared=shared_cache("board:summary_top"))
+# 按 (symbol, date, 字段) 緩存的單個股票文檔
+document_cache = DocumentCache(shared=shared_cache("doc"))
+# 新聞寫入（冪等 $push / $pull，只失效對應代碼及日期的詳情緩存）
+news_store = NewsStore(mongo_db, SYMBOL_COLLECTION)
+# 代碼 / 公司名稱 / 行業的內存搜索索引（隨新交易日增量更新）
+search_index = SymbolSearchIndex(mongo_db, SYMBOL_COLLECTION, date_index)
+# 服務端篩選：按 (條件哈希, 日期) 緩存結果
+screener = ScreenEngine(mongo_db, SYMBOL_COLLECTION, shared=shared_cache("screen"))
+# chart_bars 分桶列式K線（CHART_STORAGE=columnar/auto 時啟用）
+chart_store = ColumnarChartStore(mongo_db)
+# 策略信號掃描：按日期在進程池中計算並物化到 strategy_signals
+signal_engine = SignalEngine(mongo_db, SYMBOL_COLLECTION, chart_store)
+# 實時推送：按代碼訂閱的 SSE 客戶端，數據變化時每輪只讀一次數據庫
+live_hub = LiveHub()
+live_feed = LiveFeed(
+    live_hub, mongo_db, SYMBOL_COLLECTION,
+    latest_date=date_index.latest,
+    top_movers=lambda date: leaderboard.top(date, "close_change_percentage", TOP_MOVERS_LIMIT),
+    source=os.getenv("LIVE_FEED_SOURCE", "auto")
+)
+
+def bind_mongo_handler(handler) -> None:
+    """切換底層的 MongoHandler（基準測試使用合成數據），並清空基於舊數據的緩存"""
+    mongo_db.handler = handler
+    document_cache.invalidate()
+    leaderboard.invalidate()
+    day_lists.invalidate()
+    date_index.reset()
+    summary_materializer.reset()
+    summary_lists.invalidate()
+    summary_leaderboard.invalidate()
+    search_index.reset()
+    screener.invalidate()
+    signal_engine.invalidate()
+
+metrics_registry.register_cache("document", document_cache)
+metrics_registry.register_cache("leaderboard", leaderboard)
+metrics_registry.register_cache("day_lists", day_lists)
+metrics_registry.register_cache("summary_lists", summary_lists)
+metrics_registry.register_cache("summary_leaderboard", summary_leaderboard)
+metrics_registry.register_cache("screener", screener)
+metrics_registry.register_cache("signals", signal_engine)
+
+for name, cache in [("shared_document", document_cache.shared), ("shared_leaderboard", leaderboard.shared)]:
+    if cache is not None:
+        metrics_registry.register_cache(name, cache)
+
+async def ensure_mongo_indexes():
+    """確保排行榜及按代碼查詢所需的複合索引存在"""
+    try:
+        await mongo_db.run(ensure_indexes, mongo_db.db[SYMBOL_COLLECTION], timeout_ms=60000)
+        if chart_store.enabled:
+            await mongo_db.run(ensure_chart_bar_indexes, mongo_db.db[CHART_BARS_COLLECTION], timeout_ms=60000)
+        if SUMMARY_MATERIALIZER:
+            # 覆蓋索引包含全部摘要字段，只在啟用物化時建立
+            await mongo_db.run(ensure_indexes, mongo_db.db[SUMMARY_COLLECTION], SUMMARY_INDEXES, timeout_ms=60000)
+    except Exception as e:
+        print(f"警告: 無法建立索引: {e}")
+
+async def warm_caches() -> None:
+    """預先讀取第一批請求需要的數據：交易日期、最新交易日的列表及排行榜、策略目錄"""
+    await run_in_threadpool(strategy_catalog.list_response_bytes)
+    latest = await date_index.latest()
+    if latest:
+        await asyncio.gather(
+            day_list_board(latest).top(latest, "close_change_percentage", 500),
+            top_movers_board(latest).top(latest, "close_change_percentage", TOP_MOVERS_LIMIT),
+        )
+
+# lifespan 啟動的後台任務，shutdown 時取消
+startup_tasks: List[asyncio.Task] = []
+
+async def startup() -> None:
+    """
+    由應用的 lifespan 調用：在 worker 進程內建立 MongoDB 連接並預熱緩存。
+    建立索引在大集合上可能需要數分鐘，在後台進行，不延遲 worker 開始接受請求。
+    """
+    try:
+        await mongo_db.connect()
+    except Exception as e:
+        print(f"警告: 無法建立 MongoDB 連接: {e}")
+    startup_tasks.append(asyncio.get_running_loop().create_task(ensure_mongo_indexes()))
+    if SUMMARY_MATERIALIZER:
+        summary_materializer.start()
+    if WARMUP_TIMEOUT > 0:
+        try:
+            await asyncio.wait_for(warm_caches(), timeout=WARMUP_TIMEOUT)
+        except Exception as e:
+            print(f"警告: 緩存預熱未完成: {e!r}")
+
+async def shutdown() -> None:
+    for task in startup_tasks:
+        task.cancel()
+    await asyncio.gather(*startup_tasks, return_exceptions=True)
+    startup_tasks.clear()
+    await live_feed.stop()
+    await summary_materializer.stop()
+    signal_engine.shutdown()
+    mongo_db.shutdown()
+    if shared_backend is not None:
+        await shared_backend.close()
+
+def day_list_board(date: Optional[str]) -> LeaderboardCache:
+    """日期的摘要已全部物化時讀取摘要集合（覆蓋索引），否則讀取原始文檔"""
+    return summary_lists if summary_materializer.ready(date) else day_lists
+
+def top_movers_board(date: Optional[str]) -> LeaderboardCache:
+    return summary_leaderboard if summary_materializer.ready(date) else leaderboard
+
+# 各端點只向 MongoDB 請求自己需要的字段，避免拉取整份文檔（尤其是圖表數組）
+PRICE_OVERVIEW_FIELDS = [
+    "symbol", "yesterday_close", "day_low", "day_high", "day_close",
+    "market_open_high", "market_open_low", "key_levels"
+]
+ANALYSIS_FIELDS = [
+    "symbol", "suggestion", "sec_filing_analysis", "key_levels", "float_risk", "sector",
+    "hype_score", "squeeze_score", "atm_urgency", "cash", "debt"
+]
+
+# 計算 ETag 所需的版本字段，隨每個投影一併讀取
+VERSION_FIELDS = ["today_date", *LAST_UPDATED_FIELDS]
+
+def chart_fields(timeframe: str) -> List[str]:
+    """圖表端點只需要對應時間框架的數組（聚合時間框架讀取 1m 數組）"""
+    return [f"{source_timeframe(timeframe)}_chart_data"]
+
+async def find_symbol_document(symbol: str, date: Optional[str] = None, fields: Optional[List[str]] = None):
+    """
+    按股票代碼（及日期）查詢文檔，fields 會作為投影下推到 MongoDB。
+    結果按 (symbol, date, fields) 緩存，同一頁面的多個請求只查詢一次數據庫。
+    """
+    symbol = symbol.upper()
+
+    # 已緩存整份文檔時，直接從中取出所需字段
+    full_document = document_cache.peek((symbol, date, None)) if fields else MISSING
+    if full_document is not MISSING:
+        if full_document is None:
+            return None
+        return {key: full_document[key] for key in ["_id", *VERSION_FIELDS, *fields] if key in full_document}
+
+    async def load():
+        query = {"symbol": symbol}
+        if date:
+            query["today_date"] = date
+        projection = {field: 1 for field in [*VERSION_FIELDS, *fields]} if fields else None
+        return await mongo_db.find_one(SYMBOL_COLLECTION, query, projection)
+
+    key = (symbol, date, tuple(sorted(fields)) if fields else None)
+    return await document_cache.get_or_load(key, load, immutable=is_past_date(date))
+
+async def read_chart_frames(symbols: List[str], date: str, timeframe: str) -> Dict[str, Any]:
+    """
+    從 chart_bars 讀取列式K線，按 (symbol, date, 時間框架, 時間窗口) 緩存；未命中的代碼一次 $in 查詢。
+    沒有分桶的代碼不在結果中。
+    """
+    source = source_timeframe(timeframe)
+    # 只讀取與時間窗口重疊的分桶；窗口不同的結果分開緩存
+    window = chart_window(timeframe, date)
+    frames, missing = {}, []
+    for symbol in symbols:
+        cached = document_cache.peek((symbol, date, ("chart_bars", source, window)))
+        if cached is MISSING:
+            missing.append(symbol)
+        elif cached is not None:
+            frames[symbol] = cached
+
+    if missing:
+        loaded = await chart_store.read_frames(missing, date, source, window)
+        for symbol in missing:
+            frame = loaded.get(symbol)
+            document_cache.put((symbol, date, ("chart_bars", source, window)), frame, immutable=is_past_date(date))
+            if frame is not None:
+                frames[symbol] = frame
+    return frames
+
+async def newest_trade_date(symbol: str) -> Optional[str]:
+    """代碼最新的 today_date（symbol_today_date 索引覆蓋：只投影 today_date，不取 _id）"""
+    async def load():
+        rows = await mongo_db.find(
+            SYMBOL_COLLECTION, {"symbol": symbol}, {"_id": 0, "today_date": 1},
+            sort=[("today_date", -1)], limit=1
+        )
+        return rows[0].get("today_date") if rows else None
+
+    return await document_cache.get_or_load((symbol, None, ("newest_date",)), load)
+
+# 後端不支持 $convert（mongomock、舊版 mongod）時改為讀取整個數組
+window_pushdown = True
+
+async def find_chart_document(symbol: str, date: Optional[str], timeframe: str):
+    """
+    讀取圖表所需的數組，時間窗口在 MongoDB 中以 $filter 過濾，只傳輸窗口內的K線；
+    後端不支持該表達式時讀取整個數組，窗口在 build_chart_data 中過濾。
+    沒有指定日期時先按 symbol_today_date 索引倒序取該代碼最新的 today_date，以確定交易日。
+    """
+    symbol = symbol.upper()
+    if date is None:
+        date = await newest_trade_date(symbol)
+        if not date:
+            return await find_symbol_document(symbol, None, chart_fields(timeframe))
+
+    if chart_store.enabled:
+        frames = await read_chart_frames([symbol], date, timeframe)
+        if symbol in frames or not chart_store.fallback:
+            located = await find_symbol_document(symbol, date, ["today_date"])
+            if not located:
+                return None
+            return {**located, chart_fields(timeframe)[0]: frames.get(symbol, [])}
+
+    # 已緩存整份文檔時直接使用，窗口在 build_chart_data 中過濾
+    full_document = document_cache.peek((symbol, date, None))
+    if full_document is not MISSING:
+        return full_document
+
+    field = chart_fields(timeframe)[0]
+    window = chart_window(timeframe, date)
+
+    async def load():
+        global window_pushdown
+        query = {"symbol": symbol, "today_date": date}
+        projection = {**{key: 1 for key in VERSION_FIELDS}, "symbol": 1}
+        if window_pushdown:
+            pipeline = [
+                {"$match": query},
+                {"$limit": 1},
+                {"$project": {**projection, field: window_expression(field, window)}}
+            ]
+            try:
+                rows = await mongo_db.aggregate(SYMBOL_COLLECTION, pipeline)
+                return rows[0] if rows else None
+            except Exception as e:
+                if not unsupported_expression(e):
+                    raise
+                print(f"警告: 數據庫不支持圖表窗口表達式，改為讀取整個數組: {e}")
+                window_pushdown = False
+        return await mongo_db.find_one(SYMBOL_COLLECTION, query, {**projection, field: 1})
+
+    key = (symbol, date, ("chart_window", timeframe))
+    return await document_cache.get_or_load(key, load, immutable=is_past_date(date))
+
+def build_chart_section(result: Dict[str, Any], symbol: str, timeframe: str, shape: str = "rows",
+                        max_points: Optional[int] = None, downsample: str = "minmax") -> Dict[str, Any]:
+    """從文檔中提取並處理指定時間框架的圖表數據 (Tvlwc 格式)"""
+    chart_field = f"{source_timeframe(timeframe)}_chart_data"
+    raw_chart_data = result.get(chart_field, [])
+
+    # Filter the chart data based on timeframe (last 3 hours for 1m, the extended session for 5m, 30 days for 1d)
+    # and format it for the Tvlwc component in one columnar pass
+    tvlwc_chart_data = build_chart_data(
+        raw_chart_data, timeframe, compact=(shape == "columns"),
+        max_points=max_points, downsample=downsample, trade_date=result.get("today_date")
+    )
+    data_points = len(tvlwc_chart_data["time"]) if shape == "columns" else len(tvlwc_chart_data)
+
+    return {
+        "symbol": symbol.upper(),
+        "timeframe": timeframe,
+        "shape": shape,
+        "data_points": data_points,
+        "chart_data": tvlwc_chart_data # Return processed data
+    }
+
+# 批量端點每次最多返回的代碼數（與儀表板列表上限一致），及每批在線程池中渲染的文檔數
+BATCH_MAX_SYMBOLS = 500
+BATCH_RENDER_CHUNK = 25
+
+def render_batch_lines(documents: List[Dict[str, Any]], timeframe: str, shape: str, points: int) -> bytes:
+    """把一批文檔渲染成 NDJSON 行：摘要字段加降採樣後的迷你圖"""
+    chart_field = f"{source_timeframe(timeframe)}_chart_data"
+    lines = []
+    for document in documents:
+        if "error" in document:
+            lines.append(dumps_mongo(document))
+            continue
+        try:
+            summary = {key: value for key, value in document.items() if key != chart_field}
+            summary["market_cap_formatted"] = format_market_cap(document.get("market_cap_float"))
+            summary["sparkline"] = build_chart_section(document, document["symbol"], timeframe, shape, points, "minmax")
+            lines.append(dumps_mongo(summary))
+        except Exception as e:
+            # 響應頭已經發出，單個代碼出錯時以錯誤行代替，不中斷整個流
+            lines.append(dumps_mongo({"symbol": document.get("symbol"), "today_date": document.get("today_date"),
+                                      "error": f"渲染錯誤: {str(e)}"}))
+    return b"\n".join(lines) + b"\n"
+
+def build_price_overview(result: Dict[str, Any]) -> Dict[str, Any]:
+    """從文檔中提取價格概覽數據"""
+    return {
+        "symbol": result.get("symbol"),
+        "yesterday_close": result.get("yesterday_close"),
+        "day_low": result.get("day_low"),
+        "day_high": result.get("day_high"),
+        "day_close": result.get("day_close"),
+        "market_open_high": result.get("market_open_high"),
+        "market_open_low": result.get("market_open_low"),
+        "key_levels": result.get("key_levels", [])
+    }
+
+def build_analysis(result: Dict[str, Any]) -> Dict[str, Any]:
+    """從文檔中提取分析和建議數據 (包含現金和債務百萬值)"""
+    # Calculate cash and debt in millions
+    cash = result.get("cash")
+    debt = result.get("debt")
+
+    cash_in_millions = float(as_number(cash) / 1_000_000) if cash is not None else None
+    debt_in_millions = float(as_number(debt) / 1_000_000) if debt is not None else None
+
+    return {
+        "symbol": result.get("symbol"),
+        "suggestion": result.get("suggestion"),
+        "sec_filing_analysis": result.get("sec_filing_analysis"),
+        "key_levels": result.get("key_levels"),
+        "float_risk": result.get("float_risk"),
+        "sector": result.get("sector"),
+        "hype_score": result.get("hype_score"),
+        "squeeze_score": result.get("squeeze_score"),
+        "atm_urgency": result.get("atm_urgency"),
+        "cash_in_millions": cash_in_millions,  # Added
+        "debt_in_millions": debt_in_millions   # Added
+    }
+
+@router.get("/")
+async def root():
+    """根路徑，返回 API 信息"""
+    return {
+        "message": "股票數據 API",
+        "version": "1.0.0",
+        "endpoints": {
+            "/stocks/{symbol}": "根據股票代碼查詢詳細信息 (已增強)",
+            "/stocks/": "查詢所有股票或根據日期篩選",
+            "/stocks/batch": "批量獲取多個股票的卡片摘要及迷你圖 (NDJSON)",
+            "/stocks/search": "按代碼、公司名稱或行業搜索股票 (輸入提示)",
+            "/stocks/screen": "按基本面條件篩選股票 (POST，可保存後以 GET /stocks/screen/{screen_id} 重新執行)",
+            "/stocks/{symbol}/chart": "獲取股票圖表數據 (已增強)",
+            "/stocks/{symbol}/price-overview": "獲取股票價格概覽數據 (新增)",
+            "/stocks/top-movers": "獲取漲跌幅最大的股票",
+            "/stocks/{symbol}/analysis": "獲取股票分析和建議 (已增強)",
+            "/stocks/{symbol}/bundle": "一次返回股票詳情頁所需的全部數據",
+            "/api/stocks/latest_day": "獲取最新交易日的股票列表",
+            "/api/stocks/by_date": "獲取指定交易日的股票列表",
+            "/api/stocks/available_dates": "獲取所有可用交易日期",
+            "/api/strategy/{strategy_name}/matches": "獲取指定交易日符合策略信號規則的股票",
+            "/api/stocks/{symbol}/add-news": "為股票文檔添加新聞 (POST，需要密碼，支持批量)",
+            "/api/stocks/{symbol}/news/{uuid}": "刪除股票文檔中的新聞 (DELETE，需要密碼)",
+            "/stream": "訂閱股票K線及漲跌幅排行的實時更新 (SSE)",
+            "/health": "檢查 API 和數據庫健康狀態",
+            "/metrics": "Prometheus 格式的請求及緩存指標"
+        }
+    }
+
+@router.get("/health")
+async def health_check():
+    """健康檢查端點"""
+    # 健康檢查實際 ping 一次，同時刷新其他路由使用的連接狀態
+    db_status = await mongo_db.ping()
+    return {
+        "status": "healthy" if db_status else "unhealthy",
+        "database": "connected" if db_status else "disconnected",
+        "summaries": summary_materializer.status(),
+        "shared_cache": shared_backend.name if shared_backend is not None else "local",
+        "pid": os.getpid(),
+        "timestamp": datetime.now(ZoneInfo("America/New_York")).isoformat()
+    }
+
+@router.get("/metrics")
+async def get_metrics():
+    """Prometheus 抓取端點"""
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@router.get("/stocks/search")
+async def search_stocks(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=64, description="股票代碼、公司名稱或行業關鍵字"),
+    limit: int = Query(10, ge=1, le=50, description="返回建議數量")
+):
+    """輸入提示搜索：按代碼前綴、公司名稱及行業匹配，在內存索引中完成，不逐次查詢數據庫"""
+    try:
+        # 索引在內存中，只有到期刷新時才訪問數據庫，因此不做逐次連接檢查
+        await search_index.refresh()
+        with timed("search"):
+            results = search_index.search(q, limit)
+        
+        return conditional_json(request, {
+            "query": q,
+            "count": len(results),
+            "data": results
+        }, REVALIDATE_CACHE_CONTROL)
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"查詢超時: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查詢錯誤: {str(e)}")
+
+async def execute_screen(screen: ScreenRequest, date: Optional[str]) -> Dict[str, Any]:
+    screen_date = date or await date_index.latest()
+    if not screen_date:
+        raise HTTPException(status_code=404, detail="數據庫中沒有任何交易日數據")
+    try:
+        results = await screener.run(screen, screen_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"date": screen_date, "count": len(results), "data": results}
+
+@router.post("/stocks/screen")
+async def run_stock_screen(
+    screen: ScreenRequest,
+    date: Optional[str] = Query(None, description="日期格式: YYYY-MM-DD，默認最新交易日"),
+    save: bool = Query(False, description="保存篩選條件，之後可用 GET /stocks/screen/{screen_id} 重新執行")
+):
+    """按基本面字段篩選股票，條件編譯為走 today_date 索引的聚合查詢"""
+    if not await mongo_db.is_connected():
+        raise HTTPException(status_code=503, detail="數據庫連接失敗")
+    
+    try:
+        content = await execute_screen(screen, date)
+        content["screen_id"] = await screener.save(screen) if save else screen_id(screen)
+        return MongoJSONResponse(content)
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"查詢超時: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查詢錯誤: {str(e)}")
+
+@router.get("/stocks/screen/{screen_id}")
+async def run_saved_stock_screen(
+    screen_id: str,
+    request: Request,
+    date: Optional[str] = Query(None, description="日期格式: YYYY-MM-DD，默認最新交易日")
+):
+    """重新執行已保存的篩選條件"""
+    if not await mongo_db.is_connected():
+        raise HTTPException(status_code=503, detail="數據庫連接失敗")
+    
+    try:
+        screen = await screener.load(screen_id)
+        if screen is None:
+            raise HTTPException(status_code=404, detail=f"找不到篩選條件 {screen_id}")
+        
+        content = await execute_screen(screen, date)
+        content["screen_id"] = screen_id
+        return conditional_json(request, content, cache_control_for(date))
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"查詢超時: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查詢錯誤: {str(e)}")
+
+@router.get("/stocks/batch")
+async def get_stocks_batch(
+    symbols: str = Query(..., description="逗號分隔的股票代碼（最多 500 個）"),
+    date: Optional[str] = Query(None, description="日期格式: YYYY-MM-DD，默認最新交易日"),
+    timeframe: str = Query("5m", description="迷你圖時間框架: 1m, 2m, 5m, 15m, 30m, 1h, 1d"),
+    points: int = Query(60, ge=2, le=1000, description="每個迷你圖的K線數量上限"),
+    shape: str = Query("rows", description="迷你圖返回格式: rows 或 columns")
+):
+    """
+    一次查詢返回多個股票的卡片摘要及迷你圖（NDJSON，每行一個代碼，按請求順序）。
+    找不到的代碼返回 {"symbol": ..., "error": "not_found"}。
+    """
+    if not await mongo_db.is_connected():
+        raise HTTPException(status_code=503, detail="數據庫連接失敗")
+    
+    requested = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="請提供至少一個股票代碼")
+    if len(requested) > BATCH_MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"每次最多查詢 {BATCH_MAX_SYMBOLS} 個代碼")
+    
+    if timeframe not in SUPPORTED_TIMEFRAMES:
+        raise HTTPException(status_code=400, detail=f"時間框架必須是 {', '.join(SUPPORTED_TIMEFRAMES)}")
+    
+    if shape not in ["rows", "columns"]:
+        raise HTTPException(status_code=400, detail="返回格式必須是 rows 或 columns")
+    
+    try:
+        batch_date = date or await date_index.latest()
+        if not batch_date:
+            raise HTTPException(status_code=404, detail="數據庫中沒有任何交易日數據")
+        
+        # 一次 $in 查詢（走 symbol_today_date 索引），只投影卡片字段及迷你圖所需的數組
+        pipeline = [
+            {"$match": {"symbol": {"$in": requested}, "today_date": batch_date}},
+            {"$project": {
+                **LIST_PROJECTION, "market_cap_float": 1,
+                **({} if chart_store.enabled and not chart_store.fallback else {field: 1 for field in chart_fields(timeframe)})
+            }}
+        ]
+        found = {document["symbol"]: document for document in await mongo_db.aggregate(SYMBOL_COLLECTION, pipeline)}
+        if chart_store.enabled:
+            # 列式存儲的迷你圖同樣只需一次 $in 查詢
+            for symbol, frame in (await read_chart_frames(list(found), batch_date, timeframe)).items():
+                found[symbol][chart_fields(timeframe)[0]] = frame
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"查詢超時: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查詢錯誤: {str(e)}")
+    
+    documents = [found.get(symbol) or {"symbol": symbol, "today_date": batch_date, "error": "not_found"} for symbol in requested]
+    
+    async def lines():
+        # 分批在線程池中處理圖表及序列化，前面的卡片無需等待最後一個代碼
+        for start in range(0, len(documents), BATCH_RENDER_CHUNK):
+            chunk = documents[start:start + BATCH_RENDER_CHUNK]
+            yield await run_in_threadpool(render_batch_lines, chunk, timeframe, shape, points)
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"Cache-Control": cache_control_for(date)})
+
+@router.get("/stocks/{symbol}")
+async def get_stock_by_symbol(
+    symbol: str,
+    request: Request,
+    date: Optional[str] = Query(None, description="日期格式: YYYY-MM-DD")
+):
+    """根據股票代碼查詢詳細信息 (已增強)"""
+    if not await mongo_db.is_connected():
+        raise HTTPException(status_code=503, detail="數據庫連接失敗")
+    
+    try:
+        result = await find_symbol_document(symbol, date)
+        if not result:
+            raise HTTPException(status_code=404, detail=f"找不到股票代碼 {symbol} 的數據")
+        
+        # 文檔未變時直接返回 304，省去圖表處理及序列化（含新聞，不作長期快取）
+        etag = document_etag(result, request)
+        cache_control = cache_control_for(date, news=True)
+        if etag_matches(request, etag):
+            return not_modified(etag, cache_control)
+        
+        # Add formatted market cap（複製一份，避免修改緩存中的文檔）
+        market_cap_float = result.get('market_cap_float')
+        result = {**result, 'market_cap_formatted': format_market_cap(market_cap_float)}
+
+        return conditional_json(request, result, cache_control, etag)
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"查詢超時: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查詢錯誤: {str(e)}")
+
+@router.get("/stocks/")
+async def get_stocks(
+    request: Request,
+    date: Optional[str] = Query(None, description="日期格式: YYYY-MM-DD"),
+    limit: int = Query(50, ge=1, le=500, description="返回結果數量限制"),
+    skip: int = Query(0, ge=0, description="跳過的結果數量（兼容舊客戶端，深分頁請使用 cursor）"),
+    cursor: Optional[str] = Query(None, description="上一頁返回的 next_cursor")
+):
+    """查詢股票列表，可根據日期篩選"""
+    if not await mongo_db.is_connected():
+        raise HTTPException(status_code=503, detail="數據庫連接失敗")
+    
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="cursor 與 skip 不能同時使用")
+    
+    query = {}
+    if date:
+        query["today_date"] = date
+    
+    try:
+        try:
+            after = keyset_match(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if after:
+            query = {"$and": [query, after]} if query else after
+        
+        # 按穩定排序鍵 (today_date, symbol, _id) 分頁，游標模式不需要跳過任何文檔
+        pipeline = [
+            {"$match": query},
+            {"$sort": STOCK_LIST_SORT},
+        ]
+        if skip:
+            pipeline.append({"$skip": skip})
+        pipeline += [
+            {"$limit": limit},
+            {"$project": LIST_PROJECTION}
+        ]
+        
+        results = await mongo_db.aggregate(SYMBOL_COLLECTION, pipeline)
+        
+        return conditional_json(request, {
+            "count": len(results),
+            "next_cursor": next_cursor(results, limit),
+            "data": results
+        }, cache_control_for(date))
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"查詢超時: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查詢錯誤: {str(e)}")
+
+@router.get("/stocks/{symbol}/chart")
+async def get_stock_chart(
+    symbol: str,
+    request: Request,
+    timeframe: str = Query("1d", description="時間框架: 1m, 2m, 5m, 15m, 30m, 1h, 1d (2m/15m/30m/1h 由 1m 數據聚合)"),
+    date: Optional[str] = Query(None, description="日期格式: YYYY-MM-DD"),
+    shape: str = Query("rows", description="返回格式: rows (逐根K線) 或 columns (按列數組)"),
+    max_points: Optional[int] = Query(None, ge=2, le=100000, description="返回K線數量上限，超出時降採樣"),
+    downsample: str = Query("minmax", description="降採樣方法: minmax (按桶聚合OHLCV) 或 lttb")
+):
+    """獲取股票圖表數據 (已增強，返回 Tvlwc 格式數據)"""
+    if not await mongo_db.is_connected():
+        raise HTTPException(status_code=503, detail="數據庫連接失敗")
+    
+    if timeframe not in SUPPORTED_TIMEFRAMES:
+        raise HTTPException(status_code=400, detail=f"時間框架必須是 {', '.join(SUPPORTED_TIMEFRAMES)}")
+    
+    if downsample not in DOWNSAMPLE_METHODS:
+        raise HTTPException(status_code=400, detail="降採樣方法必須是 minmax 或 lttb")
+    
+    if shape not in ["rows", "columns"]:
+        raise HTTPException(status_code=400, detail="返回格式必須是 rows 或 columns")
+    
+    try:
+        result = await find_chart_document(symbol, date, timeframe)
+        if not result:
+            raise HTTPException(status_code=404, detail=f"找不到股票代碼 {symbol} 的數據")
+        
+        # 文檔未變時直接返回 304，省去圖表處理及序列化
+        etag = document_etag(result, request)
+        cache_control = cache_control_for(date)
+        if etag_matches(request, etag):
+            return not_modified(etag, cache_control)
+        
+        return conditional_json(request, build_chart_section(result, symbol, timeframe, shape, max_points, downsample), cache_control, etag)
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"查詢超時: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查詢錯誤: {str(e)}")
+
+@router.get("/stocks/{symbol}/bundle")
+async def get_stock_bundle(
+    symbol: str,
+    request: Request,
+    date: Optional[str] = Query(None, description="日期格式: YYYY-MM-DD"),
+    timeframes: str = Query("1m,5m,1d", description="逗號分隔的圖表時間框架"),
+    shape: str = Query("rows", description="圖表返回格式: rows 或 columns"),
+    max_points: Optional[int] = Query(None, ge=2, le=100000, description="每個圖表的K線數量上限"),
+    downsample: str = Query("minmax", description="降採樣方法: minmax 或 lttb")
+):
+    """一次讀取返回股票詳情頁所需的全部數據（詳情、圖表、價格概覽、分析）"""
+    if not await mongo_db.is_connected():
+        raise HTTPException(status_code=503, detail="數據庫連接失敗")
+    
+    requested = [tf.strip() for tf in timeframes.split(",") if tf.strip()]
+    invalid = [tf for tf in requested if tf not in SUPPORTED_TIMEFRAMES]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"時間框架必須是 {', '.join(SUPPORTED_TIMEFRAMES)}")
+    
+    if downsample not in DOWNSAMPLE_METHODS:
+        raise HTTPException(status_code=400, detail="降採樣方法必須是 minmax 或 lttb")
+    
+    if shape not in ["rows", "columns"]:
+        raise HTTPException(status_code=400, detail="返回格式必須是 rows 或 columns")
+    
+    try:
+        result = await find_symbol_document(symbol, date)
+        if not result:
+            raise HTTPException(status_code=404, detail=f"找不到股票代碼 {symbol} 的數據")
+        
+        # 文檔未變時直接返回 304，省去圖表處理及序列化（含新聞，不作長期快取）
+        etag = document_etag(result, request)
+        cache_control = cache_control_for(date, news=True)
+        if etag_matches(request, etag):
+            return not_modified(etag, cache_control)
+        
+        # 詳情部分不重複返回原始圖表數組，圖表以處理後的格式放在 charts 中
+        detail = {key: value for key, value in result.items() if not key.endswith("_chart_data")}
+        detail["market_cap_formatted"] = format_market_cap(result.get("market_cap_float"))
+        
+        if chart_store.enabled and result.get("today_date"):
+            # 有列式K線時以其代替文檔內的數組（複製一份，避免修改緩存中的文檔）
+            result = dict(result)
+            for tf in {source_timeframe(tf) for tf in requested}:
+                frame = (await read_chart_frames([symbol.upper()], result["today_date"], tf)).get(symbol.upper())
+                if frame is not None:
+                    result[f"{tf}_chart_data"] = frame
+        
+        return conditional_json(request, {
+            "symbol": symbol.upper(),
+            "detail": detail,
+            "charts": {
+                tf: build_chart_section(result, symbol, tf, shape, max_points, downsample)
+                for tf in requested
+            },
+            "price_overview": build_price_overview(result),
+            "analysis": build_analysis(result)
+        }, cache_control, etag)
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"查詢超時: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查詢錯誤: {str(e)}")
+
+@router.get("/stocks/{symbol}/price-overview")
+async def get_stock_price_overview(
+    symbol: str,
+    request: Request,
+    date: Optional[str] = Query(None, description="日期格式: YYYY-MM-DD")
+):
+    """獲取股票價格概覽數據 (新增)"""
+    if not await mongo_db.is_connected():
+        raise HTTPException(status_code=503, detail="數據庫連接失敗")
+    
+    try:
+        result = await find_symbol_document(symbol, date, PRICE_OVERVIEW_FIELDS)
+        if not result:
+            raise HTTPException(status_code=404, detail=f"找不到股票代碼 {symbol} 的數據")
+        
+        # 文檔未變時直接返回 304，省去圖表處理及序列化
+        etag = document_etag(result, request)
+        cache_control = cache_control_for(date)
+        if etag_matches(request, etag):
+            return not_modified(etag, cache_control)
+        
+        # Extract and organize relevant price points and key levels
+        price_overview_data = build_price_overview(result)
+        
+        return conditional_json(request, price_overview_data, cache_control, etag)
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"查詢超時: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查詢錯誤: {str(e)}")
+
+
+@router.get("/top-movers")
+async def get_top_movers(
+    request: Request,
+    date: Optional[str] = Query(None, description="日期格式: YYYY-MM-DD"),
+    limit: int = Query(10, ge=1, le=50, description="返回結果數量"),
+    sort_by: str = Query("close_change_percentage", description="排序字段: close_change_percentage 或 high_change_percentage")
+):
+    """獲取漲跌幅最大的股票"""
+    if not await mongo_db.is_connected():
+        raise HTTPException(status_code=503, detail="數據庫連接失敗")
+    
+    if sort_by not in TOP_MOVER_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail="排序字段必須是 close_change_percentage 或 high_change_percentage")
+    
+    try:
+        # 由按日期緩存的排行榜提供，底層查詢走 today_date + 排序字段的複合索引；
+        # 未指定日期時取最新交易日，避免對整個集合排序
+        board_date = date or await date_index.latest()
+        results = await top_movers_board(board_date).top(board_date, sort_by, limit) if board_date else []
+        
+        return conditional_json(request, {
+            "sorted_by": sort_by,
+            "count": len(results),
+            "data": results
+        }, cache_control_for(date))
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"查詢超時: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查詢錯誤: {str(e)}")
+
+@router.get("/api/stocks/available_dates")
+async def get_available_dates(request: Request):
+    """獲取所有有數據的交易日期（由新到舊）"""
+    if not await mongo_db.is_connected():
+        raise HTTPException(status_code=503, detail="數據庫連接失敗")
+    
+    try:
+        dates = await date_index.dates()
+        return conditional_json(request, {
+            "count": len(dates),
+            "dates": dates
+        }, REVALIDATE_CACHE_CONTROL)
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"查詢超時: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查詢錯誤: {str(e)}")
+
+@router.get("/api/stocks/latest_day")
+async def get_latest_day_stocks(
+    request: Request,
+    limit: int = Query(500, ge=1, le=500, description="返回結果數量限制"),
+    include_dates: bool = Query(False, description="同時返回可用日期列表，首頁一次請求即可渲染")
+):
+    """獲取最新交易日的股票列表"""
+    if not await mongo_db.is_connected():
+        raise HTTPException(status_code=503, detail="數據庫連接失敗")
+    
+    try:
+        latest_date = await date_index.latest()
+        if not latest_date:
+            raise HTTPException(status_code=404, detail="數據庫中沒有任何交易日數據")
+        
+        results = await day_list_board(latest_date).top(latest_date, "close_change_percentage", limit)
+        content = {
+            "latest_date_retrieved": latest_date,
+            "count": len(results),
+            "data": results
+        }
+        if include_dates:
+            content["available_dates"] = await date_index.dates()
+        
+        return conditional_json(request, content, REVALIDATE_CACHE_CONTROL)
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"查詢超時: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查詢錯誤: {str(e)}")
+
+@router.get("/api/stocks/by_date")
+async def get_stocks_by_date(
+    request: Request,
+    date: str = Query(..., description="日期格式: YYYY-MM-DD"),
+    limit: int = Query(500, ge=1, le=500, description="返回結果數量限制")
+):
+    """獲取指定交易日的股票列表"""
+    if not await mongo_db.is_connected():
+        raise HTTPException(status_code=503, detail="數據庫連接失敗")
+    
+    try:
+        results = await day_list_board(date).top(date, "close_change_percentage", limit)
+        
+        return conditional_json(request, {
+            "date": date,
+            "count": len(results),
+            "data": results
+        }, cache_control_for(date))
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"查詢超時: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查詢錯誤: {str(e)}")
+
+@router.get("/api/strategy/{strategy_name}/matches")
+async def get_strategy_matches(
+    strategy_name: str,
+    request: Request,
+    date: Optional[str] = Query(None, description="日期格式: YYYY-MM-DD，默認最新交易日")
+):
+    """獲取指定交易日觸發策略信號的股票（按信號時間排序）"""
+    if strategy_catalog.get(strategy_name) is None:
+        raise HTTPException(status_code=404, detail="Strategy not found")
+    
+    rule = signal_engine.rules.get(strategy_name)
+    if rule is None:
+        raise HTTPException(status_code=404, detail=f"策略 {strategy_name} 沒有可計算的信號規則")
+    
+    if not await mongo_db.is_connected():
+        raise HTTPException(status_code=503, detail="數據庫連接失敗")
+    
+    try:
+        signal_date = date or await date_index.latest()
+        if not signal_date:
+            raise HTTPException(status_code=404, detail="數據庫中沒有任何交易日數據")
+        
+        result = await signal_engine.matches(strategy_name, signal_date)
+        return conditional_json(request, {
+            "strategy": strategy_name,
+            "side": rule.side,
+            "date": signal_date,
+            "computed_at": result["computed_at"],
+            "symbols_scanned": result["symbols"],
+            "count": len(result["data"]),
+            "data": result["data"]
+        }, cache_control_for(date))
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"查詢超時: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查詢錯誤: {str(e)}")
+
+@router.post("/api/stocks/{symbol}/add-news")
+async def add_stock_news(symbol: str, payload: AddNewsRequest):
+    """向指定文檔添加新聞；同一 uuid 重複提交不會重複寫入。返回更新後的新聞列表"""
+    if not await mongo_db.is_connected():
+        raise HTTPException(status_code=503, detail="數據庫連接失敗")
+    
+    try:
+        result = await news_store.add(symbol, payload)
+        # 只失效包含新聞的緩存（完整文檔），圖表等投影不受影響
+        await document_cache.purge(symbol.upper(), result["today_date"], field="raw_news")
+        return MongoJSONResponse({
+            "message": "新聞已添加" if result["added"] else "新聞已存在，未重複添加",
+            "symbol": symbol.upper(),
+            "target_document_id": payload.target_document_id,
+            "added": result["added"],
+            "raw_news": result["raw_news"]
+        })
+    except NewsWriteError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"查詢超時: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查詢錯誤: {str(e)}")
+
+@router.delete("/api/stocks/{symbol}/news/{news_uuid}")
+async def delete_stock_news(symbol: str, news_uuid: str, payload: DeleteNewsRequest):
+    """刪除指定文檔中的新聞（請求體的 uuids 可同時刪除多條）；已不存在的新聞視為已刪除"""
+    if not await mongo_db.is_connected():
+        raise HTTPException(status_code=503, detail="數據庫連接失敗")
+    
+    try:
+        result = await news_store.delete(symbol, [news_uuid, *payload.uuids], payload)
+        await document_cache.purge(symbol.upper(), result["today_date"], field="raw_news")
+        return MongoJSONResponse({
+            "message": "新聞已刪除" if result["deleted"] else "新聞不存在或已被刪除",
+            "symbol": symbol.upper(),
+            "target_document_id": payload.target_document_id,
+            "deleted": result["deleted"],
+            "raw_news": result["raw_news"]
+        })
+    except NewsWriteError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"查詢超時: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查詢錯誤: {str(e)}")
+
+def sse_message(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps_mongo(data) + b"\n\n"
+
+@router.get("/stream")
+async def stream_updates(
+    request: Request,
+    symbols: str = Query("", description="逗號分隔的股票代碼"),
+    top_movers: bool = Query(False, description="同時訂閱漲跌幅排行的變化")
+):
+    """以 Server-Sent Events 推送訂閱代碼的新K線及排行榜變化"""
+    topics = {symbol_topic(s.strip()) for s in symbols.split(",") if s.strip()}
+    if top_movers:
+        topics.add(TOP_MOVERS_TOPIC)
+    if not topics:
+        raise HTTPException(status_code=400, detail="請至少訂閱一個股票代碼或 top_movers")
+    if len(topics) > 50:
+        raise HTTPException(status_code=400, detail="每個連接最多訂閱 50 個代碼")
+
+    subscription = live_hub.subscribe(topics)
+    live_feed.ensure_started()
+
+    async def events():
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": keepalive\n\n"
+                    continue
+                dropped = subscription.take_dropped()
+                if dropped:
+                    # 客戶端讀取太慢，告知丟棄了多少事件以便重新拉取快照
+                    yield sse_message("lag", {"dropped": dropped})
+                yield sse_message(event["type"], event)
+        finally:
+            live_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/stocks/{symbol}/analysis")
+async def get_stock_analysis(
+    symbol: str,
+    request: Request,
+    date: Optional[str] = Query(None, description="日期格式: YYYY-MM-DD")
+):
+    """獲取股票分析和建議 (已增強，包含現金和債務百萬值)"""
+    if not await mongo_db.is_connected():
+        raise HTTPException(status_code=503, detail="數據庫連接失敗")
+    
+    try:
+        result = await find_symbol_document(symbol, date, ANALYSIS_FIELDS)
+        if not result:
+            raise HTTPException(status_code=404, detail=f"找不到股票代碼 {symbol} 的數據")
+        
+        # 文檔未變時直接返回 304，省去圖表處理及序列化
+        etag = document_etag(result, request)
+        cache_control = cache_control_for(date)
+        if etag_matches(request, etag):
+            return not_modified(etag, cache_control)
+        
+        analysis_data = build_analysis(result)
+        
+        return conditional_json(request, analysis_data, cache_control, etag)
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"查詢超時: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查詢錯誤: {str(e)}")
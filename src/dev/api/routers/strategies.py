@@ -0,0 +1,98 @@
+# strategies.py
+
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
+
+from api.services.http_cache import REVALIDATE_CACHE_CONTROL, conditional_bytes, etag_matches
+from api.services.strategy_catalog import strategy_catalog
+from api.services.strategy_images import strategy_images
+
+router = APIRouter()
+
+@router.get("/api/strategies")
+async def get_strategies(request: Request):
+    """獲取所有策略列表（只返回名稱和說明）"""
+    try:
+        response = Response(content=strategy_catalog.list_response_bytes(), media_type="application/json")
+        return conditional_bytes(request, response, REVALIDATE_CACHE_CONTROL)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/api/strategy/{strategy_name}")
+async def get_strategy_detail(
+    strategy_name: str,
+    request: Request,
+    image_format: str = Query("base64", description="圖片返回格式: base64 或 url")
+):
+    """獲取特定策略的詳細信息"""
+    if image_format not in ["base64", "url"]:
+        raise HTTPException(status_code=400, detail="圖片格式必須是 base64 或 url")
+
+    try:
+        # 從策略目錄的名稱索引查找（多頭優先）
+        if strategy_catalog.get(strategy_name) is None:
+            raise HTTPException(status_code=404, detail="Strategy not found")
+
+        if image_format == "url":
+            # 返回可快取的圖片地址，由 /api/strategy/{name}/image 提供
+            info = strategy_images.cached_resolve(strategy_name) \
+                or await run_in_threadpool(strategy_images.resolve, strategy_name)
+            image = strategy_images.url_descriptor(strategy_name, info)
+        else:
+            # 兼容舊客戶端：從 LRU 取 base64，未命中時在線程池中讀取及編碼
+            image_data = strategy_images.cached_base64(strategy_name)
+            if image_data is None:
+                image_data = await run_in_threadpool(strategy_images.base64, strategy_name)
+            image = {
+                "data": image_data,
+                "format": "base64"
+            }
+
+        # 目錄可能在上面的檢查之後重新載入，策略已被移除
+        body = strategy_catalog.detail_response_bytes(strategy_name, image)
+        if body is None:
+            raise HTTPException(status_code=404, detail="Strategy not found")
+        return conditional_bytes(request, Response(content=body, media_type="application/json"), REVALIDATE_CACHE_CONTROL)
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(status_code=500, detail=str(e))
+
+def not_modified_since(request: Request, etag: str, mtime_ns: int) -> bool:
+    """If-None-Match when present, otherwise If-Modified-Since (RFC 9110 section 13.2.2)."""
+    if request.headers.get("if-none-match"):
+        return etag_matches(request, etag)
+    since = request.headers.get("if-modified-since")
+    if not since:
+        return False
+    try:
+        return int(mtime_ns // 1_000_000_000) <= parsedate_to_datetime(since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+@router.get("/api/strategy/{strategy_name}/image")
+async def get_strategy_image(strategy_name: str, request: Request, v: Optional[str] = None):
+    """獲取策略圖片（支持 ETag / Last-Modified 快取驗證）"""
+    if strategy_catalog.get(strategy_name) is None:
+        raise HTTPException(status_code=404, detail="Strategy not found")
+
+    # 首次訪問需讀取整個文件計算 ETag，在線程池中進行
+    info = strategy_images.cached_resolve(strategy_name) \
+        or await run_in_threadpool(strategy_images.resolve, strategy_name)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Strategy image not found")
+
+    # 帶版本號的地址內容不變，可長期快取
+    cache_control = "public, max-age=31536000, immutable" if v == info.etag else "public, max-age=300"
+    headers = {
+        "ETag": f'"{info.etag}"',
+        "Last-Modified": formatdate(info.mtime_ns / 1e9, usegmt=True),
+        "Cache-Control": cache_control,
+    }
+    if not_modified_since(request, headers["ETag"], info.mtime_ns):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(info.path, media_type="image/png", headers=headers)
@@ -0,0 +1,126 @@
+"""
+Backfills the chart_bars collection from the embedded *_chart_data arrays.
+
+Every fundamentals document (optionally limited to --date / --symbols) is converted
+into packed bucket documents, one set per timeframe, and upserted on
+(symbol, today_date, timeframe, bucket), so the command can be re-run or resumed at any
+time. With --verify each written set is read back and compared with the embedded
+array; --unset-embedded then removes the migrated arrays from the fundamentals
+document (only do this once every reader runs with CHART_STORAGE=columnar or auto).
+
+    python -m api.scripts.migrate_chart_bars --dry-run
+    python -m api.scripts.migrate_chart_bars --date 2025-01-02 --verify
+    python -m api.scripts.migrate_chart_bars --uri mongodb://localhost:27017 --db TradeZero_Bot
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+from pymongo import DeleteMany, ReplaceOne
+
+from api.services.chart_resample import STORED_TIMEFRAMES
+from api.services.chart_store import (
+    BUCKET_SIZE, CHART_BARS_COLLECTION, ensure_chart_bar_indexes, pack_buckets, unpack_buckets
+)
+from api.services.chart_window import data_times
+from api.services.fastapi_utils import OHLCV_COLUMNS, chart_frame
+
+SYMBOL_COLLECTION = "fundamentals_of_top_list_symbols"
+
+def open_database(args):
+    if args.uri:
+        from pymongo import MongoClient
+        return MongoClient(args.uri)[args.db]
+    from _mongo import MongoHandler
+    return MongoHandler().db
+
+def bucket_operations(document, timeframe, bucket_size):
+    """Upserts for the document's buckets plus a delete of stale higher-numbered buckets."""
+    buckets = pack_buckets(document["symbol"], document["today_date"], timeframe,
+                           document.get(f"{timeframe}_chart_data") or [], bucket_size)
+    key = {"symbol": document["symbol"], "today_date": document["today_date"], "timeframe": timeframe}
+    operations = [ReplaceOne({**key, "bucket": bucket["bucket"]}, bucket, upsert=True) for bucket in buckets]
+    operations.append(DeleteMany({**key, "bucket": {"$gte": len(buckets)}}))
+    return buckets, operations
+
+def verify(bars_collection, document, timeframe):
+    """Reads the buckets back and compares them with the embedded array."""
+    expected = chart_frame(document.get(f"{timeframe}_chart_data") or [])
+    expected = expected.assign(datetime=data_times(expected)).sort_values('datetime', kind='stable')
+    stored = unpack_buckets(list(bars_collection.find(
+        {"symbol": document["symbol"], "today_date": document["today_date"], "timeframe": timeframe},
+        sort=[("bucket", 1)]
+    )))
+    if len(stored) != len(expected):
+        return f"{len(stored)} bars stored, {len(expected)} expected"
+    if not np.array_equal(stored['datetime'].to_numpy('datetime64[ms]'), expected['datetime'].to_numpy('datetime64[ms]')):
+        return "datetime mismatch"
+    for column in OHLCV_COLUMNS:
+        if not np.array_equal(stored[column].to_numpy(), expected[column].to_numpy()):
+            return f"{column} mismatch"
+    return None
+
+def main(args):
+    db = open_database(args)
+    source = db[SYMBOL_COLLECTION]
+    bars_collection = db[CHART_BARS_COLLECTION]
+    if not args.dry_run:
+        ensure_chart_bar_indexes(bars_collection)
+
+    query = {"today_date": {"$type": "string"}}
+    if args.date:
+        query["today_date"] = {"$in": args.date}
+    if args.symbols:
+        query["symbol"] = {"$in": [symbol.upper() for symbol in args.symbols]}
+    fields = {"symbol": 1, "today_date": 1, **{f"{tf}_chart_data": 1 for tf in args.timeframes}}
+
+    started = time.perf_counter()
+    documents = buckets_written = bars_written = failures = 0
+    for document in source.find(query, fields, no_cursor_timeout=True, batch_size=args.batch):
+        documents += 1
+        migrated = []
+        for timeframe in args.timeframes:
+            if f"{timeframe}_chart_data" not in document:
+                continue
+            buckets, operations = bucket_operations(document, timeframe, args.bucket_size)
+            buckets_written += len(buckets)
+            bars_written += sum(bucket["count"] for bucket in buckets)
+            if args.dry_run:
+                continue
+            bars_collection.bulk_write(operations, ordered=False)
+            problem = verify(bars_collection, document, timeframe) if args.verify or args.unset_embedded else None
+            if problem:
+                failures += 1
+                print(f"FAIL  {document['symbol']} {document['today_date']} {timeframe}: {problem}")
+            else:
+                migrated.append(timeframe)
+
+        if args.unset_embedded and migrated:
+            source.update_one({"_id": document["_id"]}, {"$unset": {f"{tf}_chart_data": "" for tf in migrated}})
+        if documents % 500 == 0:
+            print(f"... {documents} documents, {bars_written} bars")
+
+    action = "would write" if args.dry_run else "wrote"
+    print(f"{documents} documents: {action} {buckets_written} buckets / {bars_written} bars "
+          f"in {time.perf_counter() - started:.1f}s, {failures} verification failures")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=None, help="MongoDB URI; defaults to MongoHandler's connection")
+    parser.add_argument("--db", default="TradeZero_Bot", help="database name when --uri is given")
+    parser.add_argument("--date", nargs="*", help="only migrate these today_date values")
+    parser.add_argument("--symbols", nargs="*", help="only migrate these symbols")
+    parser.add_argument("--timeframes", nargs="*", default=STORED_TIMEFRAMES, choices=STORED_TIMEFRAMES)
+    parser.add_argument("--bucket-size", type=int, default=BUCKET_SIZE)
+    parser.add_argument("--batch", type=int, default=50, help="documents fetched per cursor batch")
+    parser.add_argument("--dry-run", action="store_true", help="only count what would be written")
+    parser.add_argument("--verify", action="store_true", help="read back and compare every written set")
+    parser.add_argument("--unset-embedded", action="store_true",
+                        help="remove verified *_chart_data arrays from the fundamentals documents")
+    main(parser.parse_args())
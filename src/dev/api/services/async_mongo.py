@@ -0,0 +1,230 @@
+# async_mongo.py
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+import pymongo
+from pymongo.errors import ConnectionFailure, ExecutionTimeout, NetworkTimeout
+
+from api.services.metrics import timed
+
+# 線程池大小應與 MongoClient 的 maxPoolSize 相同，避免線程排隊等待連接
+DEFAULT_POOL_SIZE = int(os.getenv("MONGO_POOL_SIZE", "32"))
+DEFAULT_QUERY_TIMEOUT_MS = int(os.getenv("MONGO_QUERY_TIMEOUT_MS", "5000"))
+# 連接中斷後，每隔多少秒重新 ping 一次
+CONNECTION_RECHECK_SECONDS = float(os.getenv("MONGO_RECHECK_SECONDS", "5"))
+# 選擇服務器/建立連接的等待上限，必須低於查詢超時（pymongo 默認 30 秒），
+# mongod 不可用時才會以 ConnectionFailure 結束並標記為斷開，而不是每個請求都等到查詢超時
+SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS",
+                                            str(min(2000, DEFAULT_QUERY_TIMEOUT_MS // 2))))
+
+def client_options(server_selection_timeout_ms: int = SERVER_SELECTION_TIMEOUT_MS) -> Dict[str, Any]:
+    """MongoClient keyword arguments that keep server selection and connecting below the query timeout."""
+    return {
+        "serverSelectionTimeoutMS": server_selection_timeout_ms,
+        "connectTimeoutMS": server_selection_timeout_ms,
+    }
+
+def _call_within(seconds: float, fn, *args, **kwargs):
+    # pymongo.timeout 同時限制選擇服務器、取得連接及查詢本身；
+    # 它保存在 contextvar 中，run_in_executor 不會帶到線程裡，所以在線程內設置
+    with pymongo.timeout(seconds):
+        return fn(*args, **kwargs)
+
+async def _bounded(awaitable, timeout: float):
+    # Python 3.11 的 asyncio.wait_for 在內部調用剛好完成時會吞掉外部的取消（CPython gh-86296），
+    # 後台任務因此無法被 stop() 取消；有 asyncio.timeout 時改用它
+    if hasattr(asyncio, "timeout"):
+        async with asyncio.timeout(timeout):
+            return await awaitable
+    return await asyncio.wait_for(awaitable, timeout=timeout)
+
+class QueryTimeoutError(Exception):
+    """Raised when a query exceeds its time budget (server-side maxTimeMS or client wait)."""
+
+class AsyncMongoHandler:
+    """
+    Async facade over the synchronous MongoHandler.
+    Every driver call runs on a bounded thread pool so a slow query never stalls the
+    event loop. Each query carries maxTimeMS so the server aborts it too.
+    The connection state comes from the queries themselves (a ConnectionFailure marks it
+    down) instead of a ping per request; only an unknown or down state is re-checked.
+    With `handler_factory` the handler (and its MongoClient) is created on first use or
+    by connect() in the app's startup, i.e. inside each worker process rather than at
+    import time; shutdown() closes it again.
+    """
+
+    def __init__(self, handler=None, pool_size: int = DEFAULT_POOL_SIZE,
+                 query_timeout_ms: int = DEFAULT_QUERY_TIMEOUT_MS, handler_factory=None):
+        self._handler = handler
+        self._owns_handler = False
+        self.handler_factory = handler_factory
+        self._handler_lock = threading.Lock()
+        self.pool_size = pool_size
+        self.query_timeout_ms = query_timeout_ms
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # 在事件循環中排隊，而不是在線程池隊列中，超時的請求不會留下待執行的任務
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop = None
+        self._connected: Optional[bool] = None
+        self._checked_at = 0.0
+
+    @property
+    def handler(self):
+        if self._handler is None:
+            with self._handler_lock:
+                if self._handler is None:
+                    if self.handler_factory is None:
+                        raise RuntimeError("未設置 MongoHandler")
+                    self._handler = self.handler_factory()
+                    self._owns_handler = True
+        return self._handler
+
+    @handler.setter
+    def handler(self, handler) -> None:
+        self._handler = handler
+        self._owns_handler = False
+
+    async def connect(self):
+        """Creates the handler off the event loop (the driver may block while connecting)."""
+        if self._handler is None:
+            await asyncio.get_running_loop().run_in_executor(self._get_executor(), lambda: self.handler)
+        return self._handler
+
+    @property
+    def db(self):
+        return self.handler.db
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # 延遲建立，shutdown 之後（例如應用重新啟動 lifespan）可再次使用
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="mongo")
+        return self._executor
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.pool_size)
+            self._slots_loop = loop
+        return self._slots
+
+    async def run(self, fn, *args, timeout_ms: Optional[int] = None, **kwargs):
+        """Runs a blocking callable on the pool, bounded by the query timeout."""
+        timeout_ms = timeout_ms or self.query_timeout_ms
+        loop = asyncio.get_running_loop()
+
+        async def _call():
+            async with self._semaphore():
+                return await loop.run_in_executor(
+                    self._get_executor(), partial(_call_within, timeout_ms / 1000, fn, *args, **kwargs)
+                )
+
+        try:
+            # 客戶端等待比 maxTimeMS 多留一點時間，讓服務器先中止查詢
+            with timed("db"):
+                result = await _bounded(_call(), timeout_ms / 1000 + 0.5)
+        except asyncio.TimeoutError:
+            # 服務器沒有在時限內中止查詢，連接可能已失效：改為未知狀態，下一個請求重新 ping
+            self._connected = None
+            raise QueryTimeoutError(f"查詢超過 {timeout_ms}ms")
+        except ExecutionTimeout as e:
+            raise QueryTimeoutError(str(e))
+        except NetworkTimeout as e:
+            # 等待回應超時（而不是選擇服務器失敗），同樣只標記為未知
+            self._connected = None
+            raise QueryTimeoutError(str(e))
+        except ConnectionFailure:
+            # 包括 ServerSelectionTimeoutError：在 SERVER_SELECTION_TIMEOUT_MS 內找不到可用的服務器
+            self._set_connected(False)
+            raise
+        self._connected = True
+        return result
+
+    def _set_connected(self, connected: bool) -> None:
+        self._connected = connected
+        self._checked_at = time.monotonic()
+
+    async def ping(self) -> bool:
+        """Asks the server now (bounded by the server selection timeout) and records the result."""
+        try:
+            connected = bool(await self.run(self.handler.is_connected, timeout_ms=SERVER_SELECTION_TIMEOUT_MS))
+        except Exception:
+            connected = False
+        self._set_connected(connected)
+        return connected
+
+    async def is_connected(self) -> bool:
+        """Last known connection state; pings only when unknown or down for CONNECTION_RECHECK_SECONDS."""
+        if self._connected:
+            return True
+        if self._connected is False and time.monotonic() - self._checked_at < CONNECTION_RECHECK_SECONDS:
+            return False
+        return await self.ping()
+
+    async def find_one(self, collection: str, query: Dict[str, Any],
+                       projection: Optional[Dict[str, Any]] = None,
+                       timeout_ms: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        timeout_ms = timeout_ms or self.query_timeout_ms
+        return await self.run(
+            self.db[collection].find_one, query, projection,
+            max_time_ms=timeout_ms, timeout_ms=timeout_ms
+        )
+
+    async def find(self, collection: str, query: Dict[str, Any],
+                   projection: Optional[Dict[str, Any]] = None,
+                   sort: Optional[List] = None, limit: int = 0,
+                   timeout_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        timeout_ms = timeout_ms or self.query_timeout_ms
+
+        def _find():
+            cursor = self.db[collection].find(query, projection, max_time_ms=timeout_ms)
+            if sort:
+                cursor = cursor.sort(sort)
+            if limit:
+                cursor = cursor.limit(limit)
+            return list(cursor)
+
+        return await self.run(_find, timeout_ms=timeout_ms)
+
+    async def aggregate(self, collection: str, pipeline: List[Dict[str, Any]],
+                        timeout_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        timeout_ms = timeout_ms or self.query_timeout_ms
+
+        def _aggregate():
+            return list(self.db[collection].aggregate(pipeline, maxTimeMS=timeout_ms))
+
+        return await self.run(_aggregate, timeout_ms=timeout_ms)
+
+    async def count_documents(self, collection: str, query: Dict[str, Any],
+                              timeout_ms: Optional[int] = None) -> int:
+        timeout_ms = timeout_ms or self.query_timeout_ms
+        return await self.run(
+            self.db[collection].count_documents, query,
+            maxTimeMS=timeout_ms, timeout_ms=timeout_ms
+        )
+
+    async def distinct(self, collection: str, key: str, query: Optional[Dict[str, Any]] = None,
+                       timeout_ms: Optional[int] = None) -> List[Any]:
+        timeout_ms = timeout_ms or self.query_timeout_ms
+        return await self.run(
+            self.db[collection].distinct, key, query,
+            maxTimeMS=timeout_ms, timeout_ms=timeout_ms
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._owns_handler:
+            # 只關閉自己建立的連接；下次 startup 再建立新的
+            client = getattr(self._handler, "client", None)
+            if client is not None:
+                client.close()
+            self._handler = None
+            self._owns_handler = False
+            self._connected = None
@@ -0,0 +1,118 @@
+# chart_resample.py
+
+from __future__ import annotations
+
+from typing import Optional
+
+from api.services.lazy_import import lazy_module
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+
+# 數據庫中實際存儲的時間框架
+STORED_TIMEFRAMES = ["1m", "5m", "1d"]
+# 由 1m 數據即時聚合得出的時間框架 -> pandas resample 規則
+DERIVED_TIMEFRAMES = {
+    "2m": "2min",
+    "15m": "15min",
+    "30m": "30min",
+    "1h": "60min",
+}
+SUPPORTED_TIMEFRAMES = ["1m", "2m", "5m", "15m", "30m", "1h", "1d"]
+DOWNSAMPLE_METHODS = ["minmax", "lttb"]
+
+OHLCV_AGGREGATION = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'volume': 'sum',
+}
+
+def source_timeframe(timeframe: str) -> str:
+    """The stored series a timeframe is read from (derived intervals come from 1m)."""
+    return timeframe if timeframe in STORED_TIMEFRAMES else "1m"
+
+def resample_ohlcv(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Aggregates a sorted chart frame into a coarser interval.
+    open=first, high=max, low=min, close=last, volume=sum; empty buckets are dropped.
+    """
+    rule = DERIVED_TIMEFRAMES.get(timeframe)
+    if rule is None or df.empty:
+        return df
+
+    resampled = (
+        df.set_index('datetime')
+          .resample(rule, label='left', closed='left')
+          .agg(OHLCV_AGGREGATION)
+          .dropna(subset=['open'])
+          .reset_index()
+    )
+    return resampled[['datetime'] + list(OHLCV_AGGREGATION)]
+
+def _bucket_bounds(length: int, buckets: int) -> np.ndarray:
+    """Start index of each of `buckets` equal-count buckets over `length` rows."""
+    return np.unique(np.arange(buckets) * length // buckets)
+
+def downsample_minmax(df: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """
+    Merges consecutive bars into at most max_points buckets, keeping every bucket's
+    true high/low so spikes survive (each output bar is an OHLCV aggregate).
+    """
+    starts = _bucket_bounds(len(df), max_points)
+    return pd.DataFrame({
+        'datetime': df['datetime'].to_numpy()[starts],
+        'open': df['open'].to_numpy()[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(), starts),
+        'close': df['close'].to_numpy()[np.append(starts[1:], len(df)) - 1],
+        'volume': np.add.reduceat(df['volume'].to_numpy(), starts),
+    })
+
+def lttb_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets over an evenly indexed series; returns kept indices."""
+    length = len(y)
+    if threshold >= length:
+        return np.arange(length)
+    if threshold < 3:
+        # 保留首尾兩點；只取一點時保留第一點
+        return np.array([0, length - 1][:max(threshold, 0)], dtype=int)
+
+    x = np.arange(length, dtype='float64')
+    edges = np.floor(np.linspace(1, length - 1, threshold - 1)).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = length - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # 下一個桶的平均點作為三角形的第三個頂點
+        next_start = end
+        next_end = edges[i + 2] if i + 2 < len(edges) else length
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    return selected
+
+def downsample_lttb(df: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """Keeps the max_points bars that best preserve the shape of the close series."""
+    indices = lttb_indices(df['close'].to_numpy(dtype='float64'), max_points)
+    return df.iloc[indices].reset_index(drop=True)
+
+def downsample_ohlcv(df: pd.DataFrame, max_points: Optional[int], method: str = "minmax") -> pd.DataFrame:
+    """Caps a chart frame at max_points bars; no-op when it is already small enough."""
+    if not max_points or len(df) <= max_points:
+        return df
+    if method == "lttb":
+        return downsample_lttb(df, max_points)
+    return downsample_minmax(df, max_points)
@@ -0,0 +1,134 @@
+# chart_store.py
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional
+
+from bson import Binary
+from pymongo import ASCENDING
+
+from api.services.chart_window import ChartWindow, data_times
+from api.services.fastapi_utils import OHLCV_COLUMNS, chart_frame
+from api.services.lazy_import import lazy_module
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+# embedded: 從文檔內的 *_chart_data 數組讀取（默認）；columnar: 只讀 chart_bars；
+# auto: 優先讀 chart_bars，沒有對應分桶時退回文檔數組（遷移期間使用）
+CHART_STORAGE_MODES = ["embedded", "columnar", "auto"]
+CHART_STORAGE = os.getenv("CHART_STORAGE", "embedded")
+CHART_BARS_COLLECTION = "chart_bars"
+
+# 每個分桶最多存放的K線數（一個交易日的 1m 數據約 960 根，通常一個分桶即可）
+BUCKET_SIZE = 1000
+
+# 列名 -> 打包後的字段名及 dtype（小端序）
+PACKED_COLUMNS = {
+    "datetime": ("t", "<i8"),   # 存儲時區下的 epoch 毫秒
+    "open": ("o", "<f8"),
+    "high": ("h", "<f8"),
+    "low": ("l", "<f8"),
+    "close": ("c", "<f8"),
+    "volume": ("v", "<f8"),
+}
+
+CHART_BAR_INDEXES = [
+    ([("symbol", ASCENDING), ("today_date", ASCENDING), ("timeframe", ASCENDING), ("bucket", ASCENDING)],
+     "symbol_today_date_timeframe_bucket", True),
+]
+
+def ensure_chart_bar_indexes(collection) -> List[str]:
+    return [collection.create_index(keys, name=name, unique=unique) for keys, name, unique in CHART_BAR_INDEXES]
+
+def pack_buckets(symbol: str, today_date: str, timeframe: str, chart_data: List[Dict[str, Any]],
+                 bucket_size: int = BUCKET_SIZE) -> List[Dict[str, Any]]:
+    """
+    Converts a stored *_chart_data array into bucket documents holding one packed
+    little-endian array per column. Rows are sorted by time; unusable rows are dropped
+    exactly as chart_frame does.
+    """
+    df = chart_frame(chart_data)
+    if df.empty:
+        return []
+    df = df.assign(datetime=data_times(df)).sort_values('datetime', kind='stable')
+    times = df['datetime'].to_numpy(dtype='datetime64[ms]')
+    columns = {
+        "datetime": times.view('int64'),
+        **{column: df[column].to_numpy(dtype='float64') for column in OHLCV_COLUMNS},
+    }
+
+    buckets = []
+    for number, start in enumerate(range(0, len(df), bucket_size)):
+        stop = min(start + bucket_size, len(df))
+        bucket = {
+            "symbol": symbol,
+            "today_date": today_date,
+            "timeframe": timeframe,
+            "bucket": number,
+            "count": stop - start,
+            "start": times[start].astype('datetime64[ms]').item(),
+            "end": times[stop - 1].astype('datetime64[ms]').item(),
+        }
+        for column, (field, dtype) in PACKED_COLUMNS.items():
+            bucket[field] = Binary(np.ascontiguousarray(columns[column][start:stop], dtype=dtype).tobytes())
+        buckets.append(bucket)
+    return buckets
+
+def unpack_buckets(buckets: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Chart frame (same columns as chart_frame) from bucket documents sorted by bucket.
+    np.frombuffer reads the packed bytes without copying; several buckets are concatenated.
+    """
+    if not buckets:
+        return pd.DataFrame(columns=['datetime'] + OHLCV_COLUMNS)
+
+    arrays = {}
+    for column, (field, dtype) in PACKED_COLUMNS.items():
+        parts = [np.frombuffer(bucket[field], dtype=dtype) for bucket in buckets]
+        arrays[column] = parts[0] if len(parts) == 1 else np.concatenate(parts)
+    arrays["datetime"] = arrays["datetime"].view('datetime64[ms]')
+    return pd.DataFrame(arrays, copy=False)[['datetime'] + OHLCV_COLUMNS]
+
+class ColumnarChartStore:
+    """Reads chart frames from the bucketed chart_bars collection through AsyncMongoHandler."""
+
+    def __init__(self, mongo_db, collection: str = CHART_BARS_COLLECTION, mode: str = CHART_STORAGE):
+        if mode not in CHART_STORAGE_MODES:
+            raise ValueError(f"CHART_STORAGE 必須是 {', '.join(CHART_STORAGE_MODES)}")
+        self.mongo_db = mongo_db
+        self.collection = collection
+        self.mode = mode
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "embedded"
+
+    @property
+    def fallback(self) -> bool:
+        """Whether a missing bucket means "read the embedded array instead"."""
+        return self.mode == "auto"
+
+    async def read_frames(self, symbols: List[str], today_date: str, timeframe: str,
+                          window: Optional[ChartWindow] = None) -> Dict[str, pd.DataFrame]:
+        """One $in query for all symbols; symbols without buckets are absent from the result."""
+        query: Dict[str, Any] = {"symbol": {"$in": symbols}, "today_date": today_date, "timeframe": timeframe}
+        # 固定時間窗口時跳過完全在窗口外的分桶
+        if window is not None and window.start is not None:
+            query["end"] = {"$gte": window.start}
+        if window is not None and window.end is not None:
+            query["start"] = {"$lt": window.end}
+
+        buckets = await self.mongo_db.find(
+            self.collection, query, {"_id": 0, "symbol": 1, "bucket": 1, **{f: 1 for f, _ in PACKED_COLUMNS.values()}},
+            sort=[("symbol", ASCENDING), ("bucket", ASCENDING)]
+        )
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for bucket in buckets:
+            grouped.setdefault(bucket["symbol"], []).append(bucket)
+        return {symbol: unpack_buckets(rows) for symbol, rows in grouped.items()}
+
+    async def read_frame(self, symbol: str, today_date: str, timeframe: str,
+                         window: Optional[ChartWindow] = None) -> Optional[pd.DataFrame]:
+        return (await self.read_frames([symbol], today_date, timeframe, window)).get(symbol)
@@ -0,0 +1,120 @@
+# chart_window.py
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, NamedTuple, Optional
+from zoneinfo import ZoneInfo
+
+
+from api.services.chart_resample import DERIVED_TIMEFRAMES
+from api.services.lazy_import import lazy_module
+from api.services.market_calendar import MARKET_TZ, session_bounds
+
+pd = lazy_module("pandas")
+
+# 存儲的 K線時間（BSON 日期 / 無時區字符串）代表哪個時區的時間；
+# 數據以交易所（紐約）本地時間寫入（盤前從 04:00 開始），以 UTC 寫入的數據設為 UTC
+CHART_DATA_TZ = ZoneInfo(os.getenv("CHART_DATA_TIMEZONE", MARKET_TZ.key))
+
+# 1m 圖只顯示最新一根K線之前 3 小時；1d 圖顯示交易日之前 30 天
+TRAILING_1M = timedelta(hours=3)
+DAILY_LOOKBACK = timedelta(days=30)
+
+class ChartWindow(NamedTuple):
+    """
+    Bars to keep for a chart: either [start, end) or, when `trailing` is set, the span
+    ending at the newest bar. Bounds are naive datetimes in CHART_DATA_TZ, i.e. directly
+    comparable with the stored values.
+    """
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    trailing: Optional[timedelta] = None
+
+def to_data_time(moment: datetime) -> datetime:
+    """Aware datetime -> naive datetime in the storage time zone."""
+    return moment.astimezone(CHART_DATA_TZ).replace(tzinfo=None)
+
+def chart_window(timeframe: str, trade_date: Optional[str]) -> Optional[ChartWindow]:
+    """
+    Window for a timeframe on the document's trading date, on the exchange calendar:
+    1m -> the last 3 hours of data; 5m and the intraday intervals derived from 1m -> the
+    extended session (pre-market to post-market close, early closes applied);
+    1d -> the 30 days up to the end of the trading date. None means keep everything.
+    """
+    if timeframe == "1m":
+        return ChartWindow(trailing=TRAILING_1M)
+    if not trade_date or (timeframe not in ["5m", "1d"] and timeframe not in DERIVED_TIMEFRAMES):
+        return None
+    start, end = session_bounds(trade_date, "extended")
+    if timeframe == "1d":
+        return ChartWindow(start=to_data_time(end - DAILY_LOOKBACK), end=to_data_time(end))
+    return ChartWindow(start=to_data_time(start), end=to_data_time(end))
+
+def data_times(df: pd.DataFrame) -> pd.Series:
+    """Bar times as naive storage-zone datetimes, comparable with window bounds."""
+    times = df['datetime']
+    if isinstance(times.dtype, pd.DatetimeTZDtype):
+        return times.dt.tz_convert(CHART_DATA_TZ).dt.tz_localize(None)
+    return times
+
+def trade_date_of(df: pd.DataFrame) -> Optional[str]:
+    """Exchange date of the newest bar, for documents without a today_date."""
+    if df.empty:
+        return None
+    newest = data_times(df).max().to_pydatetime()
+    return newest.replace(tzinfo=CHART_DATA_TZ).astimezone(MARKET_TZ).date().isoformat()
+
+def filter_frame(df: pd.DataFrame, window: Optional[ChartWindow]) -> pd.DataFrame:
+    """Applies a window to a chart frame (same result as window_expression in MongoDB)."""
+    if window is None or df.empty:
+        return df
+    times = data_times(df)
+    mask = pd.Series(True, index=df.index)
+    if window.start is not None:
+        mask &= times >= window.start
+    if window.end is not None:
+        mask &= times < window.end
+    if window.trailing is not None:
+        mask &= times >= times.max() - window.trailing
+    return df[mask]
+
+# mongod 對無法識別的聚合表達式返回的錯誤碼（InvalidPipelineOperator）
+INVALID_PIPELINE_OPERATOR = 168
+
+def unsupported_expression(error: Exception) -> bool:
+    """True when the backend cannot evaluate window_expression (mongomock, old mongod)."""
+    if isinstance(error, NotImplementedError):
+        return True
+    return getattr(error, "code", None) == INVALID_PIPELINE_OPERATOR
+
+def _bar_time(variable: str) -> Dict[str, Any]:
+    # Date 原樣保留，ISO 字符串轉為日期（無時區時按 UTC 解析，與 BSON 日期的表示一致）
+    return {"$convert": {"input": f"{variable}.datetime", "to": "date", "onError": None, "onNull": None}}
+
+def window_expression(field: str, window: Optional[ChartWindow]) -> Any:
+    """
+    Projection expression that keeps only the in-window bars of `field`, so the rest
+    are never transferred or decoded. Bars without a usable datetime are dropped.
+    """
+    if window is None:
+        return 1
+
+    bars = {"$ifNull": [f"${field}", []]}
+    conditions = [{"$ne": [_bar_time("$$bar"), None]}]
+    if window.start is not None:
+        conditions.append({"$gte": [_bar_time("$$bar"), window.start]})
+    if window.end is not None:
+        conditions.append({"$lt": [_bar_time("$$bar"), window.end]})
+    if window.trailing is not None:
+        trailing_ms = int(window.trailing.total_seconds() * 1000)
+        conditions.append({"$gte": [_bar_time("$$bar"), {"$subtract": ["$$newest", trailing_ms]}]})
+
+    expression = {"$filter": {"input": bars, "as": "bar", "cond": {"$and": conditions}}}
+    if window.trailing is None:
+        return expression
+    return {"$let": {
+        "vars": {"newest": {"$max": {"$map": {"input": bars, "as": "bar", "in": _bar_time("$$bar")}}}},
+        "in": expression
+    }}
@@ -0,0 +1,72 @@
+# date_index.py
+
+import asyncio
+import bisect
+import time
+from typing import List, Optional
+
+class DateIndex:
+    """
+    Incrementally maintained set of trading dates present in the collection.
+    The first call runs one distinct over the today_date index; after that a probe
+    (an indexed sort for the newest date) runs at most every `probe_interval` seconds
+    and only dates newer than the known ones are fetched.
+    """
+
+    def __init__(self, mongo_db, collection: str, probe_interval: float = 30.0):
+        self.mongo_db = mongo_db
+        self.collection = collection
+        self.probe_interval = probe_interval
+        self._dates: List[str] = []   # 升序
+        self._loaded = False
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _newest_stored(self) -> Optional[str]:
+        # 由 today_date 開頭的索引直接給出最新日期，無需掃描
+        rows = await self.mongo_db.find(
+            self.collection, {"today_date": {"$type": "string"}}, {"today_date": 1, "_id": 0},
+            sort=[("today_date", -1)], limit=1
+        )
+        return rows[0]["today_date"] if rows else None
+
+    async def refresh(self, force: bool = False) -> None:
+        if not force and self._loaded and time.monotonic() - self._checked_at < self.probe_interval:
+            return
+        async with self._lock:
+            if not force and self._loaded and time.monotonic() - self._checked_at < self.probe_interval:
+                return
+            if not self._loaded:
+                dates = await self.mongo_db.distinct(self.collection, "today_date")
+                self._dates = sorted(d for d in dates if isinstance(d, str))
+                self._loaded = True
+            else:
+                newest = await self._newest_stored()
+                if newest and (not self._dates or newest > self._dates[-1]):
+                    query = {"today_date": {"$gt": self._dates[-1]}} if self._dates else None
+                    for date in await self.mongo_db.distinct(self.collection, "today_date", query):
+                        self.add(date)
+            self._checked_at = time.monotonic()
+
+    def reset(self) -> None:
+        """Forgets every known date; the next call reloads them with one distinct."""
+        self._dates = []
+        self._loaded = False
+        self._checked_at = 0.0
+
+    def add(self, date: str) -> None:
+        """Records a date seen by a writer without waiting for the next probe."""
+        if not isinstance(date, str):
+            return
+        index = bisect.bisect_left(self._dates, date)
+        if index == len(self._dates) or self._dates[index] != date:
+            self._dates.insert(index, date)
+
+    async def dates(self) -> List[str]:
+        """All known dates, newest first."""
+        await self.refresh()
+        return self._dates[::-1]
+
+    async def latest(self) -> Optional[str]:
+        await self.refresh()
+        return self._dates[-1] if self._dates else None
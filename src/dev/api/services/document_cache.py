@@ -0,0 +1,187 @@
+# document_cache.py
+
+import asyncio
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Optional
+
+MISSING = object()
+
+# 緩存按估算的內存大小限制（文檔可能包含全部圖表數組）
+DEFAULT_MAX_BYTES = int(float(os.getenv("DOCUMENT_CACHE_MAX_MB", "256")) * 1024 * 1024)
+# 長列表只抽樣估算前幾個元素
+SIZE_SAMPLE = 8
+
+def approximate_size(value: Any) -> int:
+    """Rough in-memory size in bytes; long lists are extrapolated from their first items."""
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(approximate_size(k) + approximate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        sample = value[:SIZE_SAMPLE]
+        items = sum(approximate_size(item) for item in sample)
+        if len(value) > len(sample):
+            items = items * len(value) // len(sample)
+        return sys.getsizeof(value) + items
+    memory_usage = getattr(value, "memory_usage", None)
+    if callable(memory_usage):
+        # DataFrame / Series（不在此導入 pandas）
+        usage = memory_usage(index=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    return sys.getsizeof(value)
+
+class _LoaderCancelled(Exception):
+    """Set on an in-flight future whose loader was cancelled; waiters retry the load."""
+
+def _matches(key, symbol: Optional[str], date: Optional[str], field: Optional[str]) -> bool:
+    return (
+        (symbol is None or key[0] == symbol) and (date is None or key[1] in (date, None))
+        and (field is None or len(key) < 3 or key[2] is None or field in key[2])
+    )
+
+class _Entry(NamedTuple):
+    value: Any
+    expires_at: float
+    size: int
+
+class DocumentCache:
+    """
+    Size-bounded LRU with per-entry TTL and single-flight loading.
+    Bounded by entry count and by the approximate size of the values (`max_bytes`).
+    Keys are tuples starting with (symbol, date); concurrent misses on the same key share
+    one loader call. If that call is cancelled (its client went away) a waiting request
+    takes over the load instead of being cancelled too. Entries for past (immutable) dates live for `immutable_ttl`,
+    everything else, including "not found" results, for `ttl`.
+    With a `shared` cache (shared_cache.SharedCache) loads are first looked up there and
+    stored there for the full TTL, so workers share one copy; the local layer then keeps
+    those entries for at most `ttl`, which bounds how long another worker's invalidation
+    goes unseen. Values stored with put() are local only and keep their full TTL.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 5.0, immutable_ttl: float = 3600.0,
+                 shared=None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.ttl = ttl
+        self.immutable_ttl = immutable_ttl
+        self.shared = shared
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def peek(self, key: Hashable) -> Any:
+        """Cached value or MISSING, without loading; counts as a hit when found."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISSING
+        if entry.expires_at <= time.monotonic():
+            self._discard(key)
+            return MISSING
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def _ttl(self, value: Any, immutable: bool) -> float:
+        return self.immutable_ttl if immutable and value is not None else self.ttl
+
+    def put(self, key: Hashable, value: Any, immutable: bool = False) -> None:
+        """Stores a value in this process only (it never reaches the shared cache)."""
+        self._store(key, value, self._ttl(value, immutable))
+
+    def _store(self, key: Hashable, value: Any, ttl: float) -> None:
+        size = approximate_size(value)
+        self._discard(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = _Entry(value, time.monotonic() + ttl, size)
+        self.size_bytes += size
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size_bytes -= evicted.size
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry.size
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                          immutable: bool = False) -> Any:
+        while True:
+            value = self.peek(key)
+            if value is not MISSING:
+                return value
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            # 已有相同的查詢在進行，等待其結果而不是再查一次
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except _LoaderCancelled:
+                # 發起查詢的請求被取消，由等待者重新查詢
+                continue
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._load(key, loader, immutable)
+        except asyncio.CancelledError:
+            future.set_exception(_LoaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # 沒有等待者時避免 "exception was never retrieved" 警告
+            raise
+        else:
+            # 另一個 worker 失效共享條目後，本地副本最多再用 ttl 秒
+            self._store(key, value, self.ttl if self.shared is not None else self._ttl(value, immutable))
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], immutable: bool) -> Any:
+        if self.shared is None:
+            return await loader()
+        value = await self.shared.get(key)
+        if value is MISSING:
+            value = await loader()
+            await self.shared.set(key, value, self._ttl(value, immutable))
+        return value
+
+    def invalidate(self, symbol: Optional[str] = None, date: Optional[str] = None,
+                   field: Optional[str] = None) -> int:
+        """
+        Drops entries matching symbol and/or date (both None clears everything).
+        Entries cached without a date may resolve to any date, so they are dropped too.
+        With `field`, only whole documents and projections containing that field go.
+        """
+        doomed = [key for key in self._entries if _matches(key, symbol, date, field)]
+        for key in doomed:
+            self._discard(key)
+        return len(doomed)
+
+    async def purge(self, symbol: Optional[str] = None, date: Optional[str] = None,
+                    field: Optional[str] = None) -> int:
+        """invalidate() here and in the shared cache, so every worker reloads the entries."""
+        dropped = self.invalidate(symbol, date, field)
+        if self.shared is not None:
+            await self.shared.delete_where(symbol, lambda key: _matches(key, symbol, date, field))
+        return dropped
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,8 +1,24 @@
 # _utils.py
 
+from __future__ import annotations
+
 from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
-import pandas as pd
+
+from bson import Decimal128
+
+from api.services.chart_resample import downsample_ohlcv, resample_ohlcv
+from api.services.chart_window import chart_window, filter_frame, trade_date_of
+from api.services.lazy_import import lazy_module
+from api.services.metrics import timed
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+def as_number(value: Any) -> Any:
+    """Converts BSON Decimal128 (stored for some money fields) to float; other values are returned as is."""
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    return value
 
 def format_market_cap(value: Optional[float]) -> str:
     """
@@ -10,6 +26,8 @@ def format_market_cap(value: Optional[float]) -> str:
     """
     if value is None:
         return "N/A"
+    # Decimal128 不支持比較運算
+    value = as_number(value)
     
     if value >= 1_000_000_000:
         return f"${value/1_000_000_000:.2f}B"
@@ -20,39 +38,120 @@ def format_market_cap(value: Optional[float]) -> str:
     else:
         return f"{value:.2f}"
 
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+def _parse_datetimes(values: pd.Series) -> pd.Series:
+    """Parses mixed ISO strings / datetimes; unparseable values become NaT."""
+    try:
+        return pd.to_datetime(values, errors='coerce', format='ISO8601')
+    except (TypeError, ValueError):
+        # pandas < 2.0 不支持 format='ISO8601'
+        return pd.to_datetime(values, errors='coerce')
+
+def chart_frame(chart_data: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Builds a columnar frame from stored bars.
+    'datetime' is parsed once for the whole column; rows without a usable datetime are dropped
+    and missing OHLCV values become 0, matching what prepare_tvlwc_data used to emit.
+    """
+    if not chart_data:
+        return pd.DataFrame(columns=['datetime'] + OHLCV_COLUMNS)
+
+    df = pd.DataFrame(chart_data)
+    if 'datetime' not in df.columns:
+        return pd.DataFrame(columns=['datetime'] + OHLCV_COLUMNS)
+
+    # 確保datetime列是datetime類型
+    if not pd.api.types.is_datetime64_any_dtype(df['datetime']):
+        df['datetime'] = _parse_datetimes(df['datetime'])
+    df = df[df['datetime'].notna()]
+
+    for column in OHLCV_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).astype('float64')
+        else:
+            df[column] = 0.0
+
+    return df[['datetime'] + OHLCV_COLUMNS]
+
+def _isoformat_times(times: pd.Series) -> List[str]:
+    """Vectorized equivalent of datetime.isoformat() for a datetime column."""
+    if times.empty:
+        return []
+    if times.dt.tz is not None:
+        offsets = times.dt.strftime('%z').str.replace(r'([+-]\d{2})(\d{2})$', r'\1:\2', regex=True)
+        wall = times.dt.tz_localize(None)
+        return [t + o for t, o in zip(_isoformat_times(wall), offsets.tolist())]
+
+    values = times.to_numpy(dtype='datetime64[us]')
+    # datetime.isoformat() 只在有微秒時輸出小數部分
+    has_micros = bool((values.astype('int64') % 1_000_000).any())
+    return np.datetime_as_string(values, unit='us' if has_micros else 's').tolist()
+
+def frame_to_tvlwc(df: pd.DataFrame, compact: bool = False):
+    """
+    Formats a chart frame for the Tvlwc chart components straight from the column arrays.
+    compact=False returns a list of {time, open, high, low, close, volume} rows;
+    compact=True returns one list per column ({"time": [...], "open": [...], ...}).
+    """
+    times = _isoformat_times(df['datetime'])
+    columns = {column: df[column].to_numpy(dtype='float64').tolist() for column in OHLCV_COLUMNS}
+
+    if compact:
+        return {'time': times, **columns}
+
+    return [
+        {'time': t, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+        for t, o, h, l, c, v in zip(
+            times, columns['open'], columns['high'], columns['low'], columns['close'], columns['volume']
+        )
+    ]
+
+def build_chart_data(chart_data: List[Dict[str, Any]], interval: str, compact: bool = False,
+                     max_points: Optional[int] = None, downsample: str = "minmax",
+                     trade_date: Optional[str] = None):
+    """
+    Filter -> resample -> downsample -> format pipeline used by the chart endpoint.
+    The data stays columnar throughout. Derived intervals (2m, 15m, 30m, 1h) are
+    aggregated from the 1m series; max_points caps the number of bars returned.
+    chart_data is a stored bar array or an already built chart frame (chart_store).
+    """
+    with timed("chart"):
+        df = chart_data if isinstance(chart_data, pd.DataFrame) else chart_frame(chart_data)
+        df = filter_chart_frame(df, interval, trade_date)
+        df = resample_ohlcv(df, interval)
+        df = downsample_ohlcv(df, max_points, downsample)
+        return frame_to_tvlwc(df, compact=compact)
+
 def prepare_tvlwc_data(chart_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Prepares chart data for the dash_tvlwc component.
-    Converts 'datetime' to Unix timestamp (seconds) and ensures OHLC values are floats.
+    Converts 'datetime' to ISO strings and ensures OHLC values are floats.
     """
     if not chart_data:
         return []
+    return frame_to_tvlwc(chart_frame(chart_data))
+
+# 舊的時間間隔名稱 -> 時間框架
+LEGACY_INTERVALS = {'1min': '1m', '5min': '5m', '1day': '1d'}
+
+def filter_chart_frame(df: pd.DataFrame, interval: str = '1m', trade_date: Optional[str] = None) -> pd.DataFrame:
+    """
+    根據時間框架過濾圖表數據（DataFrame 版本）。
+    時間窗口按交易所日曆（紐約時間、盤前盤後時段）以文檔的交易日計算，見 chart_window。
+    """
+    if df.empty:
+        return df
     
-    formatted_data = []
-    for item in chart_data:
-        if isinstance(item.get('datetime'), str):
-            try:
-                dt = datetime.fromisoformat(item['datetime'])
-            except ValueError:
-                continue
-        else:
-            dt = item.get('datetime')
-            
-        if not dt:
-            continue
-            
-        formatted_data.append({
-            'time': dt.isoformat(),
-            'open': float(item.get('open', 0)),
-            'high': float(item.get('high', 0)),
-            'low': float(item.get('low', 0)),
-            'close': float(item.get('close', 0)),
-            'volume': float(item.get('volume', 0))
-        })
+    interval = LEGACY_INTERVALS.get(interval, interval)
+    window = chart_window(interval, trade_date or trade_date_of(df))
+    df = filter_frame(df, window)
     
-    return formatted_data
+    # 按時間排序
+    return df.sort_values('datetime', kind='stable')
 
-def filter_chart_data(chart_data: List[Dict[str, Any]], interval: str = '1min') -> List[Dict[str, Any]]:
+def filter_chart_data(chart_data: List[Dict[str, Any]], interval: str = '1m',
+                      trade_date: Optional[str] = None) -> List[Dict[str, Any]]:
     """根據時間間隔過濾圖表數據"""
     if not chart_data:
         return []
@@ -65,22 +164,4 @@ def filter_chart_data(chart_data: List[Dict[str, Any]], interval: str = '1min')
     if df['datetime'].dtype == 'object':
         df['datetime'] = pd.to_datetime(df['datetime'])
     
-    now = datetime.now()
-    
-    if interval == '1min':
-        # 只保留最近3小時的數據
-        cutoff = now - timedelta(hours=3)
-        df = df[df['datetime'] >= cutoff]
-    elif interval == '5min':
-        # 只保留當天的數據
-        today = now.date()
-        df = df[df['datetime'].dt.date == today]
-    elif interval == '1day':
-        # 保留最近30天的數據
-        cutoff = now - timedelta(days=30)
-        df = df[df['datetime'] >= cutoff]
-    
-    # 按時間排序
-    df = df.sort_values('datetime')
-    
-    return df.to_dict('records')
\ No newline at end of file
+    return filter_chart_frame(df, interval, trade_date).to_dict('records')
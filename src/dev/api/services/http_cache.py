@@ -0,0 +1,89 @@
+# http_cache.py
+
+import hashlib
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from api.services.json_response import MongoJSONResponse
+from api.services.market_calendar import is_past_date
+
+# 歷史日期的數據不會再變，可長期快取；其餘每次都需要向服務器驗證（命中時返回 304）
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# 新聞寫入時更新的時間字段（新聞不經由機器人寫入，不會改變其他更新標記）
+NEWS_UPDATED_FIELD = "news_updated_at"
+# 文檔中可作為「最後更新」標記的字段
+LAST_UPDATED_FIELDS = ["last_updated", "updated_at", "last_update", NEWS_UPDATED_FIELD]
+
+def cache_control_for(date: Optional[str], news: bool = False) -> str:
+    """
+    Cache-Control for a URL addressing `date` (no date means "latest", which can change).
+    Responses carrying raw_news always revalidate: news can be added to past dates too.
+    """
+    return IMMUTABLE_CACHE_CONTROL if is_past_date(date) and not news else REVALIDATE_CACHE_CONTROL
+
+def _digest(*parts: Any) -> str:
+    h = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def document_etag(document: Optional[Dict[str, Any]], request: Request) -> Optional[str]:
+    """
+    ETag derived from the document's _id plus a version marker, so it can be checked
+    before anything is serialized. The marker is "immutable" for past dates or the
+    document's last-updated fields; returns None when neither is available. The news
+    update time is always part of it, since news can change a past date's document.
+    """
+    if not document or "_id" not in document:
+        return None
+    if is_past_date(document.get("today_date")):
+        marker = f"immutable|{document.get(NEWS_UPDATED_FIELD)}"
+    else:
+        markers = [document[f] for f in LAST_UPDATED_FIELDS if document.get(f) is not None]
+        if not markers:
+            return None
+        marker = "|".join(str(m) for m in markers)
+    return f'W/"{_digest(document["_id"], marker, request.url.path, request.url.query)}"'
+
+def content_etag(body: bytes) -> str:
+    return f'"{_digest(body)}"'
+
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    """Weak comparison of If-None-Match against an ETag (RFC 9110 section 13.1.2)."""
+    header = request.headers.get("if-none-match")
+    if not header or not etag:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+def conditional_json(request: Request, content: Any, cache_control: str,
+                     etag: Optional[str] = None, response_class=MongoJSONResponse) -> Response:
+    """
+    Serializes `content` with validators attached. Without a precomputed ETag the body is
+    hashed, which still lets a matching client skip the download with a 304.
+    """
+    response = response_class(content=content)
+    return conditional_bytes(request, response, cache_control, etag)
+
+def conditional_bytes(request: Request, response: Response, cache_control: str,
+                      etag: Optional[str] = None) -> Response:
+    etag = etag or content_etag(response.body)
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return response
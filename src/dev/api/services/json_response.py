@@ -0,0 +1,53 @@
+# json_response.py
+
+from datetime import datetime, timezone
+from typing import Any
+
+import orjson
+from bson import Decimal128, ObjectId, json_util
+from fastapi.responses import JSONResponse
+
+from api.services.metrics import timed
+
+_ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME   # datetime 交給 _bson_default，輸出與 json_util 相同的 {"$date": ...}
+    | orjson.OPT_SERIALIZE_NUMPY
+    | orjson.OPT_NON_STR_KEYS
+)
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def _encode_datetime(value: datetime) -> dict:
+    """Same relaxed extended-JSON shape bson.json_util produces for datetimes."""
+    aware = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if aware >= _EPOCH:
+        offset = aware.utcoffset()
+        tz_string = "Z" if not offset else aware.strftime("%z")
+        millis = aware.microsecond // 1000
+        fraction = f".{millis:03d}" if millis else ""
+        return {"$date": f"{aware.strftime('%Y-%m-%dT%H:%M:%S')}{fraction}{tz_string}"}
+    return json_util.default(value)
+
+def _bson_default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    if isinstance(value, datetime):
+        return _encode_datetime(value)
+    if isinstance(value, Decimal128):
+        return {"$numberDecimal": str(value)}
+    # 其餘 BSON 類型（Binary、Regex、UUID 等）沿用 json_util 的表示方式
+    return json_util.default(value)
+
+def dumps_mongo(data: Any) -> bytes:
+    """Serializes MongoDB results straight to JSON bytes in a single pass."""
+    with timed("serialize"):
+        return orjson.dumps(data, default=_bson_default, option=_ORJSON_OPTIONS)
+
+class MongoJSONResponse(JSONResponse):
+    """
+    JSON response that accepts raw MongoDB documents.
+    Replaces the json_util.dumps -> json.loads -> JSONResponse round trip with one orjson pass.
+    NaN/Infinity are emitted as null.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps_mongo(content)
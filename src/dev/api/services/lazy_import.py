@@ -0,0 +1,37 @@
+# lazy_import.py
+
+import importlib
+import sys
+from typing import Any
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+    pandas / numpy are only needed by the chart, signal and summary code paths;
+    deferring them keeps them out of the app's cold start.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+def lazy_module(name: str):
+    """The module itself when already imported, otherwise a LazyModule."""
+    return sys.modules.get(name) or LazyModule(name)
+
+def preload(*names: str) -> None:
+    """Imports the given modules now, e.g. in a pre-fork master so workers share the pages."""
+    for name in names:
+        importlib.import_module(name)
@@ -0,0 +1,226 @@
+# leaderboard.py
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+
+from api.services.document_cache import MISSING
+from api.services.market_calendar import is_past_date
+
+SHARED_PAST_BOARD_TTL = 86400
+
+TOP_MOVER_SORT_FIELDS = ["close_change_percentage", "high_change_percentage"]
+
+# 列表 / 排行榜共用的字段投影
+LIST_PROJECTION = {
+    "symbol": 1,
+    "name": 1,
+    "day_close": 1,
+    "yesterday_close": 1,
+    "close_change_percentage": 1,
+    "high_change_percentage": 1,
+    "day_high": 1,
+    "day_low": 1,
+    "today_date": 1,
+    "float_risk": 1,
+    "sector": "$company_info.sector"
+}
+
+# 啟動時確保存在的複合索引
+SYMBOL_INDEXES = [
+    ([("today_date", ASCENDING), ("close_change_percentage", DESCENDING)], "today_date_close_change_percentage"),
+    ([("today_date", ASCENDING), ("high_change_percentage", DESCENDING)], "today_date_high_change_percentage"),
+    ([("symbol", ASCENDING), ("today_date", DESCENDING)], "symbol_today_date"),
+    # /stocks/ 的鍵集分頁排序鍵
+    ([("today_date", DESCENDING), ("symbol", ASCENDING), ("_id", ASCENDING)], "today_date_symbol_id"),
+]
+
+def ensure_indexes(collection, indexes=SYMBOL_INDEXES) -> List[str]:
+    """Creates the given indexes if missing (create_index is a no-op when they exist)."""
+    return [collection.create_index(keys, name=name) for keys, name in indexes]
+
+# 儀表板每日列表額外需要的字段
+DAY_LIST_PROJECTION = {**LIST_PROJECTION, "short_signal": 1}
+
+def top_movers_pipeline(date: Optional[str], sort_by: str, limit: int,
+                        projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Without a date nothing leads the indexes, so callers resolve one first (date_index.latest())."""
+    query = {}
+    if date:
+        query["today_date"] = date
+    return [
+        {"$match": query},
+        {"$sort": {sort_by: -1}},
+        {"$limit": limit},
+        {"$project": projection or LIST_PROJECTION}
+    ]
+
+def _winning_plans(node, found):
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "winningPlan":
+                found.append(value)
+            elif key != "rejectedPlans":
+                _winning_plans(value, found)
+    elif isinstance(node, list):
+        for item in node:
+            _winning_plans(item, found)
+    return found
+
+def _plan_stages(node, stages):
+    if isinstance(node, dict):
+        if "stage" in node:
+            stages.append(node["stage"])
+        for value in node.values():
+            _plan_stages(value, stages)
+    elif isinstance(node, list):
+        for item in node:
+            _plan_stages(item, stages)
+    return stages
+
+def explain_pipeline(db, collection_name: str, pipeline: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Runs `aggregate` with explain and returns the winning plan stages."""
+    explain = db.command("aggregate", collection_name, pipeline=pipeline, explain=True)
+    stages = []
+    for plan in _winning_plans(explain, []):
+        _plan_stages(plan, stages)
+    # 未能下推到查詢層的 $sort 會以獨立的聚合階段出現
+    blocking_sort = any("$sort" in stage for stage in explain.get("stages", []))
+    return {"stages": stages, "blocking_sort": blocking_sort, "explain": explain}
+
+def assert_index_backed(plan: Dict[str, Any]) -> None:
+    """Fails if a plan scans the whole collection or sorts in memory."""
+    stages = plan["stages"]
+    if "COLLSCAN" in stages:
+        raise AssertionError(f"查詢計劃包含 COLLSCAN: {stages}")
+    if "SORT" in stages or plan["blocking_sort"]:
+        raise AssertionError(f"查詢計劃包含內存排序: {stages}")
+
+class _Board(NamedTuple):
+    rows: List[Dict[str, Any]]
+    doc_count: int
+    checked_at: float
+
+class LeaderboardCache:
+    """
+    Per-date top-movers cache.
+    Keeps the top `depth` rows per (date, sort field), already sorted by the index scan.
+    Also backs the per-date dashboard lists (depth=500, DAY_LIST_PROJECTION).
+    Today's boards are re-read every `probe_interval` seconds (prices move intraday);
+    past dates are only reloaded when the number of documents for the date changes.
+    With a `shared` cache (shared_cache.SharedCache) a board loaded or re-validated by one
+    worker is reused by the others until its interval runs out.
+    At most `max_boards` boards are kept (least recently used evicted, with their locks).
+    """
+
+    def __init__(self, mongo_db, collection: str, depth: int = 50,
+                 probe_interval: float = 5.0, past_probe_interval: float = 300.0,
+                 projection: Optional[Dict[str, Any]] = None, shared=None, max_boards: int = 64):
+        self.mongo_db = mongo_db
+        self.shared = shared
+        self.collection = collection
+        self.depth = depth
+        self.projection = projection or LIST_PROJECTION
+        self.probe_interval = probe_interval
+        self.past_probe_interval = past_probe_interval
+        self.max_boards = max_boards
+        self._boards: "OrderedDict[Tuple[Optional[str], str], _Board]" = OrderedDict()
+        self._locks: Dict[Tuple[Optional[str], str], asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def _load(self, date: Optional[str], sort_by: str, doc_count: int) -> _Board:
+        rows = await self.mongo_db.aggregate(self.collection, top_movers_pipeline(date, sort_by, self.depth, self.projection))
+        return _Board(rows, doc_count, time.monotonic())
+
+    async def _count(self, date: str) -> int:
+        return await self.mongo_db.count_documents(self.collection, {"today_date": date})
+
+    async def _shared_board(self, key: Tuple[Optional[str], str]) -> Optional[_Board]:
+        if self.shared is None:
+            return None
+        cached = await self.shared.get(key)
+        if cached is MISSING:
+            return None
+        # 共享的是檢查時的掛鐘時間，換算成本進程的 monotonic 時間
+        age = max(0.0, time.time() - cached["checked_at"])
+        return _Board(cached["rows"], cached["doc_count"], time.monotonic() - age)
+
+    async def _share(self, key: Tuple[Optional[str], str], board: _Board, immutable: bool) -> None:
+        if self.shared is not None:
+            # 歷史日期的排行榜過了探測間隔仍可用於比較文檔數量，保留更久
+            ttl = SHARED_PAST_BOARD_TTL if immutable else self.probe_interval
+            await self.shared.set(key, {"rows": board.rows, "doc_count": board.doc_count, "checked_at": time.time()}, ttl)
+
+    async def top(self, date: Optional[str], sort_by: str, limit: int) -> List[Dict[str, Any]]:
+        if limit > self.depth:
+            return await self.mongo_db.aggregate(
+                self.collection, top_movers_pipeline(date, sort_by, limit, self.projection)
+            )
+
+        key = (date, sort_by)
+        immutable = is_past_date(date)
+        interval = self.past_probe_interval if immutable else self.probe_interval
+
+        board = self._boards.get(key)
+        if board and time.monotonic() - board.checked_at < interval:
+            self.hits += 1
+            self._boards.move_to_end(key)
+            return board.rows[:limit]
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                return await self._refresh(key, date, sort_by, limit, immutable, interval)
+        finally:
+            # 加載失敗或排行榜已被淘汰時不保留鎖，否則每個查詢過的日期都會留下一個
+            if key not in self._boards and not lock.locked() and self._locks.get(key) is lock:
+                del self._locks[key]
+
+    async def _refresh(self, key: Tuple[Optional[str], str], date: Optional[str], sort_by: str,
+                       limit: int, immutable: bool, interval: float) -> List[Dict[str, Any]]:
+        board = self._boards.get(key)
+        if board and time.monotonic() - board.checked_at < interval:
+            self.hits += 1
+            return board.rows[:limit]
+
+        shared = await self._shared_board(key)
+        if shared and time.monotonic() - shared.checked_at < interval:
+            self.hits += 1
+            self._remember(key, shared)
+            return shared.rows[:limit]
+        board = board or shared
+
+        # 只有歷史日期需要探測文檔數量，當天的排行榜到期即重新讀取
+        doc_count = await self._count(date) if immutable else -1
+        if board and immutable and doc_count == board.doc_count:
+            # 歷史日期沒有新文檔，沿用排行榜
+            self.hits += 1
+            board = board._replace(checked_at=time.monotonic())
+        else:
+            self.misses += 1
+            board = await self._load(date, sort_by, doc_count)
+        self._remember(key, board)
+        await self._share(key, board, immutable)
+        return board.rows[:limit]
+
+    def _remember(self, key: Tuple[Optional[str], str], board: _Board) -> None:
+        self._boards[key] = board
+        self._boards.move_to_end(key)
+        while len(self._boards) > self.max_boards:
+            evicted, _ = self._boards.popitem(last=False)
+            lock = self._locks.get(evicted)
+            if lock is not None and not lock.locked():
+                del self._locks[evicted]
+
+    def invalidate(self, date: Optional[str] = None) -> None:
+        """Drops cached boards for one date, or all of them."""
+        for key in list(self._boards):
+            if date is None or key[0] == date:
+                del self._boards[key]
+                lock = self._locks.get(key)
+                if lock is not None and not lock.locked():
+                    del self._locks[key]
@@ -0,0 +1,235 @@
+# live_feed.py
+
+import asyncio
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from api.services.fastapi_utils import chart_frame, frame_to_tvlwc
+
+# 每個客戶端最多排隊的事件數，超出時丟棄最舊的事件（慢客戶端不會拖慢其他人）
+DEFAULT_CLIENT_QUEUE_SIZE = int(os.getenv("LIVE_CLIENT_QUEUE_SIZE", "256"))
+# 沒有 change stream（單機 mongod / 本地替身）時的輪詢間隔
+DEFAULT_POLL_INTERVAL = float(os.getenv("LIVE_POLL_INTERVAL", "2.0"))
+# 每次讀取只取每個代碼最後幾根 1m K線
+BAR_TAIL = 5
+LIVE_SOURCES = ["auto", "change_stream", "poll"]
+
+TOP_MOVERS_TOPIC = "top-movers"
+TOP_MOVERS_LIMIT = 10
+
+def symbol_topic(symbol: str) -> str:
+    return f"symbol:{symbol.upper()}"
+
+class Subscription:
+    """One client's bounded event queue; publishing never blocks on a slow reader."""
+
+    def __init__(self, topics: Set[str], max_queue: int = DEFAULT_CLIENT_QUEUE_SIZE):
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.queue.get_nowait()
+            self.dropped += 1
+            self.queue.put_nowait(event)
+
+    async def get(self) -> Dict[str, Any]:
+        return await self.queue.get()
+
+    def take_dropped(self) -> int:
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+class LiveHub:
+    """Topic -> subscriptions fan-out. Topics are symbol_topic(symbol) or TOP_MOVERS_TOPIC."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, topics: Set[str], max_queue: int = DEFAULT_CLIENT_QUEUE_SIZE) -> Subscription:
+        subscription = Subscription(topics, max_queue)
+        for topic in topics:
+            self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for topic in subscription.topics:
+            subscribers = self._subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+    def publish(self, topic: str, event: Dict[str, Any]) -> int:
+        subscribers = self._subscribers.get(topic, ())
+        for subscription in subscribers:
+            subscription.offer(event)
+        return len(subscribers)
+
+    def has_subscribers(self, topic: str) -> bool:
+        return topic in self._subscribers
+
+    def symbols(self) -> List[str]:
+        return sorted(topic.split(":", 1)[1] for topic in self._subscribers if topic.startswith("symbol:"))
+
+class LiveFeed:
+    """
+    Watches the symbol collection and publishes bar updates and top-mover changes to a LiveHub.
+
+    Changes are detected through a MongoDB change stream (replica sets) or, when that is
+    unavailable, by polling every `poll_interval` seconds. Either way each cycle does one
+    batched read for all subscribed symbols that changed, so the cost of an update does not
+    depend on how many clients are watching.
+    """
+
+    def __init__(self, hub: LiveHub, mongo_db, collection: str,
+                 latest_date: Callable[[], Awaitable[Optional[str]]],
+                 top_movers: Optional[Callable[[str], Awaitable[List[Dict[str, Any]]]]] = None,
+                 source: str = "auto", poll_interval: float = DEFAULT_POLL_INTERVAL):
+        if source not in LIVE_SOURCES:
+            raise ValueError(f"source 必須是 {', '.join(LIVE_SOURCES)}")
+        self.hub = hub
+        self.mongo_db = mongo_db
+        self.collection = collection
+        self.latest_date = latest_date
+        self.top_movers = top_movers
+        self.source = source
+        self.poll_interval = poll_interval
+        self.mode: Optional[str] = None
+        self._last_bars: Dict[str, Dict[str, Any]] = {}
+        self._last_movers: Optional[List[Any]] = None
+        self._dirty: Set[str] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.reads = 0
+
+    def ensure_started(self) -> None:
+        """Starts the feed on the running loop the first time a client subscribes."""
+        if self._task is None or self._task.done():
+            self._stop.clear()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self, symbols: Set[str]) -> None:
+        """Marks symbols as changed (called by writers or the change stream)."""
+        self._dirty.update(symbol.upper() for symbol in symbols)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        self.mode = "poll" if self.source == "poll" else "change_stream"
+        if self.mode == "change_stream":
+            self._start_watcher(asyncio.get_running_loop())
+
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            if self.mode == "poll":
+                # 輪詢模式無法知道哪些代碼有變化，每輪讀取所有被訂閱的代碼
+                self._dirty.update(self.hub.symbols())
+            try:
+                await self.publish_once()
+            except Exception as e:
+                print(f"警告: 實時數據更新失敗: {e}")
+
+    def _start_watcher(self, loop: asyncio.AbstractEventLoop) -> None:
+        def fallback(e: Exception):
+            if self.source == "change_stream":
+                print(f"警告: change stream 中斷: {e}")
+            self.mode = "poll"
+
+        def watch():
+            pipeline = [
+                {"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}},
+                {"$project": {"fullDocument.symbol": 1}},
+            ]
+            try:
+                collection = self.mongo_db.db[self.collection]
+                with collection.watch(pipeline, full_document="updateLookup", max_await_time_ms=1000) as stream:
+                    while not self._stop.is_set():
+                        change = stream.try_next()
+                        symbol = ((change or {}).get("fullDocument") or {}).get("symbol")
+                        if symbol:
+                            loop.call_soon_threadsafe(self.notify, {symbol})
+            except Exception as e:
+                # 單機 mongod（OperationFailure）或本地替身不支持 change stream，改為輪詢
+                if not self._stop.is_set():
+                    loop.call_soon_threadsafe(fallback, e)
+
+        self._watcher = threading.Thread(target=watch, name="live-feed-watch", daemon=True)
+        self._watcher.start()
+
+    async def publish_once(self) -> None:
+        date = await self.latest_date()
+        if not date:
+            return
+
+        symbols = [symbol for symbol in self._dirty if self.hub.has_subscribers(symbol_topic(symbol))]
+        self._dirty.clear()
+        if symbols:
+            await self._publish_bars(date, symbols)
+        if self.top_movers is not None and self.hub.has_subscribers(TOP_MOVERS_TOPIC):
+            await self._publish_top_movers(date)
+
+    async def _publish_bars(self, date: str, symbols: List[str]) -> None:
+        # 一次批量讀取所有變化的代碼，只取最後幾根K線
+        self.reads += 1
+        documents = await self.mongo_db.find(
+            self.collection,
+            {"symbol": {"$in": symbols}, "today_date": date},
+            {"symbol": 1, "today_date": 1, "day_close": 1, "close_change_percentage": 1,
+             "1m_chart_data": {"$slice": -BAR_TAIL}}
+        )
+        for document in documents:
+            symbol = document.get("symbol")
+            bars = self._new_bars(symbol, date, frame_to_tvlwc(chart_frame(document.get("1m_chart_data") or [])))
+            if bars:
+                self.hub.publish(symbol_topic(symbol), {
+                    "type": "bars",
+                    "symbol": symbol,
+                    "date": date,
+                    "timeframe": "1m",
+                    "day_close": document.get("day_close"),
+                    "close_change_percentage": document.get("close_change_percentage"),
+                    "bars": bars,
+                })
+
+    def _new_bars(self, symbol: str, date: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Bars newer than the last one sent, plus the last one again if it was still forming."""
+        if not rows:
+            return []
+        last = self._last_bars.get(symbol)
+        self._last_bars[symbol] = {"date": date, **rows[-1]}
+        if last is None or last["date"] != date:
+            return rows
+        return [
+            row for row in rows
+            if row["time"] > last["time"] or (row["time"] == last["time"] and row != {k: v for k, v in last.items() if k != "date"})
+        ]
+
+    async def _publish_top_movers(self, date: str) -> None:
+        rows = await self.top_movers(date)
+        signature = [(row.get("symbol"), row.get("close_change_percentage")) for row in rows]
+        if signature != self._last_movers:
+            self._last_movers = signature
+            self.hub.publish(TOP_MOVERS_TOPIC, {"type": "top-movers", "date": date, "data": rows})
@@ -0,0 +1,133 @@
+# market_calendar.py
+
+from datetime import date as Date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+MARKET_TZ = ZoneInfo("America/New_York")
+
+# 美股交易時段（紐約時間）；extended 為盤前開始至盤後結束
+SESSIONS = {
+    "pre": (time(4, 0), time(9, 30)),
+    "regular": (time(9, 30), time(16, 0)),
+    "post": (time(16, 0), time(20, 0)),
+    "extended": (time(4, 0), time(20, 0)),
+}
+# 提前收市日：正常時段 13:00 結束，盤後延續至 17:00
+EARLY_CLOSE = time(13, 0)
+EARLY_CLOSE_POST_END = time(17, 0)
+
+def market_now() -> datetime:
+    """Current time on the exchange clock."""
+    return datetime.now(MARKET_TZ)
+
+def market_today() -> str:
+    """Today's date on the exchange clock, in the YYYY-MM-DD format used by today_date."""
+    return market_now().date().isoformat()
+
+def is_past_date(date: Optional[str]) -> bool:
+    """True for a trading date that is already over; its documents no longer change."""
+    return bool(date) and date < market_today()
+
+def _easter(year: int) -> Date:
+    # Anonymous Gregorian algorithm
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return Date(year, month, day)
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> Date:
+    """n-th (1-based) weekday of a month; n=-1 is the last one."""
+    if n > 0:
+        first = Date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = Date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def _observed(day: Date) -> Date:
+    # 週六的假期提前到週五，週日的假期順延到週一
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+@lru_cache(maxsize=64)
+def nyse_holidays(year: int) -> Dict[Date, str]:
+    """Full-day NYSE closures for a year (regular rules, no one-off closures)."""
+    holidays = {
+        _nth_weekday(year, 1, 0, 3): "Martin Luther King Jr. Day",
+        _nth_weekday(year, 2, 0, 3): "Washington's Birthday",
+        _easter(year) - timedelta(days=2): "Good Friday",
+        _nth_weekday(year, 5, 0, -1): "Memorial Day",
+        _observed(Date(year, 7, 4)): "Independence Day",
+        _nth_weekday(year, 9, 0, 1): "Labor Day",
+        _nth_weekday(year, 11, 3, 4): "Thanksgiving Day",
+        _observed(Date(year, 12, 25)): "Christmas Day",
+    }
+    # 元旦落在週六時不補假（前一天是上一年的最後交易日）
+    new_year = Date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays[_observed(new_year)] = "New Year's Day"
+    if year >= 2022:
+        holidays[_observed(Date(year, 6, 19))] = "Juneteenth"
+    return holidays
+
+@lru_cache(maxsize=64)
+def nyse_early_closes(year: int) -> Dict[Date, str]:
+    """Days the regular session ends at 13:00."""
+    candidates = {
+        Date(year, 7, 3): "Independence Day eve",
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1): "Day after Thanksgiving",
+        Date(year, 12, 24): "Christmas Eve",
+    }
+    holidays = nyse_holidays(year)
+    return {day: name for day, name in candidates.items() if day.weekday() < 5 and day not in holidays}
+
+def _as_date(day) -> Date:
+    return Date.fromisoformat(day) if isinstance(day, str) else day
+
+def is_trading_day(day) -> bool:
+    day = _as_date(day)
+    return day.weekday() < 5 and day not in nyse_holidays(day.year)
+
+def previous_trading_day(day) -> Date:
+    day = _as_date(day) - timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+def session_bounds(day, session: str = "extended") -> Tuple[datetime, datetime]:
+    """
+    Timezone-aware (start, end) of a session on `day`, with early closes applied.
+    Non-trading days still get the nominal times, so callers can window a calendar day.
+    """
+    day = _as_date(day)
+    start, end = SESSIONS[session]
+    if day in nyse_early_closes(day.year):
+        if session == "regular":
+            end = EARLY_CLOSE
+        elif session == "post":
+            start, end = EARLY_CLOSE, EARLY_CLOSE_POST_END
+        elif session == "extended":
+            end = EARLY_CLOSE_POST_END
+    return (datetime.combine(day, start, tzinfo=MARKET_TZ), datetime.combine(day, end, tzinfo=MARKET_TZ))
+
+def session_of(moment: datetime) -> Optional[str]:
+    """'pre', 'regular' or 'post' for an aware datetime, None outside trading hours."""
+    local = moment.astimezone(MARKET_TZ)
+    if not is_trading_day(local.date()):
+        return None
+    for session in ["pre", "regular", "post"]:
+        start, end = session_bounds(local.date(), session)
+        if start <= local < end:
+            return session
+    return None
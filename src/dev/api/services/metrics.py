@@ -0,0 +1,211 @@
+# metrics.py
+
+import bisect
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 每個請求按階段累計的耗時（秒），由 MetricsMiddleware 在請求開始時建立
+_request_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_phases", default=None)
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+SIZE_BUCKETS = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+# 設為 1 時所有響應都帶 Server-Timing；否則只有帶 X-Server-Timing: 1 請求頭的請求才有
+SERVER_TIMING_ALWAYS = os.getenv("SERVER_TIMING", "0") == "1"
+# 以此比例抽樣請求做 cProfile（0 關閉），結果交給 profile hook
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR")
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition format, keyed by label set."""
+
+    def __init__(self, name: str, help_text: str, buckets: List[float]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series: Dict[Tuple[Tuple[str, str], ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            # [每個桶的計數..., +Inf 計數, 總和]
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(key, list(series)) for key, series in sorted(self._series.items())]
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip([*self.buckets, "+Inf"], series[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{_format_labels(key)} {value}" for key, value in items]
+        return lines
+
+class MetricsRegistry:
+    """Request, phase and cache metrics for the API, rendered for Prometheus on /metrics."""
+
+    def __init__(self):
+        self.requests = Counter("api_requests_total", "HTTP requests by route, method and status.")
+        self.latency = Histogram("api_request_duration_seconds", "Request latency by route.", LATENCY_BUCKETS)
+        self.response_size = Histogram("api_response_size_bytes", "Response body size by route.", SIZE_BUCKETS)
+        self.phase_time = Histogram("api_phase_duration_seconds", "Time spent per request phase (db, serialize, chart).", LATENCY_BUCKETS)
+        self._caches: Dict[str, Any] = {}
+        self._started_at = time.time()
+
+    def register_cache(self, name: str, cache: Any) -> None:
+        """Registers an object exposing `hits` / `misses` counters (DocumentCache, LeaderboardCache)."""
+        self._caches[name] = cache
+
+    def render(self) -> str:
+        lines = []
+        for metric in [self.requests, self.latency, self.response_size, self.phase_time]:
+            lines += metric.render()
+
+        lines += ["# HELP api_cache_hits_total Cache hits.", "# TYPE api_cache_hits_total counter"]
+        lines += [f'api_cache_hits_total{{cache="{name}"}} {cache.hits}' for name, cache in self._caches.items()]
+        lines += ["# HELP api_cache_misses_total Cache misses.", "# TYPE api_cache_misses_total counter"]
+        lines += [f'api_cache_misses_total{{cache="{name}"}} {cache.misses}' for name, cache in self._caches.items()]
+        lines += ["# HELP api_cache_hit_ratio Hits / (hits + misses) since start.", "# TYPE api_cache_hit_ratio gauge"]
+        for name, cache in self._caches.items():
+            total = cache.hits + cache.misses
+            lines.append(f'api_cache_hit_ratio{{cache="{name}"}} {cache.hits / total if total else 0.0}')
+
+        lines += ["# HELP api_uptime_seconds Seconds since the process started.", "# TYPE api_uptime_seconds gauge",
+                  f"api_uptime_seconds {time.time() - self._started_at}"]
+        return "\n".join(lines) + "\n"
+
+metrics_registry = MetricsRegistry()
+
+@contextmanager
+def timed(phase: str):
+    """Adds the elapsed time of the block to the current request's `phase` total."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics_registry.phase_time.observe(elapsed, phase=phase)
+        phases = _request_phases.get()
+        if phases is not None:
+            phases[phase] = phases.get(phase, 0.0) + elapsed
+
+def print_profile(route: str, stats: pstats.Stats) -> None:
+    """Default profile hook: writes the profile to PROFILE_DIR, or prints the top entries."""
+    if PROFILE_DIR:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stats.dump_stats(os.path.join(PROFILE_DIR, f"{route.strip('/').replace('/', '_') or 'root'}-{time.time():.0f}.prof"))
+        return
+    out = io.StringIO()
+    stats.stream = out
+    stats.sort_stats("cumulative").print_stats(20)
+    print(f"📈 profile {route}\n{out.getvalue()}")
+
+def _route_path(scope: Dict[str, Any]) -> str:
+    # 使用路由模板而不是實際路徑，避免每個代碼產生一個時間序列
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route counts, latency, response size and the
+    per-phase breakdown collected through `timed()`. Optionally adds a Server-Timing
+    header and profiles a random sample of requests.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics_registry,
+                 server_timing: bool = SERVER_TIMING_ALWAYS, profile_sample_rate: float = PROFILE_SAMPLE_RATE,
+                 profile_hook: Callable[[str, pstats.Stats], None] = print_profile):
+        self.app = app
+        self.registry = registry
+        self.server_timing = server_timing
+        self.profile_sample_rate = profile_sample_rate
+        self.profile_hook = profile_hook
+        self._profiling = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        phases: Dict[str, float] = {}
+        token = _request_phases.set(phases)
+        start = time.perf_counter()
+        status = 500
+        size = 0
+        want_timing = self.server_timing or (b"x-server-timing", b"1") in scope.get("headers", [])
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if want_timing:
+                    entries = [f"{name};dur={value * 1000:.2f}" for name, value in phases.items()]
+                    entries.append(f"app;dur={(time.perf_counter() - start) * 1000:.2f}")
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", ", ".join(entries).encode("latin-1"))]}
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        # cProfile 不能嵌套，同一時間只抽樣一個請求（期間事件循環上的其他任務也會被記錄）
+        profiler = None
+        if self.profile_sample_rate and not self._profiling and random.random() < self.profile_sample_rate:
+            self._profiling = True
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = _route_path(scope)
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = False
+                self.profile_hook(route, pstats.Stats(profiler))
+            _request_phases.reset(token)
+
+            registry = self.registry
+            registry.requests.inc(route=route, method=scope["method"], status=str(status))
+            registry.latency.observe(elapsed, route=route)
+            registry.response_size.observe(size, route=route)
@@ -0,0 +1,153 @@
+# news_store.py
+
+import hmac
+import os
+import uuid as uuid_module
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pydantic import BaseModel
+from pymongo import ReturnDocument, UpdateOne
+
+from api.services.http_cache import NEWS_UPDATED_FIELD
+from api.services.market_calendar import MARKET_TZ
+
+# 新聞寫入 / 刪除所需的密碼（未設置時拒絕所有寫入）
+NEWS_ADMIN_PASSWORD = os.getenv("NEWS_ADMIN_PASSWORD")
+MAX_NEWS_BATCH = 50
+MAX_NEWS_LENGTH = 20000
+
+# 由新聞內容推導 uuid 的命名空間：客戶端重試同一條新聞時得到相同的 uuid
+NEWS_NAMESPACE = uuid_module.UUID("6f1c4a52-3d0e-4b8f-9a57-1d2f0c9e8b41")
+
+class NewsItemIn(BaseModel):
+    summary: str
+    uuid: Optional[str] = None
+    timestamp: Optional[str] = None
+
+class AddNewsRequest(BaseModel):
+    """`news` 為單條新聞（NewsInputCard）；`items` 可一次提交多條"""
+    password: str
+    target_document_id: str
+    news: Optional[str] = None
+    uuid: Optional[str] = None
+    items: List[NewsItemIn] = []
+
+class DeleteNewsRequest(BaseModel):
+    """路徑中的 uuid 之外，`uuids` 可一次刪除多條"""
+    password: str
+    target_document_id: str
+    uuids: List[str] = []
+
+class NewsWriteError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+def check_password(password: str) -> None:
+    if not NEWS_ADMIN_PASSWORD:
+        raise NewsWriteError(503, "服務器未設置新聞管理密碼")
+    if not hmac.compare_digest(password.encode("utf-8"), NEWS_ADMIN_PASSWORD.encode("utf-8")):
+        raise NewsWriteError(403, "密碼錯誤")
+
+def document_object_id(target_document_id: str) -> ObjectId:
+    try:
+        return ObjectId(target_document_id)
+    except (InvalidId, TypeError):
+        raise NewsWriteError(400, f"無效的文檔 ID: {target_document_id}")
+
+def news_entries(request: AddNewsRequest) -> List[Dict[str, str]]:
+    """
+    Normalizes the submitted news into raw_news entries ({summary, timestamp, uuid}).
+    Entries without a uuid get one derived from the document id and the text, so a
+    retried submission is recognized as a duplicate.
+    """
+    items = list(request.items)
+    if request.news is not None:
+        items.insert(0, NewsItemIn(summary=request.news, uuid=request.uuid))
+    if not items:
+        raise NewsWriteError(400, "請提供新聞內容")
+    if len(items) > MAX_NEWS_BATCH:
+        raise NewsWriteError(400, f"每次最多提交 {MAX_NEWS_BATCH} 條新聞")
+
+    now = datetime.now(MARKET_TZ).strftime("%Y-%m-%d %H:%M:%S")
+    entries: Dict[str, Dict[str, str]] = {}
+    for item in items:
+        summary = item.summary.strip()
+        if not summary:
+            raise NewsWriteError(400, "新聞內容不能為空")
+        if len(summary) > MAX_NEWS_LENGTH:
+            raise NewsWriteError(400, f"新聞內容不能超過 {MAX_NEWS_LENGTH} 個字符")
+        identifier = item.uuid or str(uuid_module.uuid5(NEWS_NAMESPACE, f"{request.target_document_id}\0{summary}"))
+        entries.setdefault(identifier, {"summary": summary, "timestamp": item.timestamp or now, "uuid": identifier})
+    return list(entries.values())
+
+class NewsStore:
+    """
+    Adds and removes raw_news entries of one fundamentals document.
+    Every entry is pushed with its own update guarded by `raw_news.uuid: {$ne: uuid}`
+    (sent together as one unordered bulk write), so resubmitting an entry never
+    duplicates it; deletes are a single $pull. Each call returns the document's news
+    array and today_date so the caller can invalidate exactly that cached detail.
+    """
+
+    def __init__(self, mongo_db, collection: str):
+        self.mongo_db = mongo_db
+        self.collection = collection
+
+    def _filter(self, symbol: str, target_document_id: str) -> Dict[str, Any]:
+        return {"_id": document_object_id(target_document_id), "symbol": symbol.upper()}
+
+    async def _news(self, query: Dict[str, Any]) -> Dict[str, Any]:
+        document = await self.mongo_db.find_one(self.collection, query, {"raw_news": 1, "today_date": 1})
+        if document is None:
+            raise NewsWriteError(404, "找不到目標文檔")
+        return document
+
+    async def add(self, symbol: str, request: AddNewsRequest) -> Dict[str, Any]:
+        check_password(request.password)
+        query = self._filter(symbol, request.target_document_id)
+        entries = news_entries(request)
+
+        now = datetime.now(MARKET_TZ)
+        operations = [
+            UpdateOne(
+                {**query, "raw_news.uuid": {"$ne": entry["uuid"]}},
+                {"$push": {"raw_news": entry}, "$set": {NEWS_UPDATED_FIELD: now}}
+            )
+            for entry in entries
+        ]
+        result = await self.mongo_db.run(self.mongo_db.db[self.collection].bulk_write, operations, ordered=False)
+        document = await self._news(query)
+        return {
+            "today_date": document.get("today_date"),
+            "added": result.modified_count,
+            "raw_news": document.get("raw_news") or [],
+        }
+
+    async def delete(self, symbol: str, uuids: List[str], request: DeleteNewsRequest) -> Dict[str, Any]:
+        check_password(request.password)
+        query = self._filter(symbol, request.target_document_id)
+        uuids = list(dict.fromkeys(uuids))
+        if len(uuids) > MAX_NEWS_BATCH:
+            raise NewsWriteError(400, f"每次最多刪除 {MAX_NEWS_BATCH} 條新聞")
+
+        before = await self.mongo_db.run(
+            self.mongo_db.db[self.collection].find_one_and_update,
+            query,
+            {"$pull": {"raw_news": {"uuid": {"$in": uuids}}}, "$set": {NEWS_UPDATED_FIELD: datetime.now(MARKET_TZ)}},
+            projection={"raw_news": 1, "today_date": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        if before is None:
+            raise NewsWriteError(404, "找不到目標文檔")
+        existing = before.get("raw_news") or []
+        remaining = [entry for entry in existing if entry.get("uuid") not in uuids]
+        return {
+            "today_date": before.get("today_date"),
+            "deleted": len(existing) - len(remaining),
+            "raw_news": remaining,
+        }
@@ -0,0 +1,42 @@
+# pagination.py
+
+import base64
+from typing import Any, Dict, List, Optional
+
+from bson import json_util
+
+# 列表的穩定排序鍵：日期由新到舊，同日按代碼，最後以 _id 打破平手
+STOCK_LIST_SORT = {"today_date": -1, "symbol": 1, "_id": 1}
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """Opaque cursor pointing just after `row` in STOCK_LIST_SORT order."""
+    raw = json_util.dumps([row.get("today_date"), row.get("symbol"), row.get("_id")])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except Exception as e:
+        raise ValueError(f"無效的分頁游標: {e}")
+    if not isinstance(values, list) or len(values) != 3:
+        raise ValueError("無效的分頁游標")
+    return values
+
+def keyset_match(cursor: Optional[str]) -> Dict[str, Any]:
+    """$match condition selecting the rows strictly after the cursor position."""
+    if not cursor:
+        return {}
+    today_date, symbol, _id = decode_cursor(cursor)
+    return {"$or": [
+        {"today_date": {"$lt": today_date}},
+        {"today_date": today_date, "symbol": {"$gt": symbol}},
+        {"today_date": today_date, "symbol": symbol, "_id": {"$gt": _id}},
+    ]}
+
+def next_cursor(rows: List[Dict[str, Any]], limit: int) -> Optional[str]:
+    """Cursor for the following page, or None when this page was the last one."""
+    if len(rows) < limit or not rows:
+        return None
+    return encode_cursor(rows[-1])
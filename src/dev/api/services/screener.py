@@ -0,0 +1,234 @@
+# screener.py
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from api.services.document_cache import DocumentCache
+from api.services.leaderboard import LIST_PROJECTION, TOP_MOVER_SORT_FIELDS
+from api.services.market_calendar import is_past_date
+
+# 可篩選字段 -> (存儲路徑, 類型)
+SCREEN_FIELDS = {
+    "close_change_percentage": ("close_change_percentage", "number"),
+    "high_change_percentage": ("high_change_percentage", "number"),
+    "day_close": ("day_close", "number"),
+    "market_cap_float": ("market_cap_float", "number"),
+    "hype_score": ("hype_score", "number"),
+    "squeeze_score": ("squeeze_score", "number"),
+    "cash": ("cash", "number"),
+    "debt": ("debt", "number"),
+    "float_risk": ("float_risk", "string"),
+    "atm_urgency": ("atm_urgency", "string"),
+    "sector": ("company_info.sector", "string"),
+}
+
+# 比較運算符 -> MongoDB 運算符（eq 直接寫值，between 展開為 $gte/$lte）
+SCREEN_OPERATORS = {
+    "eq": None, "ne": "$ne", "gt": "$gt", "gte": "$gte", "lt": "$lt", "lte": "$lte",
+    "in": "$in", "nin": "$nin", "between": None, "exists": "$exists",
+}
+
+MAX_CONDITIONS = 32
+MAX_DEPTH = 4
+MAX_IN_VALUES = 100
+SCREEN_MAX_LIMIT = 500
+
+# 結果行：列表字段加上所有可篩選字段
+SCREEN_PROJECTION = {
+    **LIST_PROJECTION,
+    **{name: 1 for name, (path, _) in SCREEN_FIELDS.items() if name not in LIST_PROJECTION and path == name},
+}
+
+SAVED_SCREENS_COLLECTION = "saved_screens"
+
+class ScreenRequest(BaseModel):
+    """
+    篩選條件，例如:
+    {"filter": {"and": [{"field": "hype_score", "op": "gte", "value": 3},
+                        {"or": [{"field": "float_risk", "op": "in", "value": ["High", "Medium"]},
+                                {"field": "market_cap_float", "op": "lt", "value": 50000000}]}]},
+     "sort": ["-squeeze_score", "symbol"], "limit": 50}
+    """
+    filter: Optional[Dict[str, Any]] = None
+    sort: List[str] = []
+    limit: int = 100
+
+def _check_value(field: str, kind: str, value: Any) -> None:
+    if kind == "number":
+        valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+    else:
+        valid = isinstance(value, str)
+    if not valid:
+        raise ValueError(f"字段 {field} 的值必須是{'數字' if kind == 'number' else '字符串'}")
+
+def _compile_condition(node: Dict[str, Any]) -> Dict[str, Any]:
+    field, op, value = node.get("field"), node.get("op", "eq"), node.get("value")
+    if field not in SCREEN_FIELDS:
+        raise ValueError(f"不支持的篩選字段: {field}（可用: {', '.join(SCREEN_FIELDS)}）")
+    if op not in SCREEN_OPERATORS:
+        raise ValueError(f"不支持的運算符: {op}（可用: {', '.join(SCREEN_OPERATORS)}）")
+    path, kind = SCREEN_FIELDS[field]
+
+    if op == "exists":
+        if not isinstance(value, bool):
+            raise ValueError("exists 的值必須是 true 或 false")
+        return {path: {"$exists": value}}
+    if op in ["in", "nin"]:
+        if not isinstance(value, list) or not value or len(value) > MAX_IN_VALUES:
+            raise ValueError(f"{op} 的值必須是 1 至 {MAX_IN_VALUES} 個元素的數組")
+        for item in value:
+            _check_value(field, kind, item)
+        return {path: {SCREEN_OPERATORS[op]: value}}
+    if op == "between":
+        if not isinstance(value, list) or len(value) != 2:
+            raise ValueError("between 的值必須是 [下限, 上限]")
+        for item in value:
+            _check_value(field, kind, item)
+        return {path: {"$gte": value[0], "$lte": value[1]}}
+
+    _check_value(field, kind, value)
+    if kind == "string" and op not in ["eq", "ne"]:
+        raise ValueError(f"字段 {field} 只支持 eq, ne, in, nin, exists")
+    return {path: value} if op == "eq" else {path: {SCREEN_OPERATORS[op]: value}}
+
+def compile_filter(node: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compiles a filter expression ({"and": [...]}, {"or": [...]}, {"not": {...}} or a
+    {"field", "op", "value"} condition) into a $match document over whitelisted fields.
+    Raises ValueError for anything else.
+    """
+    if not node:
+        return {}
+    count = 0
+
+    def walk(node, depth):
+        nonlocal count
+        if not isinstance(node, dict):
+            raise ValueError("篩選條件必須是對象")
+        if depth > MAX_DEPTH:
+            raise ValueError(f"篩選條件嵌套不能超過 {MAX_DEPTH} 層")
+        for key in ["and", "or"]:
+            if key in node:
+                children = node[key]
+                if len(node) != 1 or not isinstance(children, list) or not children:
+                    raise ValueError(f"{key} 必須是非空數組且不能與其他鍵並列")
+                compiled = [walk(child, depth + 1) for child in children]
+                return compiled[0] if len(compiled) == 1 else {f"${key}": compiled}
+        if "not" in node:
+            if len(node) != 1:
+                raise ValueError("not 不能與其他鍵並列")
+            return {"$nor": [walk(node["not"], depth + 1)]}
+        count += 1
+        if count > MAX_CONDITIONS:
+            raise ValueError(f"篩選條件不能超過 {MAX_CONDITIONS} 個")
+        return _compile_condition(node)
+
+    return walk(node, 1)
+
+def compile_sort(sort: List[str]) -> List[Tuple[str, int]]:
+    """["-hype_score", "symbol"] -> [("hype_score", -1), ("symbol", 1)]; defaults to the day-list order."""
+    keys = []
+    for item in sort or ["-close_change_percentage"]:
+        name = item.lstrip("+-")
+        if name != "symbol" and name not in SCREEN_FIELDS:
+            raise ValueError(f"不支持的排序字段: {name}")
+        path = name if name == "symbol" else SCREEN_FIELDS[name][0]
+        keys.append((path, -1 if item.startswith("-") else 1))
+    if len(keys) > 3:
+        raise ValueError("最多 3 個排序字段")
+    return keys
+
+def screen_pipeline(request: ScreenRequest, date: str) -> List[Dict[str, Any]]:
+    """
+    Aggregation for a screen on one trading date. The $match always starts with the
+    today_date equality, so every screen is answered from the today_date_* indexes; a
+    single descending sort on close/high_change_percentage is served by the index
+    order, any other sort is a top-k sort over that day's documents.
+    """
+    if not 1 <= request.limit <= SCREEN_MAX_LIMIT:
+        raise ValueError(f"limit 必須在 1 至 {SCREEN_MAX_LIMIT} 之間")
+    condition = compile_filter(request.filter)
+    sort = compile_sort(request.sort)
+    index_sorted = len(sort) == 1 and sort[0][0] in TOP_MOVER_SORT_FIELDS and sort[0][1] == -1
+    if not index_sorted and all(path != "symbol" for path, _ in sort):
+        sort.append(("symbol", 1))   # 同值時按代碼排序，結果穩定
+    match: Dict[str, Any] = {"today_date": date}
+    if condition:
+        match["$and"] = condition["$and"] if list(condition) == ["$and"] else [condition]
+    return [
+        {"$match": match},
+        {"$sort": dict(sort)},
+        {"$limit": request.limit},
+        {"$project": SCREEN_PROJECTION},
+    ]
+
+def screen_definition(request: ScreenRequest) -> Dict[str, Any]:
+    return {"filter": request.filter, "sort": request.sort, "limit": request.limit}
+
+def screen_id(request: ScreenRequest) -> str:
+    """Stable hash of a screen definition (key order does not matter)."""
+    canonical = json.dumps(screen_definition(request), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+class ScreenEngine:
+    """
+    Runs screens through AsyncMongoHandler and caches the rows per (screen id, date):
+    past dates stay cached for an hour, the current date for a few seconds. Saved
+    screens are stored once per hash in `saved_collection`.
+    """
+
+    def __init__(self, mongo_db, collection: str, saved_collection: str = SAVED_SCREENS_COLLECTION,
+                 shared=None):
+        self.mongo_db = mongo_db
+        self.collection = collection
+        self.saved_collection = saved_collection
+        self.results = DocumentCache(max_entries=256, shared=shared)
+        self._saved: Dict[str, ScreenRequest] = {}
+
+    @property
+    def hits(self) -> int:
+        return self.results.hits
+
+    @property
+    def misses(self) -> int:
+        return self.results.misses
+
+    async def run(self, request: ScreenRequest, date: str) -> List[Dict[str, Any]]:
+        pipeline = screen_pipeline(request, date)   # 先校驗，無效條件不進入緩存
+        return await self.results.get_or_load(
+            (screen_id(request), date),
+            lambda: self.mongo_db.aggregate(self.collection, pipeline),
+            immutable=is_past_date(date)
+        )
+
+    async def save(self, request: ScreenRequest) -> str:
+        screen_pipeline(request, "")   # 只保存可編譯的條件
+        identifier = screen_id(request)
+        if identifier not in self._saved:
+            await self.mongo_db.run(
+                self.mongo_db.db[self.saved_collection].update_one,
+                {"_id": identifier},
+                {"$setOnInsert": {**screen_definition(request), "created_at": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+            self._saved[identifier] = request
+        return identifier
+
+    async def load(self, identifier: str) -> Optional[ScreenRequest]:
+        request = self._saved.get(identifier)
+        if request is None:
+            document = await self.mongo_db.find_one(self.saved_collection, {"_id": identifier})
+            if document is None:
+                return None
+            request = self._saved[identifier] = ScreenRequest(
+                filter=document.get("filter"), sort=document.get("sort") or [], limit=document.get("limit", 100)
+            )
+        return request
+
+    def invalidate(self) -> None:
+        self.results.invalidate()
+        self._saved.clear()
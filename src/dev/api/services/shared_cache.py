@@ -0,0 +1,266 @@
+# shared_cache.py
+
+import asyncio
+import json
+import os
+import re
+import socket
+import struct
+import time
+import uuid
+from typing import Any, Callable, Hashable, List, Optional
+
+import bson
+
+from api.services.document_cache import MISSING
+
+# 跨 worker 共享的讀緩存：
+#   local                         每個進程只用自己的內存緩存（默認）
+#   lmdb:///var/cache/stocks      同一主機上的 LMDB 文件
+#   shm://stocks                  /dev/shm 下的 LMDB 文件（共享內存）
+#   redis://host:6379/0           多台主機共用的 Redis
+#   fakeredis://                  測試用的進程內 Redis 替身（需要 fakeredis）
+SHARED_CACHE_URL = os.getenv("SHARED_CACHE_URL", "local")
+LMDB_MAP_SIZE = int(os.getenv("SHARED_CACHE_LMDB_MAP_SIZE", str(1 << 30)))
+
+_EXPIRY = struct.Struct("<d")
+
+def encode_value(value: Any) -> bytes:
+    """BSON keeps ObjectId / datetime values of cached documents intact."""
+    return bson.encode({"v": value})
+
+def decode_value(data: bytes) -> Any:
+    return bson.decode(data)["v"]
+
+class LmdbBackend:
+    """
+    One LMDB environment shared by every worker on the host. Values are prefixed with
+    their expiry time; the file only needs to survive process restarts, so writes
+    skip fsync. When the map is full every entry is dropped.
+    """
+
+    name = "lmdb"
+
+    def __init__(self, path: str, map_size: int = LMDB_MAP_SIZE):
+        try:
+            import lmdb
+        except ImportError:
+            raise RuntimeError("共享緩存使用 LMDB 需要安裝 lmdb: pip install lmdb")
+        self._lmdb = lmdb
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.map_size = map_size
+        self._env = None
+
+    @property
+    def env(self):
+        # 延遲打開，close() 之後（例如應用重新啟動 lifespan）可再次使用
+        if self._env is None:
+            self._env = self._lmdb.open(self.path, map_size=self.map_size, max_readers=512,
+                                        sync=False, metasync=False)
+        return self._env
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with self.env.begin(buffers=True) as txn:
+            data = txn.get(key.encode("utf-8"))
+            if data is None or _EXPIRY.unpack_from(data)[0] <= time.time():
+                return None
+            return bytes(data[_EXPIRY.size:])
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        record = _EXPIRY.pack(time.time() + ttl) + value
+        try:
+            with self.env.begin(write=True) as txn:
+                txn.put(key.encode("utf-8"), record)
+        except self._lmdb.MapFullError:
+            with self.env.begin(write=True) as txn:
+                txn.drop(self.env.open_db(), delete=False)
+                txn.put(key.encode("utf-8"), record)
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Stores `value` unless an unexpired entry holding something else exists."""
+        with self.env.begin(write=True) as txn:
+            current = txn.get(key.encode("utf-8"))
+            if current is not None and _EXPIRY.unpack_from(current)[0] > time.time() \
+                    and current[_EXPIRY.size:] != value:
+                return False
+            txn.put(key.encode("utf-8"), _EXPIRY.pack(time.time() + ttl) + value)
+            return True
+
+    async def keys(self, prefix: str) -> List[str]:
+        start = prefix.encode("utf-8")
+        found = []
+        with self.env.begin() as txn:
+            cursor = txn.cursor()
+            if cursor.set_range(start):
+                for key in cursor.iternext(values=False):
+                    if not key.startswith(start):
+                        break
+                    found.append(key.decode("utf-8"))
+        return found
+
+    async def delete(self, keys: List[str]) -> None:
+        with self.env.begin(write=True) as txn:
+            for key in keys:
+                txn.delete(key.encode("utf-8"))
+
+    async def close(self) -> None:
+        if self._env is not None:
+            self._env.close()
+            self._env = None
+
+class RedisBackend:
+    """Redis (or fakeredis) through redis.asyncio; one client per event loop."""
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        self.url = url
+        if url.startswith("fakeredis://"):
+            try:
+                import fakeredis
+            except ImportError:
+                raise RuntimeError("fakeredis:// 需要安裝 fakeredis: pip install fakeredis")
+            server = fakeredis.FakeServer()
+            self._factory = lambda: fakeredis.FakeAsyncRedis(server=server)
+        else:
+            try:
+                from redis.asyncio import Redis
+            except ImportError:
+                raise RuntimeError("共享緩存使用 Redis 需要安裝 redis: pip install redis")
+            self._factory = lambda: Redis.from_url(url)
+        self._client = None
+        self._client_loop = None
+
+    def _redis(self):
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = self._factory()
+            self._client_loop = loop
+        return self._client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis().get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._redis().set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        client = self._redis()
+        if await client.set(key, value, px=max(1, int(ttl * 1000)), nx=True):
+            return True
+        if await client.get(key) == value:
+            return bool(await client.pexpire(key, max(1, int(ttl * 1000))))
+        return False
+
+    async def keys(self, prefix: str) -> List[str]:
+        pattern = re.sub(r"([\\*?\[\]])", r"\\\1", prefix) + "*"
+        return [key.decode("utf-8") async for key in self._redis().scan_iter(match=pattern, count=500)]
+
+    async def delete(self, keys: List[str]) -> None:
+        if keys:
+            await self._redis().delete(*keys)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+def open_backend(url: Optional[str] = None):
+    """Backend for SHARED_CACHE_URL, or None when every worker keeps its own caches."""
+    url = url or SHARED_CACHE_URL
+    if url == "local":
+        return None
+    scheme, _, rest = url.partition("://")
+    if scheme == "lmdb":
+        return LmdbBackend(rest)
+    if scheme == "shm":
+        return LmdbBackend(os.path.join("/dev/shm", rest or "stock-cache"))
+    if scheme in ["redis", "rediss", "unix", "fakeredis"]:
+        return RedisBackend(url)
+    raise ValueError(f"不支持的共享緩存: {url}（可用: local, lmdb://, shm://, redis://, fakeredis://）")
+
+class SharedCache:
+    """
+    Namespaced view of a backend for one cache. Keys are the cache's tuple keys as
+    JSON, values are BSON. A backend error only costs a database read, so every
+    failure is counted and reported as a miss.
+    """
+
+    def __init__(self, backend, namespace: str):
+        self.backend = backend
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{json.dumps(key, default=str, separators=(',', ':'), ensure_ascii=False)}"
+
+    async def get(self, key: Hashable) -> Any:
+        try:
+            data = await self.backend.get(self.key(key))
+        except Exception as e:
+            self._failed("讀取", e)
+            return MISSING
+        if data is None:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        return decode_value(data)
+
+    async def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        try:
+            await self.backend.set(self.key(key), encode_value(value), ttl)
+        except Exception as e:
+            self._failed("寫入", e)
+
+    async def delete_where(self, first: Optional[str] = None,
+                           predicate: Optional[Callable[[list], bool]] = None) -> int:
+        """Deletes the keys starting with `first` (all when None) that satisfy `predicate`."""
+        prefix = f"{self.namespace}:"
+        if first is not None:
+            prefix += json.dumps([first], ensure_ascii=False)[:-1] + ","
+        try:
+            keys = await self.backend.keys(prefix)
+            if predicate is not None:
+                keys = [key for key in keys if predicate(json.loads(key[len(self.namespace) + 1:]))]
+            await self.backend.delete(keys)
+            return len(keys)
+        except Exception as e:
+            self._failed("刪除", e)
+            return 0
+
+    def _failed(self, action: str, error: Exception) -> None:
+        self.errors += 1
+        if self.errors == 1 or self.errors % 1000 == 0:
+            print(f"警告: 共享緩存{action}失敗（{self.backend.name}）: {error}")
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+class SharedLease:
+    """
+    Lets one worker of the deployment run a background job. `held()` acquires or
+    renews the lease and must be called more often than `ttl`; if the holder dies
+    the lease expires and another worker takes over. Without a backend every
+    worker holds it.
+    """
+
+    def __init__(self, backend, name: str, ttl: float = 30.0):
+        self.backend = backend
+        self.key = f"lease:{name}"
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}".encode("utf-8")
+        self.holding = backend is None
+
+    async def held(self) -> bool:
+        if self.backend is None:
+            return True
+        try:
+            self.holding = await self.backend.add(self.key, self.owner, self.ttl)
+        except Exception as e:
+            # 後端不可用時各 worker 各自執行，重複計算但結果不受影響
+            print(f"警告: 無法續期 {self.key}: {e}")
+            self.holding = True
+        return self.holding
@@ -0,0 +1,320 @@
+# signal_engine.py
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+
+from api.services.chart_window import data_times, to_data_time
+from api.services.document_cache import DocumentCache
+from api.services.fastapi_utils import chart_frame
+from api.services.lazy_import import lazy_module
+from api.services.market_calendar import is_past_date, session_bounds
+from api.services.metrics import timed
+from api.services.strategy_catalog import STRATEGY_BASE_PATH
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+# 規則參數覆蓋文件（可選），格式: {"Gap and Crap": {"min_gap": 0.15}, "VWAP Rejection Short": {"enabled": false}}
+SIGNAL_RULES_FILE = "signal_rules.json"
+SIGNALS_COLLECTION = "strategy_signals"
+
+# 計算進程數；0 表示在線程池中計算（調試 / 單核機器）
+SIGNAL_WORKERS = int(os.getenv("SIGNAL_WORKERS", str(min(4, os.cpu_count() or 1))))
+# 每個進程任務處理的代碼數
+SIGNAL_CHUNK = 25
+SIGNAL_QUERY_TIMEOUT_MS = 60000
+
+# 每個代碼計算信號所需的字段；優先使用 1m 數據，沒有時用 5m
+SIGNAL_PROJECTION = {
+    "_id": 0, "symbol": 1, "yesterday_close": 1, "market_open_high": 1, "market_open_low": 1, "key_levels": 1,
+    "bars": {"$ifNull": ["$1m_chart_data", "$5m_chart_data"]},
+}
+
+def bar_arrays(bars: Any) -> Dict[str, np.ndarray]:
+    """Stored bars (list of dicts or a chart frame) -> time-sorted column arrays t/o/h/l/c/v."""
+    df = bars if isinstance(bars, pd.DataFrame) else chart_frame(bars or [])
+    df = df.assign(datetime=data_times(df)).sort_values('datetime', kind='stable')
+    return {
+        "t": df['datetime'].to_numpy(dtype='datetime64[ms]'),
+        "o": df['open'].to_numpy(dtype='float64'),
+        "h": df['high'].to_numpy(dtype='float64'),
+        "l": df['low'].to_numpy(dtype='float64'),
+        "c": df['close'].to_numpy(dtype='float64'),
+        "v": df['volume'].to_numpy(dtype='float64'),
+    }
+
+def session_slice(bars: Dict[str, np.ndarray], date: str, session: str = "regular") -> Dict[str, np.ndarray]:
+    start, end = session_bounds(date, session)
+    lo, hi = np.searchsorted(bars["t"], [np.datetime64(to_data_time(start), 'ms'), np.datetime64(to_data_time(end), 'ms')])
+    return {key: values[lo:hi] for key, values in bars.items()}
+
+def _number(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) and value == value else None
+
+def _levels(document: Dict[str, Any]) -> np.ndarray:
+    levels = [_number(level) for level in document.get("key_levels") or []]
+    return np.sort(np.array([level for level in levels if level], dtype='float64'))
+
+def _level_above(levels: np.ndarray, price: float) -> Optional[float]:
+    index = np.searchsorted(levels, price, side='right')
+    return float(levels[index]) if index < len(levels) else None
+
+def _level_below(levels: np.ndarray, price: float) -> Optional[float]:
+    index = np.searchsorted(levels, price, side='left')
+    return float(levels[index - 1]) if index > 0 else None
+
+def _signal(bars: Dict[str, np.ndarray], index: int, **details) -> Dict[str, Any]:
+    return {
+        "time": np.datetime_as_string(bars["t"][index], unit='s'),
+        "price": round(float(bars["c"][index]), 4),
+        **{key: (round(value, 4) if isinstance(value, float) else value) for key, value in details.items()},
+    }
+
+def gap_and_fade(bars, document, date, min_gap=0.1, fade=0.05, within_minutes=90):
+    """
+    Gap up of at least `min_gap` over yesterday's close that fails: the first regular-session
+    close below the opening range low (market_open_low) or `fade` below the open.
+    """
+    regular = session_slice(bars, date)
+    yesterday_close = _number(document.get("yesterday_close"))
+    if len(regular["c"]) < 2 or not yesterday_close:
+        return None
+    day_open = regular["o"][0]
+    gap = day_open / yesterday_close - 1
+    if gap < min_gap:
+        return None
+
+    trigger = day_open * (1 - fade)
+    open_low = _number(document.get("market_open_low"))
+    if open_low and open_low < day_open:
+        trigger = max(trigger, open_low)
+    window = regular["c"][:within_minutes]
+    hits = np.flatnonzero(window < trigger)
+    if not hits.size:
+        return None
+    index = int(hits[0])
+    return _signal(
+        regular, index, gap=float(gap), open=float(day_open), trigger=float(trigger),
+        high_before=float(regular["h"][:index + 1].max()),
+        target=_level_below(_levels(document), float(regular["c"][index]))
+    )
+
+def vwap_rejection(bars, document, date, tolerance=0.002, skip_minutes=5):
+    """
+    Bar trading below the session VWAP that opens below it, pokes up to within
+    `tolerance` of it and closes back below, after the previous bar also closed below.
+    """
+    regular = session_slice(bars, date)
+    if len(regular["c"]) <= skip_minutes + 1:
+        return None
+    o, h, l, c, v = regular["o"], regular["h"], regular["l"], regular["c"], regular["v"]
+    cumulative_volume = np.cumsum(v)
+    vwap = np.cumsum((h + l + c) / 3 * v) / np.where(cumulative_volume > 0, cumulative_volume, np.nan)
+
+    band = vwap * (1 - tolerance)
+    rejected = (o < vwap) & (h >= band) & (c < band)
+    rejected[1:] &= c[:-1] < vwap[:-1]
+    rejected[:max(skip_minutes, 1)] = False
+    hits = np.flatnonzero(rejected)
+    if not hits.size:
+        return None
+    index = int(hits[0])
+    return _signal(
+        regular, index, vwap=float(vwap[index]), high=float(h[index]),
+        touches=int(np.count_nonzero((h >= band) & (c < vwap))),
+        target=_level_below(_levels(document), float(c[index]))
+    )
+
+def opening_range_break(bars, document, date, range_minutes=5, volume_multiple=1.5):
+    """
+    First close above the opening range high (market_open_high, or the high of the first
+    `range_minutes` bars) on volume at least `volume_multiple` times the session average so far.
+    """
+    regular = session_slice(bars, date)
+    if len(regular["c"]) <= range_minutes:
+        return None
+    h, l, c, v = regular["h"], regular["l"], regular["c"], regular["v"]
+    range_high = _number(document.get("market_open_high")) or float(h[:range_minutes].max())
+    range_low = _number(document.get("market_open_low")) or float(l[:range_minutes].min())
+
+    average_volume = np.cumsum(v) / np.arange(1, len(v) + 1)
+    prior_average = np.r_[v[0], average_volume[:-1]]
+    broke = (c > range_high) & (v >= volume_multiple * prior_average)
+    broke[:range_minutes] = False
+    hits = np.flatnonzero(broke)
+    if not hits.size:
+        return None
+    index = int(hits[0])
+    return _signal(
+        regular, index, range_high=range_high, range_low=range_low,
+        volume_ratio=float(v[index] / prior_average[index]) if prior_average[index] else None,
+        target=_level_above(_levels(document), float(c[index]))
+    )
+
+class SignalRule(NamedTuple):
+    side: str
+    evaluate: Callable
+    params: Dict[str, Any]
+
+# 策略目錄名稱 -> 規則；參數可由 assets/strategies/signal_rules.json 覆蓋
+SIGNAL_RULES = {
+    "Gap and Crap": SignalRule("short", gap_and_fade, {"min_gap": 0.1, "fade": 0.05, "within_minutes": 90}),
+    "VWAP Rejection Short": SignalRule("short", vwap_rejection, {"tolerance": 0.002, "skip_minutes": 5}),
+    "Opening Range Breakout (ORB)": SignalRule("long", opening_range_break, {"range_minutes": 5, "volume_multiple": 1.5}),
+}
+
+def load_signal_rules(base_path: str = STRATEGY_BASE_PATH) -> Dict[str, SignalRule]:
+    rules = dict(SIGNAL_RULES)
+    path = os.path.join(base_path, SIGNAL_RULES_FILE)
+    if not os.path.isfile(path):
+        return rules
+    with open(path, encoding='utf-8') as f:
+        overrides = json.load(f)
+    for name, params in overrides.items():
+        if name not in rules:
+            print(f"警告: {SIGNAL_RULES_FILE} 中的策略 {name} 沒有對應的規則，已忽略")
+            continue
+        params = dict(params)
+        if not params.pop("enabled", True):
+            del rules[name]
+        else:
+            rules[name] = rules[name]._replace(params={**rules[name].params, **params})
+    return rules
+
+def rules_version(rules: Dict[str, SignalRule]) -> str:
+    """Changes whenever a rule is added, removed or re-parameterized."""
+    spec = {name: [rule.side, rule.evaluate.__name__, rule.params] for name, rule in rules.items()}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def evaluate_chunk(documents: List[Dict[str, Any]], date: str, rules: Dict[str, SignalRule]) -> Dict[str, List[Dict[str, Any]]]:
+    """Runs every rule over a chunk of documents (executed in a worker process)."""
+    matches = {name: [] for name in rules}
+    for document in documents:
+        bars = bar_arrays(document.get("bars"))
+        if not len(bars["t"]):
+            continue
+        for name, rule in rules.items():
+            signal = rule.evaluate(bars, document, date, **rule.params)
+            if signal is not None:
+                matches[name].append({"symbol": document["symbol"], **signal})
+    return matches
+
+class SignalEngine:
+    """
+    Evaluates the signal rules over every symbol of a trading date.
+    Documents are read with one query, split into chunks and evaluated on a process
+    pool; the result for a date is materialized into `signals_collection` (one document
+    per date, tagged with the rules version) and cached in memory, for the current
+    date only for `ttl` seconds since new bars keep arriving.
+    """
+
+    def __init__(self, mongo_db, collection: str, chart_store=None, signals_collection: str = SIGNALS_COLLECTION,
+                 workers: int = SIGNAL_WORKERS, ttl: float = 60.0, base_path: str = STRATEGY_BASE_PATH):
+        self.mongo_db = mongo_db
+        self.collection = collection
+        self.chart_store = chart_store
+        self.signals_collection = signals_collection
+        self.workers = workers
+        self.base_path = base_path
+        self.results = DocumentCache(max_entries=64, ttl=ttl)
+        self._rules: Optional[Dict[str, SignalRule]] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def rules(self) -> Dict[str, SignalRule]:
+        if self._rules is None:
+            self._rules = load_signal_rules(self.base_path)
+        return self._rules
+
+    @property
+    def hits(self) -> int:
+        return self.results.hits
+
+    @property
+    def misses(self) -> int:
+        return self.results.misses
+
+    async def _documents(self, date: str) -> List[Dict[str, Any]]:
+        projection = dict(SIGNAL_PROJECTION)
+        columnar = self.chart_store is not None and self.chart_store.enabled
+        if columnar and not self.chart_store.fallback:
+            del projection["bars"]
+        documents = await self.mongo_db.aggregate(
+            self.collection, [{"$match": {"today_date": date}}, {"$project": projection}],
+            timeout_ms=SIGNAL_QUERY_TIMEOUT_MS
+        )
+        if columnar:
+            # 規則需要整個交易日的K線，不按時間窗口篩選分桶
+            frames = await self.chart_store.read_frames([d["symbol"] for d in documents], date, "1m")
+            for document in documents:
+                if document["symbol"] in frames:
+                    document["bars"] = frames[document["symbol"]]
+        return documents
+
+    async def _evaluate(self, documents: List[Dict[str, Any]], date: str) -> Dict[str, List[Dict[str, Any]]]:
+        loop = asyncio.get_running_loop()
+        if self.workers > 0 and self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        chunks = [documents[i:i + SIGNAL_CHUNK] for i in range(0, len(documents), SIGNAL_CHUNK)]
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(self._pool if self.workers > 0 else None, evaluate_chunk, chunk, date, self.rules)
+            for chunk in chunks
+        ))
+        matches = {name: [] for name in self.rules}
+        for part in parts:
+            for name, rows in part.items():
+                matches[name].extend(rows)
+        for rows in matches.values():
+            rows.sort(key=lambda row: (row["time"], row["symbol"]))
+        return matches
+
+    async def _load(self, date: str) -> Dict[str, Any]:
+        version = rules_version(self.rules)
+        if is_past_date(date):
+            # 歷史日期的數據不再變化，已物化且規則未變時直接讀取
+            stored = await self.mongo_db.find_one(self.signals_collection, {"_id": date, "rules_version": version})
+            if stored is not None:
+                return stored
+
+        with timed("signals"):
+            documents = await self._documents(date)
+            result = {
+                "_id": date,
+                "rules_version": version,
+                "computed_at": datetime.now(timezone.utc),
+                "symbols": len(documents),
+                "matches": await self._evaluate(documents, date),
+            }
+        await self.mongo_db.run(
+            self.mongo_db.db[self.signals_collection].replace_one, {"_id": date}, result, upsert=True
+        )
+        return result
+
+    async def run(self, date: str) -> Dict[str, Any]:
+        """Materialized signals for a date: {"computed_at", "symbols", "matches": {strategy: [...]}}."""
+        return await self.results.get_or_load(("*", date), lambda: self._load(date), immutable=is_past_date(date))
+
+    async def matches(self, strategy: str, date: str) -> Dict[str, Any]:
+        result = await self.run(date)
+        return {
+            "computed_at": result["computed_at"],
+            "symbols": result["symbols"],
+            "data": result["matches"].get(strategy, []),
+        }
+
+    def invalidate(self) -> None:
+        self.results.invalidate()
+        self._rules = None
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,141 @@
+# strategy_catalog.py
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+STRATEGY_BASE_PATH = 'assets/strategies'
+STRATEGY_FILES = {
+    "long": 'long_strategies.json',
+    "short": 'short_strategies.json',
+}
+
+# 基本策略模型（用於列表顯示）
+class StrategyBase(BaseModel):
+    名稱: str
+    說明: str
+
+# 完整策略模型（用於詳情頁面）
+class StrategyDetail(StrategyBase):
+    簡介: Optional[str] = None
+    大機會出現時間: Optional[str] = None
+    為什麼會出現: Optional[str] = None
+    心理原因: Optional[str] = None
+    圖表型態: Optional[str] = None
+    參數說明: Optional[str] = None
+    止損設定: Optional[str] = None
+    理想風險報酬比: Optional[str] = None
+    不應進場條件: Optional[str] = None
+
+def dumps_json(data) -> bytes:
+    """與 FastAPI 的 JSONResponse 相同的方式序列化為 UTF-8 JSON 字節"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def load_strategies(base_path: str = STRATEGY_BASE_PATH) -> Dict[str, List[StrategyDetail]]:
+    strategies = {"long": [], "short": []}
+
+    # 讀取多頭及空頭策略
+    for strategy_type, filename in STRATEGY_FILES.items():
+        path = os.path.join(base_path, filename)
+        if os.path.isfile(path):
+            with open(path, encoding='utf-8') as f:
+                strategies[strategy_type] = [StrategyDetail(**item) for item in json.load(f)]
+
+    return strategies
+
+class StrategyCatalog:
+    """
+    進程內共用的策略目錄。
+    策略 JSON 只解析一次，保留 名稱 -> 策略 的索引及預先序列化的響應字節，
+    文件的 mtime 改變時才重新載入。
+    """
+
+    def __init__(self, base_path: str = STRATEGY_BASE_PATH):
+        self.base_path = base_path
+        self._lock = threading.Lock()
+        self._mtimes: Optional[Tuple[Optional[int], ...]] = None
+        self._strategies: Dict[str, List[StrategyDetail]] = {"long": [], "short": []}
+        self._by_name: Dict[str, Tuple[str, StrategyDetail]] = {}
+        self._detail_bytes: Dict[str, bytes] = {}
+        self._list_bytes = b""
+
+    def _file_mtimes(self) -> Tuple[Optional[int], ...]:
+        mtimes = []
+        for filename in STRATEGY_FILES.values():
+            try:
+                mtimes.append(os.stat(os.path.join(self.base_path, filename)).st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def _ensure_fresh(self) -> None:
+        mtimes = self._file_mtimes()
+        if mtimes == self._mtimes:
+            return
+        with self._lock:
+            if mtimes != self._mtimes:
+                self._load(mtimes)
+
+    def _load(self, mtimes: Tuple[Optional[int], ...]) -> None:
+        strategies = load_strategies(self.base_path)
+
+        by_name = {}
+        detail_bytes = {}
+        # 與原本的線性搜尋一致：多頭優先，同名時取第一個
+        for strategy_type in ["long", "short"]:
+            for strategy in strategies[strategy_type]:
+                if strategy.名稱 not in by_name:
+                    by_name[strategy.名稱] = (strategy_type, strategy)
+                    detail_bytes[strategy.名稱] = dumps_json(strategy.dict())
+
+        list_bytes = dumps_json({
+            "status": "success",
+            "data": {
+                "long_strategies": [{"名稱": s.名稱, "說明": s.說明} for s in strategies["long"]],
+                "short_strategies": [{"名稱": s.名稱, "說明": s.說明} for s in strategies["short"]]
+            }
+        })
+
+        self._strategies = strategies
+        self._by_name = by_name
+        self._detail_bytes = detail_bytes
+        self._list_bytes = list_bytes
+        self._mtimes = mtimes
+
+    @property
+    def strategies(self) -> Dict[str, List[StrategyDetail]]:
+        self._ensure_fresh()
+        return self._strategies
+
+    def get(self, name: str) -> Optional[StrategyDetail]:
+        self._ensure_fresh()
+        entry = self._by_name.get(name)
+        return entry[1] if entry else None
+
+    def list_response_bytes(self) -> bytes:
+        """/api/strategies 預先序列化的響應內容"""
+        self._ensure_fresh()
+        return self._list_bytes
+
+    def strategy_bytes(self, name: str) -> Optional[bytes]:
+        """單個策略預先序列化的 JSON，未知策略返回 None"""
+        self._ensure_fresh()
+        return self._detail_bytes.get(name)
+
+    def detail_response_bytes(self, name: str, image: dict) -> Optional[bytes]:
+        """/api/strategy/{name} 的響應內容，由緩存的策略字節拼接而成；策略不存在時返回 None"""
+        strategy = self.strategy_bytes(name)
+        if strategy is None:
+            return None
+        return b''.join([
+            b'{"status":"success","data":{"strategy":',
+            strategy,
+            b',"image":',
+            dumps_json(image),
+            b'}}',
+        ])
+
+strategy_catalog = StrategyCatalog()
@@ -0,0 +1,111 @@
+# strategy_images.py
+
+import base64
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+from urllib.parse import quote
+
+from api.services.strategy_catalog import STRATEGY_BASE_PATH
+
+FALLBACK_IMAGE = 'strategy_none.png'
+
+class ImageInfo(NamedTuple):
+    path: str
+    mtime_ns: int
+    size: int
+    etag: str
+
+class StrategyImageStore:
+    """
+    解析磁盤上的策略圖片，並以可快取的資源提供。
+    舊客戶端使用的 base64 內容來自按 (路徑, mtime) 索引的有界 LRU。
+    """
+
+    def __init__(self, base_path: str = STRATEGY_BASE_PATH, max_entries: int = 32):
+        self.base_path = base_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._etags: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+        self._encoded: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+        # 預設圖片只在啟動時解析一次
+        self.fallback = self._stat(os.path.join(base_path, FALLBACK_IMAGE))
+
+    def _stat(self, path: str, read: bool = True) -> Optional[ImageInfo]:
+        """
+        `path` 的 ImageInfo。計算 ETag 需要讀取整個文件，read=False 時
+        若 ETag 尚未緩存則返回 None。
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = (path, st.st_mtime_ns)
+        with self._lock:
+            etag = self._etags.get(key)
+            if etag is not None:
+                self._etags.move_to_end(key)
+        if etag is None:
+            if not read:
+                return None
+            with open(path, "rb") as f:
+                etag = hashlib.sha1(f.read()).hexdigest()[:16]
+            with self._lock:
+                self._etags[key] = etag
+                while len(self._etags) > self.max_entries:
+                    self._etags.popitem(last=False)
+        return ImageInfo(path, st.st_mtime_ns, st.st_size, etag)
+
+    def resolve(self, strategy_name: str) -> Optional[ImageInfo]:
+        """策略的圖片，不存在時使用 strategy_none.png；可能讀取文件，應在線程池中調用"""
+        info = self._stat(os.path.join(self.base_path, f"{strategy_name}.png"))
+        return info or self.fallback
+
+    def cached_resolve(self, strategy_name: str) -> Optional[ImageInfo]:
+        """ETag 已緩存時等同 resolve()，否則返回 None；只調用 stat，不讀取文件"""
+        path = os.path.join(self.base_path, f"{strategy_name}.png")
+        if not os.path.exists(path):
+            return self.fallback
+        return self._stat(path, read=False)
+
+    def url_descriptor(self, strategy_name: str, info: Optional[ImageInfo]) -> dict:
+        return {
+            "url": f"/api/strategy/{quote(strategy_name)}/image" + (f"?v={info.etag}" if info else ""),
+            "etag": info.etag if info else None,
+            "format": "url"
+        }
+
+    def cached_base64(self, strategy_name: str) -> Optional[str]:
+        """LRU 中已有的編碼圖片，不讀取文件內容"""
+        info = self.cached_resolve(strategy_name)
+        if info is None:
+            return None
+        key = (info.path, info.mtime_ns)
+        with self._lock:
+            data = self._encoded.get(key)
+            if data is not None:
+                self._encoded.move_to_end(key)
+            return data
+
+    def base64(self, strategy_name: str) -> str:
+        """讀取圖片並進行 base64 編碼，結果放入 LRU"""
+        info = self.resolve(strategy_name)
+        if info is None:
+            raise FileNotFoundError(f"{strategy_name}.png 及預設圖片均不存在")
+        key = (info.path, info.mtime_ns)
+        with self._lock:
+            data = self._encoded.get(key)
+            if data is not None:
+                self._encoded.move_to_end(key)
+                return data
+        with open(info.path, "rb") as image_file:
+            data = base64.b64encode(image_file.read()).decode()
+        with self._lock:
+            self._encoded[key] = data
+            while len(self._encoded) > self.max_entries:
+                self._encoded.popitem(last=False)
+        return data
+
+strategy_images = StrategyImageStore()
@@ -0,0 +1,334 @@
+# summary_materializer.py
+
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from pymongo import ASCENDING, DESCENDING
+
+from api.services.http_cache import LAST_UPDATED_FIELDS
+from api.services.lazy_import import lazy_module
+from api.services.signal_engine import bar_arrays, session_slice
+
+np = lazy_module("numpy")
+
+SUMMARY_COLLECTION = "symbol_summaries"
+
+# 設為 1 時啟動後台物化（默認關閉，列表端點讀取原始文檔）。首次啟動會為最近的交易日補算摘要並建立覆蓋索引；
+# 多個 worker 且 SHARED_CACHE_URL=local 時沒有租約，每個 worker 都會各自重複掃描及寫入，
+# 因此 --workers > 1 時應同時設置共享緩存（lmdb / redis），由持有租約的一個 worker 物化
+SUMMARY_MATERIALIZER = os.getenv("SUMMARY_MATERIALIZER", "0") == "1"
+SUMMARY_POLL_INTERVAL = 10.0
+# 待計算隊列上限：開盤時大量文檔同時變化，掃描協程在隊列滿時等待，而不是同時發出大量查詢
+SUMMARY_QUEUE_SIZE = 200
+SUMMARY_WORKERS = 2
+# 相對成交量的比較基準：同一代碼之前最多 10 個交易日
+RELATIVE_VOLUME_DAYS = 10
+# 只為最近多少個交易日補算摘要；更早的日期不物化，列表端點讀取原始文檔
+SUMMARY_BACKFILL_DAYS = int(os.getenv("SUMMARY_BACKFILL_DAYS", str(2 * RELATIVE_VOLUME_DAYS)))
+
+# 摘要文檔中的標量字段（列表端點的全部返回字段），順序即覆蓋索引中排序鍵之後的字段順序
+SUMMARY_FIELDS = [
+    "symbol", "name", "today_date", "day_close", "yesterday_close", "close_change_percentage",
+    "high_change_percentage", "day_high", "day_low", "float_risk", "sector", "short_signal",
+    "vwap", "volume", "relative_volume", "gap_percentage", "range_percentage",
+    "nearest_key_level", "key_level_distance_percentage", "drawdown_percentage",
+]
+# 排除 _id，查詢可完全由覆蓋索引返回
+SUMMARY_PROJECTION = {"_id": 0, **{field: 1 for field in SUMMARY_FIELDS}}
+
+def _covering_index(sort_field: str) -> Tuple[List[Tuple[str, int]], str]:
+    keys = [("today_date", ASCENDING), (sort_field, DESCENDING)]
+    keys += [(field, ASCENDING) for field in SUMMARY_FIELDS if field not in ["today_date", sort_field]]
+    return keys, f"today_date_{sort_field}_covering"
+
+SUMMARY_INDEXES = [
+    _covering_index("close_change_percentage"),
+    _covering_index("high_change_percentage"),
+    # 相對成交量讀取同一代碼之前的摘要
+    ([("symbol", ASCENDING), ("today_date", DESCENDING)], "symbol_today_date"),
+]
+
+# 判斷文檔是否變化只需最後一根K線及更新時間
+FINGERPRINT_PROJECTION = {
+    "_id": 0, "symbol": 1, "today_date": 1, "day_close": 1,
+    **{field: 1 for field in LAST_UPDATED_FIELDS},
+    "1m_chart_data": {"$slice": -1},
+    "5m_chart_data": {"$slice": -1},
+}
+SOURCE_PROJECTION = {
+    "_id": 0, "symbol": 1, "name": 1, "today_date": 1, "day_close": 1, "yesterday_close": 1,
+    "close_change_percentage": 1, "high_change_percentage": 1, "day_high": 1, "day_low": 1,
+    "float_risk": 1, "company_info.sector": 1, "short_signal": 1, "key_levels": 1,
+    "1m_chart_data": 1, "5m_chart_data": 1,
+}
+
+def fingerprint(document: Dict[str, Any]) -> str:
+    """Changes whenever a bar is appended or the document is rewritten."""
+    last_bars = [(document.get(field) or [{}])[-1].get("datetime") for field in ["1m_chart_data", "5m_chart_data"]]
+    updated = [document.get(field) for field in LAST_UPDATED_FIELDS]
+    return repr((last_bars, updated, document.get("day_close")))
+
+def _number(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) and value == value else None
+
+def _rounded(value: Optional[float], digits: int = 4) -> Optional[float]:
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+def summarize(document: Dict[str, Any], previous_volumes: List[float], fingerprint_value: str) -> Dict[str, Any]:
+    """
+    Summary row for one fundamentals document: the list fields plus metrics derived from
+    the trading day's bars (1m, or 5m when 1m is missing).
+    """
+    date = document["today_date"]
+    bars = bar_arrays(document.get("1m_chart_data") or document.get("5m_chart_data"))
+    day = session_slice(bars, date, "extended")
+    regular = session_slice(bars, date, "regular")
+
+    vwap = volume = gap = drawdown = None
+    if len(day["c"]):
+        session = regular if len(regular["c"]) else day
+        typical = (session["h"] + session["l"] + session["c"]) / 3
+        total = session["v"].sum()
+        vwap = float((typical * session["v"]).sum() / total) if total > 0 else None
+        volume = float(day["v"].sum())
+        # 自當日高點起的最大回撤
+        peaks = np.maximum.accumulate(day["h"])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown = float(np.nanmin(day["l"] / peaks - 1) * 100)
+
+    yesterday_close = _number(document.get("yesterday_close"))
+    if yesterday_close and len(day["o"]):
+        day_open = regular["o"][0] if len(regular["o"]) else day["o"][0]
+        gap = (day_open / yesterday_close - 1) * 100
+
+    price = _number(document.get("day_close")) or (float(day["c"][-1]) if len(day["c"]) else None)
+    levels = [level for level in (_number(level) for level in document.get("key_levels") or []) if level]
+    nearest = distance = None
+    if price and levels:
+        nearest = min(levels, key=lambda level: abs(level - price))
+        distance = (nearest / price - 1) * 100
+
+    day_high, day_low = _number(document.get("day_high")), _number(document.get("day_low"))
+    history = [v for v in previous_volumes if v]
+    relative_volume = volume / (sum(history) / len(history)) if volume is not None and history else None
+
+    return {
+        "_id": f"{document['symbol']}:{date}",
+        "symbol": document["symbol"],
+        "name": document.get("name"),
+        "today_date": date,
+        "day_close": document.get("day_close"),
+        "yesterday_close": document.get("yesterday_close"),
+        "close_change_percentage": document.get("close_change_percentage"),
+        "high_change_percentage": document.get("high_change_percentage"),
+        "day_high": document.get("day_high"),
+        "day_low": document.get("day_low"),
+        "float_risk": document.get("float_risk"),
+        "sector": (document.get("company_info") or {}).get("sector"),
+        "short_signal": document.get("short_signal"),
+        "vwap": _rounded(vwap),
+        "volume": _rounded(volume, 0),
+        "relative_volume": _rounded(relative_volume, 3),
+        "gap_percentage": _rounded(gap, 3),
+        "range_percentage": _rounded((day_high / day_low - 1) * 100, 3) if day_high and day_low else None,
+        "nearest_key_level": nearest,
+        "key_level_distance_percentage": _rounded(distance, 3),
+        "drawdown_percentage": _rounded(drawdown, 3),
+        "fingerprint": fingerprint_value,
+        "updated_at": datetime.now(timezone.utc),
+    }
+
+class SummaryMaterializer:
+    """
+    Keeps `summary_collection` in step with the fundamentals collection.
+
+    A scanner reads a fingerprint (last bar, last-updated fields) of every document of the
+    newest date every `poll_interval` seconds, and of each of the `backfill_days` - 1 older
+    dates once (oldest first), and queues the (symbol, date) pairs whose fingerprint changed. The queue is bounded and repeated
+    changes of a queued pair are coalesced, so a burst at the open turns into at most
+    `workers` concurrent reads. A date is served from the summaries once every document
+    of that date has one.
+    With a `lease` (shared_cache.SharedLease) only the worker holding it scans and writes;
+    the others re-read the summary fingerprints of the newest date each round so that
+    ready() follows the holder's progress. A heartbeat renews the lease independently of
+    the scan (a backfill round can take minutes); once it is lost the scan stops and the
+    queued work is dropped.
+    """
+
+    def __init__(self, mongo_db, collection: str, date_index, summary_collection: str = SUMMARY_COLLECTION,
+                 poll_interval: float = SUMMARY_POLL_INTERVAL, queue_size: int = SUMMARY_QUEUE_SIZE,
+                 workers: int = SUMMARY_WORKERS, lease=None, backfill_days: int = SUMMARY_BACKFILL_DAYS):
+        self.mongo_db = mongo_db
+        self.backfill_days = backfill_days
+        self.lease = lease
+        self.collection = collection
+        self.date_index = date_index
+        self.summary_collection = summary_collection
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.workers = workers
+        self._tasks: List[asyncio.Task] = []
+        self._queue: Optional[asyncio.Queue] = None
+        self.processed = 0
+        self.failed = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Forgets what has been materialized; the next scans re-read the summary fingerprints."""
+        self._pending: Dict[Tuple[str, str], str] = {}
+        self._fingerprints: Dict[str, Dict[str, str]] = {}   # date -> symbol -> 已物化的指紋
+        self._counts: Dict[str, int] = {}                    # date -> 文檔數
+        self._scanned: Set[str] = set()
+
+    def ready(self, date: Optional[str]) -> bool:
+        """True when every document of `date` has a summary."""
+        if not date or date not in self._counts:
+            return False
+        return len(self._fingerprints.get(date, {})) >= self._counts[date]
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._scan_loop())]
+        self._tasks += [loop.create_task(self._work_loop()) for _ in range(self.workers)]
+        if self.lease is not None:
+            self._tasks.append(loop.create_task(self._heartbeat_loop()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def _leading(self) -> bool:
+        return self.lease is None or self.lease.holding
+
+    async def _heartbeat_loop(self) -> None:
+        # 掃描可能在隊列上等待很久，租約由獨立的協程續期
+        while True:
+            await asyncio.sleep(self.lease.ttl / 3)
+            await self.lease.held()
+
+    async def _scan_loop(self) -> None:
+        while True:
+            try:
+                dates = (await self.date_index.dates())[:self.backfill_days]
+                if self.lease is not None and not await self.lease.held():
+                    await self.follow(dates)
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                # 最新日期每輪都掃描；較舊的日期只在啟動後由舊到新掃描一次，
+                # 計算相對成交量時之前交易日的摘要已經存在
+                for index, date in reversed(list(enumerate(dates))):
+                    if not self._leading():
+                        break
+                    if index == 0 or date not in self._scanned:
+                        await self.scan(date)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"警告: 摘要掃描失敗: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _known(self, date: str) -> Dict[str, str]:
+        known = self._fingerprints.get(date)
+        if known is None:
+            # 重啟後沿用已寫入的摘要，指紋相同的文檔不必重新計算
+            rows = await self.mongo_db.find(
+                self.summary_collection, {"today_date": date}, {"_id": 0, "symbol": 1, "fingerprint": 1}
+            )
+            known = self._fingerprints[date] = {row["symbol"]: row.get("fingerprint") for row in rows}
+        return known
+
+    async def scan(self, date: str) -> int:
+        """Queues the documents of `date` whose summary is missing or stale; returns how many."""
+        rows = await self.mongo_db.find(self.collection, {"today_date": date}, FINGERPRINT_PROJECTION)
+        known = await self._known(date)
+        self._counts[date] = len({row["symbol"] for row in rows if row.get("symbol")})
+        queued = 0
+        for row in rows:
+            if not self._leading():
+                # 租約已由其他 worker 接手，本輪不再排隊；日期下次取得租約時重新掃描
+                return queued
+            symbol = row.get("symbol")
+            value = fingerprint(row)
+            if symbol and known.get(symbol) != value:
+                queued += await self._enqueue((symbol, date), value)
+        self._scanned.add(date)
+        return queued
+
+    async def follow(self, dates: List[str]) -> None:
+        """Tracks the summaries another worker writes, without scanning the fundamentals."""
+        for index, date in enumerate(dates):
+            if index == 0 or not self.ready(date):
+                self._fingerprints.pop(date, None)
+                await self._known(date)
+                self._counts[date] = await self.mongo_db.count_documents(self.collection, {"today_date": date})
+
+    async def _enqueue(self, key: Tuple[str, str], value: str) -> int:
+        already_queued = key in self._pending
+        self._pending[key] = value
+        if already_queued:
+            return 0
+        await self._queue.put(key)   # 隊列滿時在此等待
+        return 1
+
+    async def _work_loop(self) -> None:
+        while True:
+            key = await self._queue.get()
+            try:
+                if not self._leading():
+                    self._pending.pop(key, None)
+                    continue
+                await self.materialize(*key)
+                self.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                print(f"警告: 摘要計算失敗 {key}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _previous_volumes(self, symbol: str, date: str) -> List[float]:
+        rows = await self.mongo_db.find(
+            self.summary_collection, {"symbol": symbol, "today_date": {"$lt": date}}, {"_id": 0, "volume": 1},
+            sort=[("today_date", DESCENDING)], limit=RELATIVE_VOLUME_DAYS
+        )
+        return [row["volume"] for row in rows if _number(row.get("volume"))]
+
+    async def materialize(self, symbol: str, date: str) -> Optional[Dict[str, Any]]:
+        value = self._pending.pop((symbol, date), None)
+        document = await self.mongo_db.find_one(self.collection, {"symbol": symbol, "today_date": date}, SOURCE_PROJECTION)
+        if document is None:
+            return None
+        value = value or fingerprint(document)
+        summary = await run_in_threadpool(summarize, document, await self._previous_volumes(symbol, date), value)
+        await self.mongo_db.run(
+            self.mongo_db.db[self.summary_collection].replace_one, {"_id": summary["_id"]}, summary, upsert=True
+        )
+        self._fingerprints.setdefault(date, {})[symbol] = value
+        return summary
+
+    @property
+    def backlog(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": bool(self._tasks),
+            "leader": self.lease.holding if self.lease is not None else bool(self._tasks),
+            "backlog": self.backlog,
+            "processed": self.processed,
+            "failed": self.failed,
+            "ready_dates": sorted((date for date in self._counts if self.ready(date)), reverse=True),
+        }
@@ -0,0 +1,224 @@
+# symbol_search.py
+
+import asyncio
+import bisect
+import heapq
+import re
+import time
+from datetime import date as Date
+from typing import Any, Dict, List, Optional, Set
+
+# 搜索只需要的字段（company_info 只取 sector）
+SEARCH_PROJECTION = {"_id": 0, "symbol": 1, "name": 1, "today_date": 1, "company_info.sector": 1}
+
+# 匹配等級，數值越小排名越前
+MATCH_SYMBOL, MATCH_SYMBOL_PREFIX, MATCH_NAME_PREFIX, MATCH_NAME, MATCH_SECTOR = range(5)
+MATCH_LABELS = ["symbol", "symbol_prefix", "name_prefix", "name", "sector"]
+
+_TOKEN = re.compile(r"\w+")
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall(text.casefold()) if text else []
+
+class _TrieNode:
+    __slots__ = ("children", "symbols")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.symbols: Set[str] = set()   # 以此節點為前綴的所有代碼
+
+class _Entry:
+    __slots__ = ("symbol", "name", "sector", "latest_date", "latest_ordinal", "dates")
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.name: Optional[str] = None
+        self.sector: Optional[str] = None
+        self.latest_date: Optional[str] = None
+        self.latest_ordinal = 0
+        self.dates: Set[str] = set()
+
+class _TokenIndex:
+    """token -> symbols, with the tokens kept sorted so a prefix is a bisect range."""
+
+    def __init__(self):
+        self._symbols: Dict[str, Set[str]] = {}
+        self._keys: List[str] = []
+
+    def add(self, token: str, symbol: str) -> None:
+        symbols = self._symbols.get(token)
+        if symbols is None:
+            symbols = self._symbols[token] = set()
+            bisect.insort(self._keys, token)
+        symbols.add(symbol)
+
+    def remove(self, token: str, symbol: str) -> None:
+        symbols = self._symbols.get(token)
+        if symbols is None:
+            return
+        symbols.discard(symbol)
+        if not symbols:
+            del self._symbols[token]
+            del self._keys[bisect.bisect_left(self._keys, token)]
+
+    def match(self, token: str, prefix: bool) -> Set[str]:
+        if not prefix:
+            return set(self._symbols.get(token, ()))
+        matched: Set[str] = set()
+        start = bisect.bisect_left(self._keys, token)
+        for key in self._keys[start:bisect.bisect_left(self._keys, token + "\U0010ffff", start)]:
+            matched |= self._symbols[key]
+        return matched
+
+class SymbolSearchIndex:
+    """
+    In-memory typeahead index over every symbol in the collection.
+    Symbols go into a prefix trie; name and company_info.sector are tokenized into
+    sorted token indexes (the last query token matches as a prefix). New trading dates
+    reported by DateIndex are loaded incrementally, and the newest date is re-read at
+    most every `probe_interval` seconds to pick up symbols added intraday, so a search
+    normally runs entirely in memory.
+    """
+
+    def __init__(self, mongo_db, collection: str, date_index, probe_interval: float = 30.0):
+        self.mongo_db = mongo_db
+        self.collection = collection
+        self.date_index = date_index
+        self.probe_interval = probe_interval
+        self._lock = asyncio.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Drops everything; the next search rebuilds the index from the collection."""
+        self._root = _TrieNode()
+        self._entries: Dict[str, _Entry] = {}
+        self._names = _TokenIndex()
+        self._sectors = _TokenIndex()
+        self._indexed_dates: Set[str] = set()
+        self._loaded = False
+        self._checked_at = 0.0
+
+    def _fresh(self) -> bool:
+        return self._loaded and time.monotonic() - self._checked_at < self.probe_interval
+
+    async def refresh(self, force: bool = False) -> None:
+        if not force and self._fresh():
+            return
+        async with self._lock:
+            if not force and self._fresh():
+                return
+            dates = await self.date_index.dates()
+            pending = [date for date in dates if date not in self._indexed_dates]
+            # 最新交易日盤中仍會加入新代碼，每次探測都重新讀取
+            if dates and dates[0] not in pending:
+                pending.append(dates[0])
+            if pending:
+                rows = await self.mongo_db.find(self.collection, {"today_date": {"$in": pending}}, SEARCH_PROJECTION)
+                for row in sorted(rows, key=lambda row: row.get("today_date") or ""):
+                    self.add(row)
+                self._indexed_dates.update(pending)
+            self._loaded = True
+            self._checked_at = time.monotonic()
+
+    def add(self, document: Dict[str, Any]) -> None:
+        """Indexes one fundamentals document; the newest date's name and sector win."""
+        symbol, date = document.get("symbol"), document.get("today_date")
+        if not isinstance(symbol, str) or not isinstance(date, str):
+            return
+
+        entry = self._entries.get(symbol)
+        if entry is None:
+            entry = self._entries[symbol] = _Entry(symbol)
+            node = self._root
+            node.symbols.add(symbol)
+            for char in symbol:
+                node = node.children.setdefault(char, _TrieNode())
+                node.symbols.add(symbol)
+
+        entry.dates.add(date)
+        if entry.latest_date and date < entry.latest_date:
+            return
+        entry.latest_date = date
+        try:
+            entry.latest_ordinal = Date.fromisoformat(date).toordinal()
+        except ValueError:
+            pass
+
+        name = document.get("name")
+        sector = (document.get("company_info") or {}).get("sector") or document.get("sector")
+        self._retokenize(self._names, symbol, entry.name, name)
+        self._retokenize(self._sectors, symbol, entry.sector, sector)
+        entry.name, entry.sector = name, sector
+
+    @staticmethod
+    def _retokenize(index: _TokenIndex, symbol: str, old: Optional[str], new: Optional[str]) -> None:
+        if old == new:
+            return
+        old_tokens, new_tokens = set(tokenize(old)), set(tokenize(new))
+        for token in old_tokens - new_tokens:
+            index.remove(token, symbol)
+        for token in new_tokens - old_tokens:
+            index.add(token, symbol)
+
+    def _symbol_prefix(self, prefix: str) -> Set[str]:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.symbols
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Ranked suggestions: exact symbol, symbol prefix, name prefix, name tokens, then
+        sector tokens; ties go to the symbol seen most recently, then on most dates.
+        """
+        text = query.strip()
+        if not text:
+            return []
+
+        tiers: Dict[str, int] = {}
+        upper = text.upper()
+        if " " not in upper:
+            for symbol in self._symbol_prefix(upper):
+                tiers[symbol] = MATCH_SYMBOL if symbol == upper else MATCH_SYMBOL_PREFIX
+
+        tokens = tokenize(text)
+        if tokens:
+            by_name: Optional[Set[str]] = None
+            by_any: Optional[Set[str]] = None
+            for position, token in enumerate(tokens):
+                prefix = position == len(tokens) - 1   # 最後一個詞仍在輸入中，按前綴匹配
+                names = self._names.match(token, prefix)
+                by_name = names if by_name is None else by_name & names
+                either = names | self._sectors.match(token, prefix)
+                by_any = either if by_any is None else by_any & either
+
+            folded = text.casefold()
+            for symbol in by_any:
+                if symbol in tiers:
+                    continue
+                if symbol in by_name:
+                    name = self._entries[symbol].name or ""
+                    tiers[symbol] = MATCH_NAME_PREFIX if name.casefold().startswith(folded) else MATCH_NAME
+                else:
+                    tiers[symbol] = MATCH_SECTOR
+
+        def rank(symbol):
+            entry = self._entries[symbol]
+            return (tiers[symbol], -entry.latest_ordinal, -len(entry.dates), symbol)
+
+        return [
+            {
+                "symbol": symbol,
+                "name": self._entries[symbol].name,
+                "sector": self._entries[symbol].sector,
+                "latest_date": self._entries[symbol].latest_date,
+                "days": len(self._entries[symbol].dates),
+                "match": MATCH_LABELS[tiers[symbol]],
+            }
+            for symbol in heapq.nsmallest(limit, tiers, key=rank)
+        ]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,26 @@
+# conftest.py
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from api.benchmarks.mongo_fixture import BenchMongoHandler
+from api.benchmarks.synthetic import COLLECTION, seed_fundamentals
+
+# 應用以 public/ 為工作目錄運行（靜態文件及策略 JSON 在 public/assets 下）
+PUBLIC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'public'))
+
+@pytest.fixture
+def seeded_routes(monkeypatch):
+    """api.routers.stocks bound to a mongomock database with 20 symbols x 3 days."""
+    monkeypatch.chdir(PUBLIC_DIR)
+    from api.routers import stocks
+
+    handler = BenchMongoHandler()
+    symbols, dates = seed_fundamentals(handler.raw_db[COLLECTION], 20, 3, 30)
+    stocks.bind_mongo_handler(handler)
+    yield stocks, symbols, dates
+    stocks.bind_mongo_handler(BenchMongoHandler())
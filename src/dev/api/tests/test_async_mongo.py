@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import ConnectionFailure
+
+from api.services.async_mongo import AsyncMongoHandler, QueryTimeoutError
+
+class _UnreachableHandler:
+    """Handler whose client points at a port nothing listens on, with pymongo's 30s selection default."""
+
+    def __init__(self):
+        self.client = MongoClient("mongodb://127.0.0.1:9/?directConnection=true")
+        self.db = self.client["TradeZero_Bot_test"]
+
+    def is_connected(self):
+        self.client.admin.command("ping")
+        return True
+
+class _StalledHandler:
+    def is_connected(self):
+        return True
+
+    def stall(self):
+        time.sleep(1)
+
+def test_unreachable_server_fails_fast_and_marks_down():
+    handler = _UnreachableHandler()
+    mongo_db = AsyncMongoHandler(handler, query_timeout_ms=300)
+
+    async def scenario():
+        started = time.monotonic()
+        with pytest.raises(ConnectionFailure):
+            await mongo_db.find_one("fundamentals_of_top_list_symbols", {"symbol": "AAA"})
+        elapsed = time.monotonic() - started
+        return elapsed, await mongo_db.is_connected()
+
+    try:
+        elapsed, connected = asyncio.run(scenario())
+    finally:
+        mongo_db.shutdown()
+        handler.client.close()
+    # 受查詢超時限制，而不是 pymongo 默認的 30 秒選擇服務器超時
+    assert elapsed < 2
+    assert connected is False
+
+def test_client_side_timeout_makes_state_unknown():
+    mongo_db = AsyncMongoHandler(_StalledHandler(), query_timeout_ms=100)
+
+    async def scenario():
+        await mongo_db.run(lambda: None)
+        assert mongo_db._connected is True
+        with pytest.raises(QueryTimeoutError):
+            await mongo_db.run(mongo_db.handler.stall, timeout_ms=100)
+        return mongo_db._connected
+
+    try:
+        assert asyncio.run(scenario()) is None
+    finally:
+        mongo_db.shutdown()
@@ -0,0 +1,62 @@
+# test_chart_routes.py
+
+from fastapi.testclient import TestClient
+
+from api.app import create_app
+
+def test_chart_without_date_uses_the_newest_document(seeded_routes):
+    _, symbols, dates = seeded_routes
+    client = TestClient(create_app())
+
+    # mongomock 不支持 $convert，窗口改在 build_chart_data 中套用
+    response = client.get(f"/stocks/{symbols[0]}/chart", params={"timeframe": "1m"})
+
+    assert response.status_code == 200
+    bars = response.json()["chart_data"]
+    assert bars and all(bar["time"].startswith(dates[-1]) for bar in bars)
+
+def test_intraday_charts_fall_back_when_the_window_expression_is_unsupported(seeded_routes):
+    _, symbols, dates = seeded_routes
+    client = TestClient(create_app())
+
+    for timeframe in ["1m", "5m"]:
+        response = client.get(f"/stocks/{symbols[1]}/chart", params={"timeframe": timeframe, "date": dates[0]})
+        assert response.status_code == 200
+
+def test_seeded_intraday_charts_are_not_empty(seeded_routes):
+    _, symbols, dates = seeded_routes
+    client = TestClient(create_app())
+
+    # 合成數據以交易所本地時間（04:00 起）寫入，與默認的 CHART_DATA_TIMEZONE 一致
+    for timeframe in ["1m", "5m", "15m"]:
+        response = client.get(f"/stocks/{symbols[2]}/chart", params={"timeframe": timeframe, "date": dates[1]})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["data_points"] > 0
+        assert all(bar["time"].startswith(dates[1]) for bar in body["chart_data"])
+
+def test_columnar_chart_reads_only_buckets_in_the_window(seeded_routes, monkeypatch):
+    stocks, symbols, dates = seeded_routes
+    from api.benchmarks.synthetic import COLLECTION
+    from api.services.chart_store import pack_buckets
+
+    db = stocks.mongo_db.handler.raw_db
+    for document in db[COLLECTION].find({"symbol": symbols[0]}):
+        buckets = pack_buckets(document["symbol"], document["today_date"], "5m",
+                               document["5m_chart_data"], bucket_size=2)
+        db["chart_bars"].insert_many(buckets)
+    monkeypatch.setattr(stocks.chart_store, "mode", "columnar")
+
+    queries = []
+    find = stocks.mongo_db.find
+
+    async def recording_find(collection, query, *args, **kwargs):
+        queries.append((collection, query))
+        return await find(collection, query, *args, **kwargs)
+
+    monkeypatch.setattr(stocks.mongo_db, "find", recording_find)
+    response = TestClient(create_app()).get(f"/stocks/{symbols[0]}/chart", params={"timeframe": "5m", "date": dates[0]})
+
+    assert response.status_code == 200
+    bar_queries = [query for collection, query in queries if collection == "chart_bars"]
+    assert bar_queries and "start" in bar_queries[0] and "end" in bar_queries[0]
@@ -0,0 +1,85 @@
+# test_document_cache.py
+
+import asyncio
+import time
+
+import pytest
+
+from api.services.document_cache import MISSING, DocumentCache, approximate_size
+
+def test_cancelled_loader_hands_the_load_to_a_waiter():
+    async def scenario():
+        cache = DocumentCache()
+        started = asyncio.Event()
+        calls = []
+
+        async def slow_load():
+            calls.append("slow")
+            started.set()
+            await asyncio.sleep(10)
+
+        async def fast_load():
+            calls.append("fast")
+            return {"symbol": "AAPL"}
+
+        owner = asyncio.create_task(cache.get_or_load(("AAPL", None, None), slow_load))
+        await started.wait()
+        waiter = asyncio.create_task(cache.get_or_load(("AAPL", None, None), fast_load))
+        await asyncio.sleep(0)
+        owner.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        assert await waiter == {"symbol": "AAPL"}
+        assert calls == ["slow", "fast"]
+        assert cache.peek(("AAPL", None, None)) == {"symbol": "AAPL"}
+
+    asyncio.run(scenario())
+
+def test_entries_are_evicted_by_size():
+    document = {"symbol": "AAPL", "1m_chart_data": [{"open": 1.0, "close": 2.0}] * 1000}
+    size = approximate_size(document)
+    cache = DocumentCache(max_bytes=size * 2 + size // 2)
+
+    for symbol in ["A", "B", "C"]:
+        cache.put((symbol, "2025-01-02", None), document)
+
+    assert len(cache) == 2
+    assert cache.peek(("A", "2025-01-02", None)) is MISSING
+    assert cache.peek(("C", "2025-01-02", None)) is document
+    assert cache.size_bytes == 2 * size
+
+    cache.invalidate()
+    assert cache.size_bytes == 0
+
+def test_values_larger_than_the_cache_are_not_stored():
+    cache = DocumentCache(max_bytes=1024)
+    cache.put(("AAPL", None, None), {"1m_chart_data": [{"close": 1.0}] * 1000})
+    assert len(cache) == 0
+
+def test_local_only_entries_keep_the_immutable_ttl_with_a_shared_cache():
+    class Shared:
+        def __init__(self):
+            self.values = {}
+
+        async def get(self, key):
+            return self.values.get(key, MISSING)
+
+        async def set(self, key, value, ttl):
+            self.values[key] = value
+
+    async def scenario():
+        cache = DocumentCache(ttl=5.0, immutable_ttl=3600.0, shared=Shared())
+        cache.put(("AAPL", "2020-01-02", ("chart_bars", "1m")), "frame", immutable=True)
+
+        async def load():
+            return {"symbol": "AAPL"}
+
+        await cache.get_or_load(("AAPL", "2020-01-02", None), load, immutable=True)
+        now = time.monotonic()
+        local_only = cache._entries[("AAPL", "2020-01-02", ("chart_bars", "1m"))]
+        shared = cache._entries[("AAPL", "2020-01-02", None)]
+        assert local_only.expires_at - now > 3000
+        assert shared.expires_at - now <= 5.0
+
+    asyncio.run(scenario())
@@ -0,0 +1,26 @@
+# test_http_cache.py
+
+from datetime import datetime
+
+from bson import ObjectId
+from starlette.requests import Request
+
+from api.services.http_cache import (
+    IMMUTABLE_CACHE_CONTROL, NEWS_UPDATED_FIELD, REVALIDATE_CACHE_CONTROL, cache_control_for, document_etag
+)
+
+def _request(path="/stocks/AAPL", query=b""):
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query, "headers": []})
+
+def test_past_date_etag_changes_when_news_is_updated():
+    document = {"_id": ObjectId(), "today_date": "2020-01-02"}
+    before = document_etag(document, _request())
+    after = document_etag({**document, NEWS_UPDATED_FIELD: datetime(2024, 5, 1, 9, 30)}, _request())
+
+    assert before and after and before != after
+    assert document_etag(document, _request()) == before
+
+def test_responses_with_news_always_revalidate():
+    assert cache_control_for("2020-01-02") == IMMUTABLE_CACHE_CONTROL
+    assert cache_control_for("2020-01-02", news=True) == REVALIDATE_CACHE_CONTROL
+    assert cache_control_for(None, news=True) == REVALIDATE_CACHE_CONTROL
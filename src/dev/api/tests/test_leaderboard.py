@@ -0,0 +1,37 @@
+import asyncio
+
+from api.services.leaderboard import LeaderboardCache
+
+class _FakeMongo:
+    def __init__(self):
+        self.loads = 0
+
+    async def aggregate(self, collection, pipeline):
+        self.loads += 1
+        return [{"symbol": "AAA", "today_date": pipeline[0]["$match"].get("today_date")}]
+
+    async def count_documents(self, collection, query):
+        return 1
+
+def test_boards_and_locks_are_bounded():
+    mongo = _FakeMongo()
+    cache = LeaderboardCache(mongo, "fundamentals_of_top_list_symbols", max_boards=3)
+
+    async def scenario():
+        for day in range(1, 11):
+            await cache.top(f"2024-01-{day:02d}", "close_change_percentage", 10)
+        # 最近使用的日期仍在緩存中
+        await cache.top("2024-01-10", "close_change_percentage", 10)
+
+    asyncio.run(scenario())
+    assert list(cache._boards) == [
+        ("2024-01-08", "close_change_percentage"),
+        ("2024-01-09", "close_change_percentage"),
+        ("2024-01-10", "close_change_percentage"),
+    ]
+    assert set(cache._locks) <= set(cache._boards)
+    assert mongo.loads == 10
+
+    cache.invalidate("2024-01-09")
+    assert ("2024-01-09", "close_change_percentage") not in cache._locks
+    assert len(cache._boards) == 2
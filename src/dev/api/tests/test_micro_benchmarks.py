@@ -0,0 +1,65 @@
+# test_micro_benchmarks.py
+
+"""
+pytest-benchmark cases for the chart, serialization and pagination helpers
+(the same cases as api.benchmarks.bench_micro). Each case fails when its fastest round
+is more than MICRO_TOLERANCE (default 100%, i.e. twice as slow) slower than the
+committed baseline; shared CI machines vary by about 1.5x between runs. Re-record the
+baseline on the machine that runs the gate:
+
+    python -m pytest tests/test_micro_benchmarks.py
+    MICRO_SAVE_BASELINE=benchmarks/baselines/micro.json python -m pytest tests/test_micro_benchmarks.py
+"""
+
+import os
+import time
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from api.benchmarks.baseline import compare, load_baseline, save_baseline, summarize
+from api.benchmarks.bench_micro import cases
+
+BASELINE_PATH = os.getenv(
+    "MICRO_BASELINE", os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'baselines', 'micro.json')
+)
+TOLERANCE = float(os.getenv("MICRO_TOLERANCE", "1.0"))
+SAVE_BASELINE = os.getenv("MICRO_SAVE_BASELINE")
+BARS = [1_000, 10_000]
+ROUNDS = 20
+MIN_ROUND_S = 0.002
+
+CASES = [(f"{name} bars={bars}", bars, name) for bars in BARS for name in cases(100)]
+
+@pytest.fixture(scope="module")
+def baseline():
+    stored = load_baseline(BASELINE_PATH) or {}
+    results = {}
+    yield {case: {"min_ms": row["min_ms"]} for case, row in stored.items() if "min_ms" in row}, results
+    if SAVE_BASELINE and results:
+        save_baseline(SAVE_BASELINE, results)
+
+@pytest.fixture(scope="module")
+def case_functions():
+    return {bars: cases(bars) for bars in BARS}
+
+@pytest.mark.benchmark(group="micro")
+@pytest.mark.parametrize("case, bars, name", CASES, ids=[case for case, _, _ in CASES])
+def test_micro_benchmark(benchmark, baseline, case_functions, case, bars, name):
+    stored, results = baseline
+    fn = case_functions[bars][name]
+    started = time.perf_counter()
+    fn()
+    # 很快的函數每輪重複多次，避免計時器精度主導結果
+    iterations = max(1, min(1000, int(MIN_ROUND_S / max(time.perf_counter() - started, 1e-7))))
+    benchmark.pedantic(fn, rounds=ROUNDS, iterations=iterations, warmup_rounds=3)
+    if benchmark.disabled:
+        return
+
+    samples = benchmark.stats.stats.data
+    results[case] = {**summarize(samples, sum(samples)), "min_ms": min(samples) * 1000}
+    # 最快一輪受其他進程干擾最少，作為門檻
+    regressions = compare({case: results[case]}, {case: stored.get(case)}, TOLERANCE, metrics=("min_ms",))
+    if regressions and not SAVE_BASELINE:
+        pytest.fail(f"比基準慢超過 {TOLERANCE:.0%}: {regressions[0]}")
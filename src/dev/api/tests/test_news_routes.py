@@ -0,0 +1,78 @@
+# test_news_routes.py
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.app import create_app
+from api.services import news_store
+
+@pytest.fixture
+def news_client(seeded_routes, monkeypatch):
+    stocks, symbols, dates = seeded_routes
+    monkeypatch.setattr(news_store, "NEWS_ADMIN_PASSWORD", "secret")
+    from api.benchmarks.synthetic import COLLECTION
+
+    document = stocks.mongo_db.handler.raw_db[COLLECTION].find_one({"symbol": symbols[0], "today_date": dates[0]})
+    return TestClient(create_app()), symbols[0], dates[0], str(document["_id"])
+
+def test_posting_the_same_news_twice_adds_it_once(news_client):
+    client, symbol, date, document_id = news_client
+    payload = {"password": "secret", "target_document_id": document_id, "news": "Offering priced at $2"}
+
+    first = client.post(f"/api/stocks/{symbol}/add-news", json=payload)
+    second = client.post(f"/api/stocks/{symbol}/add-news", json=payload)
+
+    assert first.status_code == 200, first.text
+    assert first.json()["added"] == 1
+    assert second.status_code == 200 and second.json()["added"] == 0
+    news = second.json()["raw_news"]
+    assert [entry["summary"] for entry in news] == ["Offering priced at $2"]
+    # 沒有提供 uuid 時由文檔 ID 及內容推導，重試得到相同的 uuid
+    assert news[0]["uuid"] == first.json()["raw_news"][0]["uuid"]
+    # 詳情緩存已失效
+    detail = client.get(f"/stocks/{symbol}", params={"date": date}).json()
+    assert [entry["uuid"] for entry in detail["raw_news"]] == [news[0]["uuid"]]
+
+@pytest.mark.parametrize("password, status", [("wrong", 403), ("", 403), ("secret-but-longer", 403)])
+def test_wrong_password_is_rejected(news_client, password, status):
+    client, symbol, _, document_id = news_client
+
+    response = client.post(f"/api/stocks/{symbol}/add-news",
+                           json={"password": password, "target_document_id": document_id, "news": "x"})
+
+    assert response.status_code == status
+    assert response.json()["detail"] == "密碼錯誤"
+
+def test_writes_are_refused_without_a_configured_password(news_client, monkeypatch):
+    client, symbol, _, document_id = news_client
+    monkeypatch.setattr(news_store, "NEWS_ADMIN_PASSWORD", None)
+
+    response = client.post(f"/api/stocks/{symbol}/add-news",
+                           json={"password": "secret", "target_document_id": document_id, "news": "x"})
+
+    assert response.status_code == 503
+
+def test_delete_returns_the_remaining_news(news_client):
+    client, symbol, _, document_id = news_client
+    added = client.post(f"/api/stocks/{symbol}/add-news", json={
+        "password": "secret", "target_document_id": document_id,
+        "items": [{"summary": "first", "uuid": "a"}, {"summary": "second", "uuid": "b"}, {"summary": "third", "uuid": "c"}],
+    }).json()
+    assert [entry["uuid"] for entry in added["raw_news"]] == ["a", "b", "c"]
+
+    response = client.request("DELETE", f"/api/stocks/{symbol}/news/a",
+                              json={"password": "secret", "target_document_id": document_id, "uuids": ["c"]})
+
+    assert response.status_code == 200
+    body = response.json()
+    # 前端直接以返回的 raw_news 更新列表
+    assert body["deleted"] == 2
+    assert body["raw_news"] == [{"summary": "second", "timestamp": body["raw_news"][0]["timestamp"], "uuid": "b"}]
+
+    again = client.request("DELETE", f"/api/stocks/{symbol}/news/a",
+                           json={"password": "secret", "target_document_id": document_id})
+    assert again.json()["deleted"] == 0 and [entry["uuid"] for entry in again.json()["raw_news"]] == ["b"]
+
+    wrong = client.request("DELETE", f"/api/stocks/{symbol}/news/b",
+                           json={"password": "wrong", "target_document_id": document_id})
+    assert wrong.status_code == 403
@@ -0,0 +1,41 @@
+# test_pagination.py
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.app import create_app
+
+def _walk(client, params, limit):
+    rows, cursor, pages = [], None, 0
+    while True:
+        response = client.get("/stocks/", params={**params, "limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        body = response.json()
+        rows += body["data"]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return rows, pages
+
+@pytest.mark.parametrize("with_date", [True, False])
+def test_cursor_pages_match_a_single_query(seeded_routes, with_date):
+    _, symbols, dates = seeded_routes
+    client = TestClient(create_app())
+    params = {"date": dates[1]} if with_date else {}
+
+    expected = client.get("/stocks/", params={**params, "limit": 500}).json()["data"]
+    rows, pages = _walk(client, params, limit=7)
+
+    keys = [(row["today_date"], row["symbol"]) for row in rows]
+    assert len(keys) == len(set(keys))
+    assert keys == [(row["today_date"], row["symbol"]) for row in expected]
+    assert len(rows) == (len(symbols) if with_date else len(symbols) * len(dates))
+    assert pages == len(rows) // 7 + 1
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "W10", "!!!"])
+def test_malformed_cursor_is_400(seeded_routes, cursor):
+    client = TestClient(create_app())
+
+    response = client.get("/stocks/", params={"cursor": cursor})
+
+    assert response.status_code == 400
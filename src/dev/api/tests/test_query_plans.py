@@ -0,0 +1,67 @@
+# test_query_plans.py
+
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.app import create_app
+from api.services.leaderboard import (
+    SYMBOL_INDEXES, TOP_MOVER_SORT_FIELDS, assert_index_backed, explain_pipeline, ensure_indexes,
+    top_movers_pipeline
+)
+
+MONGODB_TEST_URI = os.getenv("MONGODB_TEST_URI")
+
+def _index_for(pipeline):
+    """Index whose key pattern is the $match equality fields followed by the $sort keys."""
+    match = next(stage["$match"] for stage in pipeline if "$match" in stage)
+    sort = next(stage["$sort"] for stage in pipeline if "$sort" in stage)
+    for keys, name in SYMBOL_INDEXES:
+        fields = [field for field, _ in keys]
+        if set(fields[:len(match)]) == set(match) and keys[len(match):] == list(sort.items()):
+            return name
+    return None
+
+@pytest.mark.parametrize("sort_by", TOP_MOVER_SORT_FIELDS)
+def test_top_movers_pipeline_has_a_matching_index(sort_by):
+    pipeline = top_movers_pipeline("2025-01-02", sort_by, 10)
+    assert _index_for(pipeline) == f"today_date_{sort_by}"
+
+def test_top_movers_without_date_reads_the_latest_date(seeded_routes, monkeypatch):
+    stocks, _, dates = seeded_routes
+    pipelines = []
+    aggregate = stocks.mongo_db.aggregate
+
+    async def recording_aggregate(collection, pipeline, **kwargs):
+        pipelines.append(pipeline)
+        return await aggregate(collection, pipeline, **kwargs)
+
+    monkeypatch.setattr(stocks.mongo_db, "aggregate", recording_aggregate)
+    client = TestClient(create_app())
+    for sort_by in TOP_MOVER_SORT_FIELDS:
+        response = client.get("/top-movers", params={"sort_by": sort_by, "limit": 5})
+        assert response.status_code == 200
+        assert {row["today_date"] for row in response.json()["data"]} == {dates[-1]}
+
+    top_movers = [p for p in pipelines if any("$sort" in stage for stage in p)]
+    assert top_movers
+    for pipeline in top_movers:
+        assert pipeline[0]["$match"] == {"today_date": dates[-1]}
+        assert _index_for(pipeline) is not None
+
+@pytest.mark.skipif(not MONGODB_TEST_URI, reason="explain 需要真實的 mongod（設置 MONGODB_TEST_URI）")
+def test_list_query_plans_are_index_backed():
+    from pymongo import MongoClient
+
+    from api.benchmarks.check_query_plans import COLLECTION, checked_pipelines, seed
+
+    client = MongoClient(MONGODB_TEST_URI)
+    db = client["TradeZero_Bot_plan_test"]
+    try:
+        seed(db[COLLECTION], 5, 200)
+        ensure_indexes(db[COLLECTION])
+        for name, pipeline in checked_pipelines():
+            assert_index_backed(explain_pipeline(db, COLLECTION, pipeline))
+    finally:
+        client.drop_database(db.name)
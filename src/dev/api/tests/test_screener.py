@@ -0,0 +1,92 @@
+# test_screener.py
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.app import create_app
+from api.services.screener import (
+    MAX_CONDITIONS, MAX_DEPTH, SCREEN_MAX_LIMIT, ScreenRequest, compile_filter, compile_sort, screen_pipeline
+)
+
+def _condition(field="hype_score", op="gte", value=3):
+    return {"field": field, "op": op, "value": value}
+
+@pytest.mark.parametrize("node, message", [
+    (_condition(field="$where"), "不支持的篩選字段"),
+    (_condition(op="regex"), "不支持的運算符"),
+    (_condition(value="3"), "必須是數字"),
+    (_condition(field="float_risk", op="gt", value="High"), "只支持"),
+    (_condition(op="between", value=[1]), "between"),
+    (_condition(op="between", value=[1, "9"]), "必須是數字"),
+    (_condition(op="in", value=[]), "in 的值"),
+    (_condition(op="exists", value=1), "exists"),
+    ({"and": []}, "and 必須是非空數組"),
+    ({"or": [_condition()], "field": "hype_score"}, "or 必須是非空數組"),
+    ({"not": _condition(), "and": [_condition()]}, "不能與其他鍵並列"),
+    ({"not": _condition(), "field": "hype_score"}, "not 不能與其他鍵並列"),
+    ({"and": ["hype_score"]}, "必須是對象"),
+])
+def test_invalid_filters_are_rejected(node, message):
+    with pytest.raises(ValueError, match=message):
+        compile_filter(node)
+
+def test_depth_limit():
+    node = _condition()
+    for _ in range(MAX_DEPTH - 1):
+        node = {"and": [node]}
+    assert compile_filter(node) == {"hype_score": {"$gte": 3}}
+
+    with pytest.raises(ValueError, match="嵌套不能超過"):
+        compile_filter({"and": [node]})
+
+def test_condition_count_limit():
+    assert compile_filter({"or": [_condition(value=i) for i in range(MAX_CONDITIONS)]})
+
+    with pytest.raises(ValueError, match="不能超過"):
+        compile_filter({"or": [_condition(value=i) for i in range(MAX_CONDITIONS + 1)]})
+
+def test_between_and_not_compile_to_mongo_operators():
+    node = {"and": [
+        _condition(field="market_cap_float", op="between", value=[1e6, 5e7]),
+        {"not": _condition(field="sector", op="eq", value="Technology")},
+    ]}
+
+    assert compile_filter(node) == {"$and": [
+        {"market_cap_float": {"$gte": 1e6, "$lte": 5e7}},
+        {"$nor": [{"company_info.sector": "Technology"}]},
+    ]}
+
+def test_sort_and_limit_validation():
+    assert compile_sort(["-hype_score", "symbol"]) == [("hype_score", -1), ("symbol", 1)]
+    with pytest.raises(ValueError, match="不支持的排序字段"):
+        compile_sort(["-raw_news"])
+    with pytest.raises(ValueError, match="最多 3 個"):
+        compile_sort(["hype_score", "cash", "debt", "symbol"])
+    with pytest.raises(ValueError, match="limit"):
+        screen_pipeline(ScreenRequest(limit=SCREEN_MAX_LIMIT + 1), "2025-01-02")
+
+def test_pipeline_always_matches_the_date_first():
+    pipeline = screen_pipeline(ScreenRequest(filter=_condition(), sort=["-squeeze_score"]), "2025-01-02")
+
+    assert pipeline[0]["$match"] == {"today_date": "2025-01-02", "$and": [{"hype_score": {"$gte": 3}}]}
+    # 非索引排序時以代碼打破平手
+    assert pipeline[1]["$sort"] == {"squeeze_score": -1, "symbol": 1}
+
+def test_saved_screen_round_trip(seeded_routes):
+    _, _, dates = seeded_routes
+    client = TestClient(create_app())
+    screen = {"filter": {"and": [_condition(), {"not": _condition(field="float_risk", op="eq", value="High")}]},
+              "sort": ["-hype_score"], "limit": 10}
+
+    saved = client.post("/stocks/screen", params={"date": dates[0], "save": True}, json=screen)
+    assert saved.status_code == 200
+    body = saved.json()
+    assert body["count"] and all(row["hype_score"] >= 3 and row["float_risk"] != "High" for row in body["data"])
+
+    loaded = client.get(f"/stocks/screen/{body['screen_id']}", params={"date": dates[0]})
+    assert loaded.status_code == 200
+    assert loaded.json()["data"] == body["data"]
+
+    assert client.get("/stocks/screen/0000000000000000").status_code == 404
+    invalid = client.post("/stocks/screen", json={"filter": _condition(field="$where")})
+    assert invalid.status_code == 400
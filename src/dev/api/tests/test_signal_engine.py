@@ -0,0 +1,102 @@
+# test_signal_engine.py
+
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from api.app import create_app
+from api.services.signal_engine import bar_arrays, gap_and_fade, opening_range_break, vwap_rejection
+
+DATE = "2025-01-02"
+
+def _bars(rows, start=datetime(2025, 1, 2, 9, 30)):
+    """(open, high, low, close, volume) rows as stored 1m bars from `start` (exchange time)."""
+    return [
+        {"datetime": start + timedelta(minutes=i), "open": o, "high": h, "low": l, "close": c, "volume": v}
+        for i, (o, h, l, c, v) in enumerate(rows)
+    ]
+
+def _gap_rows(open_price):
+    return [
+        (open_price, open_price + 0.1, open_price - 0.1, open_price, 5000),
+        (open_price, open_price + 0.05, open_price - 0.2, open_price - 0.1, 4000),
+        (open_price - 0.1, open_price - 0.1, open_price - 0.8, open_price - 0.7, 6000),
+    ]
+
+def test_gap_and_crap_triggers_on_a_failed_gap():
+    premarket = _bars([(13, 13, 13, 13, 100)], start=datetime(2025, 1, 2, 8, 0))
+    bars = bar_arrays(premarket + _bars(_gap_rows(12.0)))
+
+    signal = gap_and_fade(bars, {"yesterday_close": 10}, DATE)
+
+    # 盤前K線不算開盤價；跌破開盤價 5% 的第一根收盤觸發
+    assert signal["time"] == "2025-01-02T09:32:00"
+    assert signal["open"] == 12.0 and signal["gap"] == 0.2
+
+def test_gap_and_crap_ignores_small_gaps_and_held_gaps():
+    assert gap_and_fade(bar_arrays(_bars(_gap_rows(10.5))), {"yesterday_close": 10}, DATE) is None
+
+    held = [(12, 12.2, 11.8, 12.1, 5000), (12.1, 12.3, 11.9, 12.0, 4000), (12.0, 12.4, 11.7, 12.2, 3000)]
+    assert gap_and_fade(bar_arrays(_bars(held)), {"yesterday_close": 10}, DATE) is None
+
+def _vwap_rows(rejection_high):
+    flat = [(10, 10.05, 9.95, 10, 1000)] * 5
+    return flat + [(10, 10, 9.85, 9.9, 1000), (9.9, rejection_high, 9.85, 9.88, 1000)]
+
+def test_vwap_rejection_triggers_when_a_bar_below_vwap_tags_it_and_closes_lower():
+    signal = vwap_rejection(bar_arrays(_bars(_vwap_rows(9.98))), {}, DATE)
+
+    assert signal["time"] == "2025-01-02T09:36:00"
+    assert signal["price"] == 9.88 and signal["high"] == 9.98
+
+def test_vwap_rejection_needs_the_high_to_reach_vwap():
+    assert vwap_rejection(bar_arrays(_bars(_vwap_rows(9.92))), {}, DATE) is None
+
+def _orb_rows(breakout_volume):
+    opening = [(10, 10.1, 9.9, 10, 1000)] * 5
+    return opening + [(10, 10.35, 10, 10.3, breakout_volume), (10.3, 10.4, 10.2, 10.35, 1000)]
+
+def test_orb_triggers_on_a_close_above_the_range_with_volume():
+    signal = opening_range_break(bar_arrays(_bars(_orb_rows(3000))), {"key_levels": [9, 11]}, DATE)
+
+    assert signal["time"] == "2025-01-02T09:35:00"
+    assert signal["range_high"] == 10.1 and signal["volume_ratio"] == 3.0
+    assert signal["target"] == 11.0
+
+def test_orb_ignores_low_volume_breaks_and_closes_inside_the_stored_range():
+    assert opening_range_break(bar_arrays(_bars(_orb_rows(1200))), {}, DATE) is None
+    assert opening_range_break(bar_arrays(_bars(_orb_rows(3000))), {"market_open_high": 11}, DATE) is None
+
+def test_matches_are_materialized_per_date(seeded_routes, monkeypatch):
+    stocks, _, dates = seeded_routes
+    from api.benchmarks.synthetic import COLLECTION
+
+    db = stocks.mongo_db.handler.raw_db
+    db[COLLECTION].insert_one({
+        "symbol": "GAPC", "today_date": dates[0], "yesterday_close": 10,
+        "1m_chart_data": _bars(_gap_rows(12.0), start=datetime.strptime(dates[0], "%Y-%m-%d").replace(hour=9, minute=30)),
+    })
+    monkeypatch.setattr(stocks.signal_engine, "workers", 0)
+    stocks.signal_engine.invalidate()
+    client = TestClient(create_app())
+
+    response = client.get("/api/strategy/Gap and Crap/matches", params={"date": dates[0]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["side"] == "short" and body["symbols_scanned"] == 21
+    assert [row["symbol"] for row in body["data"]] == ["GAPC"]
+    stored = db["strategy_signals"].find_one({"_id": dates[0]})
+    assert stored["matches"]["Gap and Crap"][0]["symbol"] == "GAPC"
+
+    # 歷史日期已物化：清空內存緩存後直接讀取，不再計算
+    async def fail(*args):
+        raise AssertionError("不應重新計算")
+
+    stocks.signal_engine.results.invalidate()
+    monkeypatch.setattr(stocks.signal_engine, "_evaluate", fail)
+    again = client.get("/api/strategy/Gap and Crap/matches", params={"date": dates[0]})
+    assert again.status_code == 200
+    assert again.json()["data"] == body["data"]
+
+    assert client.get("/api/strategy/Low Hanging Fruit/matches").status_code == 404
@@ -0,0 +1,58 @@
+# test_stock_routes.py
+
+import json
+
+from fastapi.testclient import TestClient
+
+from api.app import create_app
+
+def test_detail_and_bundle_format_decimal_market_cap(seeded_routes):
+    _, symbols, dates = seeded_routes
+    client = TestClient(create_app())
+
+    # 合成文檔的 market_cap_float 為 Decimal128
+    detail = client.get(f"/stocks/{symbols[0]}", params={"date": dates[0]})
+    bundle = client.get(f"/stocks/{symbols[0]}/bundle", params={"date": dates[0]})
+
+    assert detail.status_code == 200
+    assert detail.json()["market_cap_formatted"].startswith("$")
+    assert bundle.status_code == 200
+
+def test_batch_streams_one_line_per_symbol(seeded_routes):
+    _, symbols, dates = seeded_routes
+    client = TestClient(create_app())
+
+    response = client.get("/stocks/batch", params={"symbols": ",".join(symbols[:5] + ["NOPE"]), "date": dates[0]})
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["symbol"] for line in lines] == symbols[:5] + ["NOPE"]
+    assert all("error" not in line and line["market_cap_formatted"].startswith("$") for line in lines[:5])
+    assert lines[-1]["error"] == "not_found"
+
+def test_batch_render_error_becomes_an_error_line(seeded_routes, monkeypatch):
+    stocks, symbols, dates = seeded_routes
+    client = TestClient(create_app())
+    build_chart_section = stocks.build_chart_section
+
+    def failing(document, symbol, *args):
+        if symbol == symbols[1]:
+            raise ValueError("bad bars")
+        return build_chart_section(document, symbol, *args)
+
+    monkeypatch.setattr(stocks, "build_chart_section", failing)
+    response = client.get("/stocks/batch", params={"symbols": ",".join(symbols[:3]), "date": dates[0]})
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 3
+    assert "error" not in lines[0] and "error" not in lines[2]
+    assert lines[1]["symbol"] == symbols[1] and "bad bars" in lines[1]["error"]
+
+def test_batch_without_any_trading_day_is_404(seeded_routes):
+    stocks, symbols, _ = seeded_routes
+    from api.benchmarks.mongo_fixture import BenchMongoHandler
+
+    stocks.bind_mongo_handler(BenchMongoHandler())
+    response = TestClient(create_app()).get("/stocks/batch", params={"symbols": symbols[0]})
+
+    assert response.status_code == 404
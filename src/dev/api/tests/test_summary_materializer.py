@@ -0,0 +1,98 @@
+# test_summary_materializer.py
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("fakeredis")
+
+from api.benchmarks.mongo_fixture import BenchMongoHandler
+from api.benchmarks.synthetic import COLLECTION, seed_fundamentals
+from api.services.async_mongo import AsyncMongoHandler
+from api.services.shared_cache import SharedLease, open_backend
+from api.services.summary_materializer import SummaryMaterializer
+
+class _Dates:
+    def __init__(self, dates):
+        self._dates = sorted(dates, reverse=True)
+
+    async def dates(self):
+        return self._dates
+
+def _slow_materializer(handler, dates, lease, calls):
+    materializer = SummaryMaterializer(
+        AsyncMongoHandler(handler), COLLECTION, _Dates(dates), poll_interval=0.05,
+        queue_size=1, workers=1, lease=lease
+    )
+
+    async def materialize(symbol, date):
+        calls.append(symbol)
+        await asyncio.sleep(0.05)
+
+    materializer.materialize = materialize
+    return materializer
+
+def test_lease_is_renewed_during_a_long_round_and_work_stops_once_it_is_lost():
+    async def scenario():
+        handler = BenchMongoHandler()
+        _, dates = seed_fundamentals(handler.raw_db[COLLECTION], 60, 1, 5)
+        backend = open_backend("fakeredis://")
+        leader_calls, follower_calls = [], []
+        leader = _slow_materializer(handler, dates, SharedLease(backend, "summaries", ttl=0.3), leader_calls)
+        follower_lease = SharedLease(backend, "summaries", ttl=0.3)
+
+        renewing = None
+        leader.start()
+        try:
+            # 一輪需要約 3 秒，遠超租約的 0.3 秒；心跳續期期間其他 worker 取不到租約
+            for _ in range(10):
+                await asyncio.sleep(0.1)
+                assert not await follower_lease.held()
+            assert leader.status()["leader"]
+
+            # 租約被其他 worker 接手（並持續續期）後，領導者不再計算排隊的文檔
+            await backend.delete([follower_lease.key])
+            assert await follower_lease.held()
+
+            async def renew():
+                while True:
+                    await asyncio.sleep(0.05)
+                    await follower_lease.held()
+
+            renewing = asyncio.create_task(renew())
+            await asyncio.sleep(0.3)
+            done = len(leader_calls)
+            await asyncio.sleep(0.5)
+            assert len(leader_calls) <= done + 1
+            assert not leader.status()["leader"]
+        finally:
+            if renewing is not None:
+                renewing.cancel()
+            await leader.stop()
+            await backend.close()
+
+    asyncio.run(scenario())
+
+def test_backfill_is_limited_to_recent_dates():
+    class _Dates:
+        async def dates(self):
+            return ["2025-01-08", "2025-01-07", "2025-01-06", "2025-01-03", "2025-01-02"]
+
+    materializer = SummaryMaterializer(None, "fundamentals_of_top_list_symbols", _Dates(),
+                                       poll_interval=60, backfill_days=2)
+    scanned = []
+
+    async def scan(date):
+        scanned.append(date)
+        return 0
+
+    materializer.scan = scan
+
+    async def scenario():
+        task = asyncio.create_task(materializer._scan_loop())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert scanned == ["2025-01-07", "2025-01-08"]
@@ -0,0 +1,70 @@
+# test_symbol_search.py
+
+from fastapi.testclient import TestClient
+
+from api.app import create_app
+from api.services.symbol_search import SymbolSearchIndex
+
+def _index(*documents):
+    index = SymbolSearchIndex(None, "fundamentals_of_top_list_symbols", None)
+    for document in documents:
+        index.add(document)
+    return index
+
+def _doc(symbol, date, name, sector="Technology"):
+    return {"symbol": symbol, "today_date": date, "name": name, "company_info": {"sector": sector}}
+
+def test_exact_symbol_ranks_before_prefixes_and_names():
+    index = _index(
+        _doc("AMDX", "2025-01-03", "Amdx Labs"),
+        _doc("AMD", "2025-01-02", "Advanced Micro Devices"),
+        _doc("CAMD", "2025-01-03", "Amd Holdings", "Healthcare"),
+    )
+
+    results = index.search("amd")
+
+    assert [(row["symbol"], row["match"]) for row in results] == [
+        ("AMD", "symbol"), ("AMDX", "symbol_prefix"), ("CAMD", "name_prefix"),
+    ]
+
+def test_name_tokens_match_in_any_order_with_the_last_token_as_prefix():
+    index = _index(
+        _doc("BIOX", "2025-01-02", "Bio Gene Therapeutics", "Healthcare"),
+        _doc("GENT", "2025-01-02", "Gentle Bio Corp", "Healthcare"),
+        _doc("THER", "2025-01-02", "Therapy Partners", "Healthcare"),
+    )
+
+    assert [row["symbol"] for row in index.search("therap bio")] == []
+    assert [row["symbol"] for row in index.search("bio therap")] == ["BIOX"]
+    assert {row["symbol"] for row in index.search("bio gen")} == {"BIOX", "GENT"}
+    # 名稱以查詢開頭的排在只包含詞的前面
+    assert [row["match"] for row in index.search("bio gen")] == ["name_prefix", "name"]
+    assert {row["symbol"] for row in index.search("healthc")} == {"BIOX", "GENT", "THER"}
+    assert index.search("healthc")[0]["match"] == "sector"
+
+def test_ties_prefer_the_most_recent_symbol_and_newest_name_wins():
+    index = _index(
+        _doc("ABC", "2025-01-02", "Old Name"),
+        _doc("ABD", "2025-01-06", "Other"),
+        _doc("ABC", "2025-01-03", "New Name"),
+    )
+
+    assert [row["symbol"] for row in index.search("AB")] == ["ABD", "ABC"]
+    assert index.search("new")[0]["symbol"] == "ABC"
+    assert index.search("old") == []
+    assert index.search("   ") == []
+
+def test_search_route(seeded_routes):
+    _, symbols, _ = seeded_routes
+    client = TestClient(create_app())
+
+    exact = client.get("/stocks/search", params={"q": symbols[1].lower()}).json()
+    assert exact["data"][0] == {**exact["data"][0], "symbol": symbols[1], "match": "symbol"}
+
+    prefix = client.get("/stocks/search", params={"q": "S001", "limit": 5}).json()
+    assert prefix["count"] == 5 and all(row["symbol"].startswith("S001") for row in prefix["data"])
+
+    assert client.get("/stocks/search", params={"q": "   "}).json()["count"] == 0
+    assert client.get("/stocks/search", params={"q": ""}).status_code == 422
+    assert client.get("/stocks/search", params={"q": "x" * 65}).status_code == 422
+    assert client.get("/stocks/search", params={"q": "S0", "limit": 51}).status_code == 422
@@ -180,10 +180,15 @@ const StockDetail: React.FC = () => {
 
       if (response.ok) {
         setStatusMessage({ 
-          message: typeof result === 'string' ? result : 'News deleted successfully!', 
+          message: typeof result === 'string' ? result : result.message || 'News deleted successfully!', 
           severity: 'success' 
         });
-        fetchStockData();
+        if (Array.isArray(result.raw_news)) {
+          // The API returns the updated news list; no need to refetch the whole document
+          setStockData(prev => prev ? { ...prev, raw_news: result.raw_news } : prev);
+        } else {
+          fetchStockData();
+        }
       } else {
         let errorMessage = 'Failed to delete news.';
         if (result.detail) {
@@ -209,7 +214,11 @@ const StockDetail: React.FC = () => {
     }
   };
 
-  const handleNewsSubmittedCallback = React.useCallback(() => {
+  const handleNewsSubmittedCallback = React.useCallback((rawNews?: ApiStockData['raw_news']) => {
+    if (rawNews) {
+      setStockData(prev => prev ? { ...prev, raw_news: rawNews } : prev);
+      return;
+    }
     console.log("News submitted via NewsInputCard, refetching stock data...");
     fetchStockData();
     // Optionally, set a success message here if NewsInputCard doesn't show its own persistent one